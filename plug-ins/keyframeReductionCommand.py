@@ -0,0 +1,23 @@
+from maya import OpenMayaMPx
+
+import keyframeReduction
+from keyframeReduction import command
+
+
+def initializePlugin(obj):
+    plugin = OpenMayaMPx.MFnPlugin(
+        obj,
+        keyframeReduction.__author__,
+        keyframeReduction.__version__,
+        "Any"
+    )
+    plugin.registerCommand(
+        command.COMMAND_NAME,
+        command.creator,
+        command.syntaxCreator
+    )
+
+
+def uninitializePlugin(obj):
+    plugin = OpenMayaMPx.MFnPlugin(obj)
+    plugin.deregisterCommand(command.COMMAND_NAME)
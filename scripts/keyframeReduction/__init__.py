@@ -61,7 +61,12 @@ Note
 The fitting algorithm is ported from Paper.js - The Swiss Army Knife of Vector Graphics Scripting.
 http://paperjs.org/
 """
-from .classes.keyframeReduction import KeyframeReduction
+try:
+    from .classes.keyframeReduction import KeyframeReduction
+except ImportError:
+    # maya is not available, the fitting classes can still be imported
+    # directly from the keyframeReduction.classes package.
+    KeyframeReduction = None
 
 __author__ = "Robert Joosten"
 __version__ = "0.0.1"
@@ -0,0 +1,441 @@
+"""
+Reduce the animation curves stored in .anim and .atom files without Maya.
+The file is read as a stream, each animData block is parsed, sampled using
+the AnimCurve evaluator, fitted and written before the next block is read.
+All other lines are copied as they are, which keeps the memory usage bounded
+no matter how big the file is.
+::
+    python -m keyframeReduction.animFile walk.anim walkReduced.anim --error 0.1
+"""
+import sys
+import math
+import time
+import argparse
+from collections import deque
+
+from . import parallel
+from .utils import THRESHOLD
+from .classes.fit import fitSegments, FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE
+from .classes.merge import mergeAnimCurve
+from .classes.animCurve import AnimCurve, STEP, STEP_NEXT
+from .classes.sample import getSampleTolerance
+
+
+# ----------------------------------------------------------------------------
+
+
+DEFAULT_SETTINGS = {
+    "error": 1,
+    "step": 1,
+    "weightedTangents": True,
+    "tangentSplitAuto": False,
+    "tangentSplitExisting": False,
+    "tangentSplitAngleThreshold": False,
+    "tangentSplitAngleThresholdValue": 15.0,
+    "splitSimplify": False,
+    "fitter": FITTER_GREEDY,
+    "adaptiveSampling": False,
+}
+
+FIXED = "fixed"
+LINEAR = "linear"
+FLAT = "flat"
+TANGENT_TYPES = [
+    "auto", "clamped", "fast", "fixed", "flat", "linear",
+    "plateau", "slow", "spline", "step", "stepnext",
+]
+
+# the tangent types of which the angle only depends on the key itself and
+# its neighbours in a way that can be evaluated exactly. Maya evaluates the
+# other tangent types using rules that flatten or clamp the tangents, blocks
+# with those tangent types are not reduced.
+RESOLVED_TANGENT_TYPES = [FIXED, FLAT, LINEAR, STEP, STEP_NEXT]
+
+
+# ----------------------------------------------------------------------------
+
+
+def parseKey(line):
+    """
+    Parse a key line of an animData block. The tangent angle and weight are
+    only stored for fixed tangents. The tokens between the value and the
+    tangent types and the tokens after the tangent types differ between the
+    .anim and .atom format, these are stored so the line can be recreated.
+    Lines with tangent types that are unknown or that can't be resolved
+    exactly, like auto and clamped tangents, are not parsed, None is
+    returned for these lines.
+
+    :param str line:
+    :return: Key data
+    :rtype: dict/None
+    """
+    tokens = line.strip().rstrip(";").split()
+
+    # get tangent types
+    index = 2
+    while index < len(tokens) - 1 and tokens[index] not in TANGENT_TYPES:
+        index += 1
+
+    # validate tangent types
+    if index >= len(tokens) - 1 or tokens[index + 1] not in TANGENT_TYPES:
+        return None
+
+    inType, outType = tokens[index], tokens[index + 1]
+    if inType not in RESOLVED_TANGENT_TYPES or outType not in RESOLVED_TANGENT_TYPES:
+        return None
+
+    # get fixed tangent angles and weights
+    rest = tokens[index + 2:]
+    count = 2 * ((inType == FIXED) + (outType == FIXED))
+    tangents = [float(t) for t in rest[len(rest) - count:]]
+    inTangent = tangents[:2] if inType == FIXED else [None, None]
+    outTangent = tangents[-2:] if outType == FIXED else [None, None]
+
+    return {
+        "time": float(tokens[0]),
+        "value": float(tokens[1]),
+        "prefix": tokens[2:index],
+        "suffix": rest[:len(rest) - count],
+        "inType": inType,
+        "outType": outType,
+        "inAngle": inTangent[0],
+        "inWeight": inTangent[1],
+        "outAngle": outTangent[0],
+        "outWeight": outTangent[1],
+    }
+
+
+def resolveTangents(keys):
+    """
+    Calculate the tangent angles and weights of keys that don't have fixed
+    tangents. Linear tangents point at the neighbouring key, flat and
+    stepped tangents are horizontal. The weights are set to a third of the
+    neighbouring segment.
+
+    :param list keys:
+    """
+    for i, key in enumerate(keys):
+        previous = keys[max(i - 1, 0)]
+        following = keys[min(i + 1, len(keys) - 1)]
+
+        for side, other in [("in", previous), ("out", following)]:
+            # validate tangent
+            tangentType = key[side + "Type"]
+            if key[side + "Angle"] is not None:
+                continue
+
+            # get slope
+            if tangentType == LINEAR and other is not key and other["time"] != key["time"]:
+                slope = (other["value"] - key["value"]) / (other["time"] - key["time"])
+            else:
+                slope = 0.0
+
+            # get angle and weight
+            angle = math.atan(slope)
+            third = abs(other["time"] - key["time"]) / 3.0
+            key[side + "Angle"] = math.degrees(angle)
+            key[side + "Weight"] = third / math.cos(angle) if third else 1.0
+
+
+def formatKey(template, time, value, inAngle, inWeight, outAngle, outWeight, outType=FIXED):
+    """
+    Create a key line with fixed in tangents using the layout of the template
+    key. The out tangent angle and weight are only written when the out
+    tangent type is fixed.
+
+    :param dict template:
+    :param float time:
+    :param float value:
+    :param float inAngle:
+    :param float inWeight:
+    :param float outAngle:
+    :param float outWeight:
+    :param str outType:
+    :return: Key line
+    :rtype: str
+    """
+    # get suffix with updated tangent lock
+    suffix = list(template["suffix"])
+    if suffix:
+        locked = outType == FIXED and abs(inAngle - outAngle) <= THRESHOLD
+        suffix[0] = "1" if locked else "0"
+
+    # get tangents
+    tangents = [inAngle, inWeight]
+    if outType == FIXED:
+        tangents.extend([outAngle, outWeight])
+
+    tokens = ["{0:.10g}".format(time), "{0:.10g}".format(value)]
+    tokens.extend(template["prefix"])
+    tokens.extend([FIXED, outType])
+    tokens.extend(suffix)
+    tokens.extend("{0:.10g}".format(v) for v in tangents)
+
+    return " ".join(tokens) + ";"
+
+
+# ----------------------------------------------------------------------------
+
+
+def readChunks(lines):
+    """
+    Group the lines of the file into chunks, every animData block is a
+    single chunk and every other line is a chunk of its own.
+
+    :param iterable lines:
+    :return: Chunks
+    :rtype: generator
+    """
+    block = None
+    depth = 0
+
+    for line in lines:
+        # yield lines outside of animData blocks
+        if block is None and not line.strip().startswith("animData"):
+            yield [line]
+            continue
+
+        # collect animData block
+        block = block or []
+        block.append(line)
+        depth += line.count("{") - line.count("}")
+
+        if depth <= 0:
+            yield block
+            block = None
+            depth = 0
+
+    if block:
+        yield block
+
+
+def reduceChunk(chunk, settings):
+    """
+    Reduce the keys of an animData block, chunks that are not animData
+    blocks or that are not driven by time are returned as they are. The
+    block is only replaced if the reduction results in less keys. Blocks
+    with keys that can't be parsed are returned as they are as well.
+
+    :param list chunk:
+    :param dict settings:
+    :return: Lines, number of keys and number of reduced keys
+    :rtype: tuple
+    """
+    # validate chunk
+    if not chunk[0].strip().startswith("animData"):
+        return chunk, 0, 0
+
+    # get block settings and key lines
+    header, keyLines, footer = [], [], []
+    data = {}
+    inKeys = False
+
+    for line in chunk:
+        stripped = line.strip()
+        if footer or (inKeys and stripped.startswith("}")):
+            footer.append(line)
+        elif inKeys:
+            keyLines.append(line)
+        else:
+            header.append(line)
+            inKeys = stripped.startswith("keys")
+            tokens = stripped.rstrip(";").split()
+            if len(tokens) == 2:
+                data[tokens[0]] = tokens[1]
+
+    # validate keys
+    keys = [parseKey(line) for line in keyLines if line.strip()]
+    if data.get("input", "time") != "time" or len(keys) < 3 or None in keys:
+        return chunk, len(keys), len(keys)
+
+    # get animation curve
+    resolveTangents(keys)
+    animCurve = AnimCurve(
+        [key["time"] for key in keys],
+        [key["value"] for key in keys],
+        [key["inAngle"] for key in keys],
+        [key["outAngle"] for key in keys],
+        [key["inWeight"] for key in keys],
+        [key["outWeight"] for key in keys],
+        [key["inType"] for key in keys],
+        [key["outType"] for key in keys],
+        data.get("weighted") == "1",
+    )
+
+    # sample animation curve and fit keyframes, merged curves are not
+    # sampled. Stepped curves are always merged.
+    if settings["fitter"] == FITTER_MERGE or animCurve.isStepped():
+        keyframes = mergeAnimCurve(animCurve, settings["error"], settings["weightedTangents"])
+    else:
+        segments = animCurve.getSegments(
+            settings["step"],
+            settings["tangentSplitAuto"],
+            settings["tangentSplitExisting"],
+            settings["tangentSplitAngleThreshold"],
+            settings["tangentSplitAngleThresholdValue"],
+            getSampleTolerance(settings["error"], settings["adaptiveSampling"]),
+        )
+        keyframes = fitSegments(
+            segments,
+            settings["error"],
+            settings["weightedTangents"],
+            settings["splitSimplify"],
+            settings["fitter"]
+        )
+
+    reduced = AnimCurve.fromKeyframes(keyframes, settings["weightedTangents"])
+
+    # only replace keys if the curve can be optimized
+    if len(reduced.times) >= len(keys):
+        return chunk, len(keys), len(keys)
+
+    # get lines
+    indent = keyLines[0][:len(keyLines[0]) - len(keyLines[0].lstrip())]
+    weighted = "1" if settings["weightedTangents"] else "0"
+    lines = [
+        line.replace("weighted {};".format(data.get("weighted")), "weighted {};".format(weighted))
+        if line.strip().startswith("weighted")
+        else line
+        for line in header
+    ]
+
+    for i in range(len(reduced.times)):
+        lines.append(
+            indent + formatKey(
+                keys[0],
+                reduced.times[i],
+                reduced.values[i],
+                reduced.inAngles[i],
+                reduced.inWeights[i] if settings["weightedTangents"] else 1.0,
+                reduced.outAngles[i],
+                reduced.outWeights[i] if settings["weightedTangents"] else 1.0,
+                reduced.outTangentTypes[i],
+            ) + "\n"
+        )
+
+    lines.extend(footer)
+    return lines, len(keys), len(reduced.times)
+
+
+def reduceChunkWorker(arguments):
+    """
+    :param tuple arguments: Chunk and settings
+    :return: Lines, number of keys and number of reduced keys
+    :rtype: tuple
+    """
+    return reduceChunk(*arguments)
+
+
+# ----------------------------------------------------------------------------
+
+
+def reduceFile(inputPath, outputPath, workers=1, window=64, **settings):
+    """
+    Reduce all animation curves in the input file and write the result to
+    the output file. When more than one worker is used the animData blocks
+    are reduced in a process pool, at most window blocks are in flight at
+    the same time and the blocks are written in their original order.
+
+    :param str inputPath:
+    :param str outputPath:
+    :param int/None workers: Number of processes, None is the cpu count
+    :param int window: Maximum number of blocks in flight
+    :return: Number of animation curves, keys and reduced keys
+    :rtype: tuple
+    """
+    # variables
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    pool = parallel.getPool(workers) if workers != 1 else None
+    pending = deque()
+    counts = [0, 0, 0]
+
+    def write(result):
+        lines, keys, reducedKeys = result
+        output.writelines(lines)
+        if keys:
+            counts[0] += 1
+            counts[1] += keys
+            counts[2] += reducedKeys
+
+    try:
+        with open(inputPath, "r") as input, open(outputPath, "w") as output:
+            for chunk in readChunks(input):
+                # reduce in current process
+                if pool is None:
+                    write(reduceChunk(chunk, settings))
+                    continue
+
+                # reduce in process pool, lines outside of animData blocks
+                # are queued so the order is preserved.
+                if chunk[0].strip().startswith("animData"):
+                    pending.append(pool.apply_async(reduceChunkWorker, ((chunk, settings),)))
+                else:
+                    pending.append((chunk, 0, 0))
+
+                while len(pending) > window or (pending and isinstance(pending[0], tuple)):
+                    result = pending.popleft()
+                    write(result if isinstance(result, tuple) else result.get())
+
+            # write remaining blocks
+            while pending:
+                result = pending.popleft()
+                write(result if isinstance(result, tuple) else result.get())
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return tuple(counts)
+
+
+# ----------------------------------------------------------------------------
+
+
+def main(args=None):
+    """
+    :param list/None args: Command line arguments, default is sys.argv
+    :return: Exit code
+    :rtype: int
+    """
+    # get arguments
+    parser = argparse.ArgumentParser(
+        prog="python -m keyframeReduction.animFile",
+        description="Reduce the keyframes of the animation curves in .anim and .atom files."
+    )
+    parser.add_argument("input", help="Input .anim or .atom file.")
+    parser.add_argument("output", help="Output file.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes, 0 is the cpu count.")
+    parser.add_argument("--error", type=float, default=1.0)
+    parser.add_argument("--step", type=float, default=1.0)
+    parser.add_argument("--noWeightedTangents", dest="weightedTangents", action="store_false")
+    parser.add_argument("--tangentSplitAuto", action="store_true")
+    parser.add_argument("--tangentSplitExisting", action="store_true")
+    parser.add_argument("--tangentSplitAngleThreshold", action="store_true")
+    parser.add_argument("--tangentSplitAngleThresholdValue", type=float, default=15.0)
+    parser.add_argument("--splitSimplify", action="store_true")
+    parser.add_argument("--fitter", choices=[FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE], default=FITTER_GREEDY)
+    parser.add_argument("--adaptiveSampling", action="store_true")
+    args = vars(parser.parse_args(args))
+
+    # reduce file
+    t = time.time()
+    inputPath, outputPath = args.pop("input"), args.pop("output")
+    workers = args.pop("workers") or None
+    curves, keys, reducedKeys = reduceFile(inputPath, outputPath, workers, **args)
+
+    print(
+        "< keyframeReduction.animFile "
+        "| animation-curves: {0} "
+        "| process-time: {1:,.2f} seconds "
+        "| reduction-rate: {2:,.2f}% >".format(
+            curves,
+            time.time() - t,
+            100 - ((reducedKeys / float(max(keys, 1))) * 100)
+        )
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
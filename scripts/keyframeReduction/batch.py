@@ -0,0 +1,373 @@
+"""
+Reduce the animation curves of many Maya scene files using mayapy. Each
+worker process runs its own headless Maya session and reduces one file at a
+time, the results are saved in place or to an output directory and a
+summary of the timings and reduction rates is written as json.
+::
+    mayapy -m keyframeReduction.batch "anim/*.ma" --error 0.1 --workers 4 \\
+        --output reduced --summary reduced/summary.json
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import fnmatch
+
+from . import utils
+from . import parallel
+from . import pipeline
+from . import shared
+from .classes.keyframeReduction import SAMPLER_API, SAMPLER_CMDS, SAMPLER_PYTHON
+from .classes.keyframeReduction import WRITER_API, WRITER_CMDS
+from .classes.fit import FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE
+from .classes.cache import FitCache
+
+
+# ----------------------------------------------------------------------------
+
+
+FILE_TYPES = {
+    ".ma": "mayaAscii",
+    ".mb": "mayaBinary",
+}
+
+# caches are created once per process so the results can be reused by all
+# of the files reduced by that process.
+CACHES = {}
+
+
+# ----------------------------------------------------------------------------
+
+
+def initializeStandalone():
+    """
+    Initialize a headless Maya session in the current process, this is done
+    once per worker process. The undo queue is disabled as the changes are
+    never undone in batch mode.
+    """
+    from maya import standalone, cmds
+    standalone.initialize(name="python")
+    cmds.undoInfo(stateWithoutFlush=False)
+
+
+def getFiles(patterns, fileLists=None):
+    """
+    Get the scene files from the provided paths or glob patterns and the
+    paths listed in the file lists, one path per line. Duplicate files are
+    removed while the order is preserved.
+
+    :param list patterns:
+    :param list/None fileLists:
+    :return: Scene files
+    :rtype: list
+    """
+    # get patterns from file lists
+    patterns = list(patterns)
+    for fileList in fileLists or []:
+        with open(fileList) as f:
+            patterns.extend(line.strip() for line in f if line.strip())
+
+    # get files
+    files = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            path = os.path.abspath(path)
+            if path not in files:
+                files.append(path)
+
+    return files
+
+
+def getOutputPath(path, output=None):
+    """
+    :param str path:
+    :param str/None output: Output directory, the file is saved in place when None
+    :return: Output path
+    :rtype: str
+    """
+    if not output:
+        return path
+
+    return os.path.join(os.path.abspath(output), os.path.basename(path))
+
+
+def getCache(path, maxBytes):
+    """
+    :param str/None path: Cache directory
+    :param int maxBytes: Maximum size of the cache directory
+    :return: Cache of the current process
+    :rtype: FitCache
+    """
+    if path not in CACHES:
+        CACHES[path] = FitCache(path=path, maxBytes=maxBytes)
+
+    return CACHES[path]
+
+
+def getAnimationCurves(curves=None, attributes=None):
+    """
+    Get the suitable animation curves in the current scene, the animation
+    curves can be filtered by their name using wildcard patterns and by the
+    attribute name of the plug they are connected to.
+
+    :param list/None curves: Animation curve name patterns
+    :param list/None attributes: Attribute names
+    :return: Animation curves
+    :rtype: list
+    """
+    # get animation curves
+    animationCurves = utils.getAllAnimationCurves()
+
+    # filter by name
+    if curves:
+        animationCurves = [
+            animationCurve
+            for animationCurve in animationCurves
+            if any(fnmatch.fnmatchcase(animationCurve, pattern) for pattern in curves)
+        ]
+
+    # filter by plug
+    if attributes:
+        data = utils.filterAnimationCurvesByPlug(animationCurves)
+        animationCurves = [
+            animationCurve
+            for attribute in attributes
+            for animationCurve in data.get(attribute, [])
+        ]
+
+    return animationCurves
+
+
+# ----------------------------------------------------------------------------
+
+
+def reduceFile(arguments):
+    """
+    Open the scene file, reduce its animation curves and save the result.
+    Errors are stored in the summary rather than raised so a single broken
+    file doesn't stop the batch.
+
+    :param tuple arguments: Path, output directory, curves, attributes, group, cache and settings
+    :return: Summary
+    :rtype: dict
+    """
+    from maya import cmds
+
+    # variables
+    path, output, curves, attributes, group, cache, settings = arguments
+    outputPath = getOutputPath(path, output)
+    summary = {"file": path, "output": outputPath}
+    t = time.time()
+
+    # get cache
+    cache = getCache(*cache)
+    hits, misses = cache.hits, cache.misses
+
+    try:
+        # open file
+        cmds.file(path, open=True, force=True, prompt=False)
+        summary["open-time"] = time.time() - t
+
+        # reduce animation curves, grouped animation curves share their key
+        # times and are not cached.
+        animationCurves = getAnimationCurves(curves, attributes)
+        if group:
+            rates = shared.reduceAnimationCurves(animationCurves, group, **settings)
+        else:
+            rates = pipeline.reduceMany(animationCurves, cache=cache, **settings)
+        summary["animation-curves"] = dict(zip(animationCurves, rates))
+        summary["reduction-rate"] = sum(rates) / max(len(rates), 1)
+        summary["reduce-time"] = time.time() - t - summary["open-time"]
+        summary["cache-hits"] = cache.hits - hits
+        summary["cache-misses"] = cache.misses - misses
+
+        # save file
+        extension = os.path.splitext(outputPath)[-1].lower()
+        cmds.file(rename=outputPath)
+        cmds.file(save=True, force=True, type=FILE_TYPES.get(extension, "mayaAscii"))
+    except Exception as e:
+        summary["error"] = str(e)
+    finally:
+        cmds.file(new=True, force=True)
+
+    summary["process-time"] = time.time() - t
+    return summary
+
+
+def reduceFiles(
+        files,
+        output=None,
+        curves=None,
+        attributes=None,
+        group=None,
+        workers=None,
+        cache=None,
+        cacheBytes=256 * 1024 * 1024,
+        **settings
+):
+    """
+    Reduce the animation curves of the provided scene files, the files are
+    spread over a process pool where each process runs a headless Maya
+    session. When the workers are set to one the files are reduced in the
+    current process. Each process caches the fitted keyframes in memory and
+    when a cache directory is provided the processes share the results on
+    disk.
+
+    :param list files:
+    :param str/None output: Output directory, files are saved in place when None
+    :param list/None curves: Animation curve name patterns
+    :param list/None attributes: Attribute names
+    :param str/None group: "node" or "plug" to reduce the groups using shared key times
+    :param int/None workers: Number of processes, default is the cpu count
+    :param str/None cache: Cache directory
+    :param int cacheBytes: Maximum size of the cache directory
+    :return: Summary for each file
+    :rtype: list
+    """
+    # create output directory
+    if output and not os.path.exists(output):
+        os.makedirs(output)
+
+    arguments = [
+        (path, output, curves, attributes, group, (cache, cacheBytes), settings)
+        for path in files
+    ]
+
+    # reduce in current process
+    if workers == 1 or len(arguments) <= 1:
+        initializeStandalone()
+        return [reduceFile(a) for a in arguments]
+
+    # reduce in process pool, files are handed out one at a time as their
+    # sizes can differ a lot.
+    pool = parallel.getPool(workers, initializeStandalone)
+    try:
+        return pool.map(reduceFile, arguments, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+# ----------------------------------------------------------------------------
+
+
+def getParser():
+    """
+    :return: Argument parser
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="mayapy -m keyframeReduction.batch",
+        description="Reduce the keyframes of the animation curves in Maya scene files."
+    )
+
+    # files
+    parser.add_argument("files", nargs="*", help="Scene files or glob patterns.")
+    parser.add_argument("--fileList", action="append", help="Text file with a scene file on each line.")
+    parser.add_argument("--output", help="Output directory, files are saved in place when not set.")
+    parser.add_argument("--summary", help="Json file to write the summary to.")
+    parser.add_argument("--workers", type=int, help="Number of Maya processes, default is the cpu count.")
+    parser.add_argument("--cache", help="Directory to cache the fitted keyframes in.")
+    parser.add_argument("--cacheSize", type=int, default=256, help="Maximum size of the cache directory in MB.")
+
+    # filters
+    parser.add_argument("--curve", action="append", help="Animation curve name pattern.")
+    parser.add_argument("--attribute", action="append", help="Attribute name, e.g. translateX.")
+
+    # settings
+    parser.add_argument("--error", type=float, default=1.0)
+    parser.add_argument("--step", type=float, default=1.0)
+    parser.add_argument("--noWeightedTangents", dest="weightedTangents", action="store_false")
+    parser.add_argument("--tangentSplitAuto", action="store_true")
+    parser.add_argument("--tangentSplitExisting", action="store_true")
+    parser.add_argument("--tangentSplitAngleThreshold", action="store_true")
+    parser.add_argument("--tangentSplitAngleThresholdValue", type=float, default=15.0)
+    parser.add_argument("--splitSimplify", action="store_true")
+    parser.add_argument("--fitter", choices=[FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE], default=FITTER_GREEDY)
+    parser.add_argument("--adaptiveSampling", action="store_true")
+    parser.add_argument("--sharedKeys", choices=shared.GROUPS, help="Reduce the animation curves of each node or plug using the same key times.")
+    parser.add_argument("--sampler", choices=[SAMPLER_API, SAMPLER_CMDS, SAMPLER_PYTHON], default=SAMPLER_API)
+    parser.add_argument("--writer", choices=[WRITER_API, WRITER_CMDS], default=WRITER_API)
+
+    return parser
+
+
+def main(args=None):
+    """
+    :param list/None args: Command line arguments, default is sys.argv
+    :return: Exit code
+    :rtype: int
+    """
+    # get arguments
+    parser = getParser()
+    args = parser.parse_args(args)
+    files = getFiles(args.files, args.fileList)
+
+    if not files:
+        parser.error("no scene files provided")
+
+    # reduce files
+    t = time.time()
+    summaries = reduceFiles(
+        files,
+        output=args.output,
+        curves=args.curve,
+        attributes=args.attribute,
+        group=args.sharedKeys,
+        workers=args.workers,
+        cache=args.cache,
+        cacheBytes=args.cacheSize * 1024 * 1024,
+        error=args.error,
+        step=args.step,
+        weightedTangents=args.weightedTangents,
+        tangentSplitAuto=args.tangentSplitAuto,
+        tangentSplitExisting=args.tangentSplitExisting,
+        tangentSplitAngleThreshold=args.tangentSplitAngleThreshold,
+        tangentSplitAngleThresholdValue=args.tangentSplitAngleThresholdValue,
+        splitSimplify=args.splitSimplify,
+        fitter=args.fitter,
+        adaptiveSampling=args.adaptiveSampling,
+        sampler=args.sampler,
+        writer=args.writer,
+    )
+
+    # print summary
+    for summary in summaries:
+        if "error" in summary:
+            print("< keyframeReduction.batch | file: {0} | error: {1} >".format(summary["file"], summary["error"]))
+            continue
+
+        print(
+            "< keyframeReduction.batch "
+            "| file: {0} "
+            "| animation-curves: {1} "
+            "| process-time: {2:,.2f} seconds "
+            "| reduction-rate: {3:,.2f}% "
+            "| cache-hits: {4} "
+            "| cache-misses: {5} >".format(
+                summary["file"],
+                len(summary["animation-curves"]),
+                summary["process-time"],
+                summary["reduction-rate"],
+                summary["cache-hits"],
+                summary["cache-misses"]
+            )
+        )
+
+    # write summary
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(
+                {"process-time": time.time() - t, "files": summaries},
+                f,
+                indent=4,
+                sort_keys=True
+            )
+
+    return 1 if any("error" in summary for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,601 @@
+import math
+import bisect
+
+from .split import (
+    getAngles,
+    getStepAngles,
+    findTangentSplitAuto,
+    findTangentSplitExisting,
+    findTangentSplitThreshold,
+    splitPoints,
+)
+from .sample import sampleAdaptive
+from ..utils import floatRange, THRESHOLD
+
+
+# ----------------------------------------------------------------------------
+
+
+STEP = "step"
+STEP_NEXT = "stepnext"
+
+INFINITY_CONSTANT = "constant"
+INFINITY_LINEAR = "linear"
+INFINITY_CYCLE = "cycle"
+INFINITY_CYCLE_RELATIVE = "cycleRelative"
+INFINITY_OSCILLATE = "oscillate"
+
+SOLVE_ITERATIONS = 32
+SOLVE_TOLERANCE = 1e-9
+
+
+# ----------------------------------------------------------------------------
+
+
+def bezier(p0, p1, p2, p3, t):
+    """
+    :param float p0:
+    :param float p1:
+    :param float p2:
+    :param float p3:
+    :param float t:
+    :return: Cubic bezier value at t
+    :rtype: float
+    """
+    s = 1 - t
+    return s * s * s * p0 + 3 * s * s * t * p1 + 3 * s * t * t * p2 + t * t * t * p3
+
+
+def bezierDerivative(p0, p1, p2, p3, t):
+    """
+    :param float p0:
+    :param float p1:
+    :param float p2:
+    :param float p3:
+    :param float t:
+    :return: Cubic bezier derivative at t
+    :rtype: float
+    """
+    s = 1 - t
+    return 3 * s * s * (p1 - p0) + 6 * s * t * (p2 - p1) + 3 * t * t * (p3 - p2)
+
+
+def solveBezier(x0, x1, x2, x3, x):
+    """
+    Find the parameter of a cubic bezier that evaluates to the provided x
+    value. Newton-Raphson iteration is used and bisection is used as a
+    fallback when the newton step leaves the bracket.
+
+    :param float x0:
+    :param float x1:
+    :param float x2:
+    :param float x3:
+    :param float x:
+    :return: Parameter
+    :rtype: float
+    """
+    lower, upper = 0.0, 1.0
+    t = (x - x0) / (x3 - x0)
+
+    for _ in range(SOLVE_ITERATIONS):
+        # validate difference
+        diff = bezier(x0, x1, x2, x3, t) - x
+        if abs(diff) < SOLVE_TOLERANCE:
+            return t
+
+        # update bracket
+        if diff > 0:
+            upper = t
+        else:
+            lower = t
+
+        # try newton step
+        derivative = bezierDerivative(x0, x1, x2, x3, t)
+        if derivative > 0:
+            root = t - diff / derivative
+            if lower < root < upper:
+                t = root
+                continue
+
+        # fall back on bisection
+        t = (lower + upper) * 0.5
+
+    return t
+
+
+def isStepped(outTangentTypes):
+    """
+    An animation curve is stepped when every keyframe but the last has a
+    stepped out tangent, the value of every keyframe is held until the next
+    keyframe. Animation curves with less than two keyframes are never
+    stepped.
+
+    :param list outTangentTypes:
+    :return: Stepped state
+    :rtype: bool
+    """
+    return len(outTangentTypes) > 1 and all(t == STEP for t in outTangentTypes[:-1])
+
+
+# ----------------------------------------------------------------------------
+
+
+class AnimCurve(object):
+    """
+    Evaluate an animation curve from its keyframe and tangent data without
+    the need of Maya. The key data only has to be read once after which the
+    curve can be sampled using pure math, this makes it possible to sample
+    outside of Maya or in other processes.
+
+    The tangents are described by their angle in degrees and their weight.
+    Weighted tangents place the bezier control points at the weight along
+    the tangent angle, matching how the tangents are written by the
+    KeyframeReduction class. Non-weighted tangents place the control points
+    at a third of the segment, which results in a hermite interpolation.
+    """
+    def __init__(
+            self,
+            times,
+            values,
+            inAngles,
+            outAngles,
+            inWeights=None,
+            outWeights=None,
+            inTangentTypes=None,
+            outTangentTypes=None,
+            weightedTangents=False,
+            preInfinity=INFINITY_CONSTANT,
+            postInfinity=INFINITY_CONSTANT,
+    ):
+        """
+        :param list times:
+        :param list values:
+        :param list inAngles:
+        :param list outAngles:
+        :param list/None inWeights:
+        :param list/None outWeights:
+        :param list/None inTangentTypes:
+        :param list/None outTangentTypes:
+        :param bool weightedTangents:
+        :param str preInfinity:
+        :param str postInfinity:
+        """
+        # variables
+        length = len(times)
+
+        self._times = [float(t) for t in times]
+        self._values = [float(v) for v in values]
+        self._inAngles = [float(a) for a in inAngles]
+        self._outAngles = [float(a) for a in outAngles]
+        self._inWeights = [float(w) for w in inWeights or [1.0] * length]
+        self._outWeights = [float(w) for w in outWeights or [1.0] * length]
+        self._inTangentTypes = list(inTangentTypes or ["fixed"] * length)
+        self._outTangentTypes = list(outTangentTypes or ["fixed"] * length)
+        self._weightedTangents = bool(weightedTangents)
+        self._preInfinity = preInfinity
+        self._postInfinity = postInfinity
+
+        # get bezier control points of each segment
+        self._controls = [self._getSegmentControls(i) for i in range(length - 1)]
+
+    def __repr__(self):
+        return "< AnimCurve object | keys: {} | weighted-tangents: {} >".format(
+            len(self.times),
+            self.weightedTangents
+        )
+
+    def __eq__(self, other):
+        """
+        Animation curves are equal when all of their keyframe, tangent and
+        infinity data is the same.
+
+        :param AnimCurve other:
+        :return: Equal state
+        :rtype: bool
+        """
+        if not isinstance(other, AnimCurve):
+            return NotImplemented
+
+        return self.getData() == other.getData()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def fromKeyframes(cls, keyframes, weightedTangents=True):
+        """
+        Create an animation curve from fitted keyframes. The handles of the
+        keyframes are converted into tangent angles and weights. The in
+        handle of the first keyframe and the out handle of the last
+        keyframe are not defined, these will mirror the opposite handle.
+        The out tangent types of the keyframes are kept. Keyframes that
+        share the same time, which happens at the boundaries of split
+        segments, are merged into a single keyframe with split tangents.
+
+        :param list keyframes:
+        :param bool weightedTangents:
+        :return: Animation curve
+        :rtype: AnimCurve
+        """
+        # variables
+        times, values = [], []
+        inAngles, outAngles = [], []
+        inWeights, outWeights = [], []
+        outTangentTypes = []
+
+        for keyframe in keyframes:
+            # get handles, the in handle points backwards in time so its
+            # angle is relative to the negative x axis.
+            inHandle = keyframe.inHandle
+            outHandle = keyframe.outHandle
+
+            if inHandle is None and outHandle is not None:
+                inHandle = (-outHandle[0], -outHandle[1])
+            elif outHandle is None and inHandle is not None:
+                outHandle = (-inHandle[0], -inHandle[1])
+            elif inHandle is None and outHandle is None:
+                inHandle, outHandle = (-1.0, 0.0), (1.0, 0.0)
+
+            # merge keyframes that share the same time, the previous
+            # keyframe keeps its in tangent and takes over the out tangent.
+            if times and abs(times[-1] - keyframe.point[0]) < THRESHOLD:
+                if keyframe.outHandle is not None:
+                    outAngles[-1] = math.degrees(math.atan2(outHandle[1], outHandle[0]))
+                    outWeights[-1] = math.sqrt(outHandle[0] * outHandle[0] + outHandle[1] * outHandle[1])
+                    outTangentTypes[-1] = keyframe.outTangentType
+
+                continue
+
+            times.append(keyframe.point[0])
+            values.append(keyframe.point[1])
+            inAngles.append(math.degrees(math.atan2(-inHandle[1], -inHandle[0])))
+            outAngles.append(math.degrees(math.atan2(outHandle[1], outHandle[0])))
+            inWeights.append(math.sqrt(inHandle[0] * inHandle[0] + inHandle[1] * inHandle[1]))
+            outWeights.append(math.sqrt(outHandle[0] * outHandle[0] + outHandle[1] * outHandle[1]))
+            outTangentTypes.append(keyframe.outTangentType)
+
+        return cls(
+            times,
+            values,
+            inAngles,
+            outAngles,
+            inWeights,
+            outWeights,
+            outTangentTypes=outTangentTypes,
+            weightedTangents=weightedTangents
+        )
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def times(self):
+        """
+        :return: Keyframe times
+        :rtype: list
+        """
+        return self._times
+
+    @property
+    def values(self):
+        """
+        :return: Keyframe values
+        :rtype: list
+        """
+        return self._values
+
+    @property
+    def inAngles(self):
+        """
+        :return: In tangent angles in degrees
+        :rtype: list
+        """
+        return self._inAngles
+
+    @property
+    def outAngles(self):
+        """
+        :return: Out tangent angles in degrees
+        :rtype: list
+        """
+        return self._outAngles
+
+    @property
+    def inWeights(self):
+        """
+        :return: In tangent weights
+        :rtype: list
+        """
+        return self._inWeights
+
+    @property
+    def outWeights(self):
+        """
+        :return: Out tangent weights
+        :rtype: list
+        """
+        return self._outWeights
+
+    @property
+    def inTangentTypes(self):
+        """
+        :return: In tangent types
+        :rtype: list
+        """
+        return self._inTangentTypes
+
+    @property
+    def outTangentTypes(self):
+        """
+        :return: Out tangent types
+        :rtype: list
+        """
+        return self._outTangentTypes
+
+    @property
+    def weightedTangents(self):
+        """
+        :return: Weighted tangents
+        :rtype: bool
+        """
+        return self._weightedTangents
+
+    @property
+    def controls(self):
+        """
+        :return: Bezier control points x0, y0, x1, y1, x2, y2, x3, y3 of each segment
+        :rtype: list
+        """
+        return self._controls
+
+    @property
+    def preInfinity(self):
+        """
+        :return: Pre infinity type
+        :rtype: str
+        """
+        return self._preInfinity
+
+    @property
+    def postInfinity(self):
+        """
+        :return: Post infinity type
+        :rtype: str
+        """
+        return self._postInfinity
+
+    # ------------------------------------------------------------------------
+
+    def getData(self):
+        """
+        :return: Keyframe, tangent and infinity data
+        :rtype: tuple
+        """
+        return (
+            self.times,
+            self.values,
+            self.inAngles,
+            self.outAngles,
+            self.inWeights,
+            self.outWeights,
+            self.inTangentTypes,
+            self.outTangentTypes,
+            self.weightedTangents,
+            self.preInfinity,
+            self.postInfinity,
+        )
+
+    # ------------------------------------------------------------------------
+
+    def _getSegmentControls(self, index):
+        """
+        Get the bezier control points of the segment that starts at the
+        provided keyframe index.
+
+        :param int index:
+        :return: Control points x0, y0, x1, y1, x2, y2, x3, y3
+        :rtype: tuple
+        """
+        # variables
+        x0, y0 = self.times[index], self.values[index]
+        x3, y3 = self.times[index + 1], self.values[index + 1]
+        outAngle = math.radians(self.outAngles[index])
+        inAngle = math.radians(self.inAngles[index + 1])
+
+        # get control points from weights
+        if self.weightedTangents:
+            outWeight = self.outWeights[index]
+            inWeight = self.inWeights[index + 1]
+
+            # clamp control points to the segment to make sure the time
+            # of the curve is always increasing.
+            x1 = min(max(x0 + math.cos(outAngle) * outWeight, x0), x3)
+            y1 = y0 + math.sin(outAngle) * outWeight
+            x2 = min(max(x3 - math.cos(inAngle) * inWeight, x0), x3)
+            y2 = y3 - math.sin(inAngle) * inWeight
+
+            return x0, y0, x1, y1, x2, y2, x3, y3
+
+        # get control points from slopes
+        third = (x3 - x0) / 3.0
+        return (
+            x0, y0,
+            x0 + third, y0 + math.tan(outAngle) * third,
+            x3 - third, y3 - math.tan(inAngle) * third,
+            x3, y3
+        )
+
+    # ------------------------------------------------------------------------
+
+    def _evaluateSegment(self, index, frame):
+        """
+        :param int index:
+        :param float frame:
+        :return: Value of the segment at the provided frame
+        :rtype: float
+        """
+        # variables
+        x0, y0, x1, y1, x2, y2, x3, y3 = self._controls[index]
+        outTangentType = self.outTangentTypes[index]
+
+        # validate frame and stepped tangents
+        if frame <= x0:
+            return y0
+        elif frame >= x3:
+            return y3
+        elif outTangentType == STEP:
+            return y0
+        elif outTangentType == STEP_NEXT:
+            return y3
+
+        # get bezier parameter, when tangents are not weighted the time of
+        # the curve is linear.
+        if self.weightedTangents:
+            t = solveBezier(x0, x1, x2, x3, frame)
+        else:
+            t = (frame - x0) / (x3 - x0)
+
+        return bezier(y0, y1, y2, y3, t)
+
+    def _evaluateInfinity(self, frame):
+        """
+        :param float frame:
+        :return: Value of the curve outside of the keyframe range
+        :rtype: float
+        """
+        # variables
+        first, last = self.times[0], self.times[-1]
+        isPre = frame < first
+        infinity = self.preInfinity if isPre else self.postInfinity
+        period = last - first
+
+        # evaluate linear
+        if infinity == INFINITY_LINEAR:
+            if isPre:
+                slope = math.tan(math.radians(self.inAngles[0]))
+                return self.values[0] - (first - frame) * slope
+
+            slope = math.tan(math.radians(self.outAngles[-1]))
+            return self.values[-1] + (frame - last) * slope
+
+        # evaluate cycles
+        elif infinity in [INFINITY_CYCLE, INFINITY_CYCLE_RELATIVE, INFINITY_OSCILLATE] and period > 0:
+            cycles = int(math.floor((frame - first) / period))
+            local = frame - first - cycles * period
+
+            if infinity == INFINITY_OSCILLATE and cycles % 2:
+                local = period - local
+
+            value = self.evaluate(first + local)
+            if infinity == INFINITY_CYCLE_RELATIVE:
+                value += cycles * (self.values[-1] - self.values[0])
+
+            return value
+
+        # evaluate constant
+        return self.values[0] if isPre else self.values[-1]
+
+    # ------------------------------------------------------------------------
+
+    def evaluate(self, frame):
+        """
+        :param int/float frame:
+        :return: Value of the curve at the provided frame
+        :rtype: float
+        """
+        # validate keyframes
+        if not self.times:
+            return 0.0
+        elif frame < self.times[0] or frame > self.times[-1]:
+            return self._evaluateInfinity(frame)
+        elif len(self.times) == 1:
+            return self.values[0]
+
+        # get segment index
+        index = min(bisect.bisect_right(self.times, frame) - 1, len(self._controls) - 1)
+        return self._evaluateSegment(index, frame)
+
+    def evaluateFrames(self, frames):
+        """
+        :param list frames:
+        :return: Values of the curve at the provided frames
+        :rtype: list
+        """
+        return [self.evaluate(frame) for frame in frames]
+
+    def isStepped(self):
+        """
+        :return: Stepped state
+        :rtype: bool
+        """
+        return isStepped(self.outTangentTypes)
+
+    # ------------------------------------------------------------------------
+
+    def getSegments(
+            self,
+            step=1,
+            tangentSplitAuto=False,
+            tangentSplitExisting=False,
+            tangentSplitAngleThreshold=False,
+            tangentSplitAngleThresholdValue=15.0,
+            tolerance=None,
+    ):
+        """
+        Sample the animation curve and split the sampled points into
+        segments based on the tangent split settings. The result matches
+        the segments of the KeyframeReduction class using the python
+        sampler, which means a snapshot of an animation curve can be sampled
+        and split without Maya. When a tolerance is provided the animation
+        curve is sampled adaptively.
+
+        :param int/float step:
+        :param bool tangentSplitAuto:
+        :param bool tangentSplitExisting:
+        :param bool tangentSplitAngleThreshold:
+        :param int/float tangentSplitAngleThresholdValue:
+        :param float/None tolerance: Adaptive sampling tolerance
+        :return: Segments of sampled points
+        :rtype: list
+        """
+        # get start and end frames
+        start = int(math.floor(self.times[0]))
+        end = int(math.ceil(self.times[-1])) + 1
+
+        # get sample frames and values, the angles of adaptively sampled
+        # frames are calculated using the points a step away.
+        frames = floatRange(start, end, step)
+        if tolerance is None:
+            values = self.evaluateFrames(frames)
+            angles = getAngles(frames, values)
+        else:
+            frames, values = sampleAdaptive(frames, self.times, self.values, self.evaluateFrames, tolerance)
+            angles = getStepAngles(frames, values, self.evaluateFrames, step)
+
+        # get split indices
+        split = []
+
+        if tangentSplitAuto:
+            split.extend(findTangentSplitAuto(angles))
+        if tangentSplitExisting:
+            split.extend(
+                findTangentSplitExisting(
+                    self.times,
+                    self.inAngles,
+                    self.outAngles,
+                    self.inTangentTypes,
+                    self.outTangentTypes,
+                    start,
+                    step,
+                    frames if tolerance is not None else None
+                )
+            )
+        if tangentSplitAngleThreshold:
+            split.extend(findTangentSplitThreshold(angles, tangentSplitAngleThresholdValue))
+
+        # get split points
+        return splitPoints(list(zip(frames, values)), split)
@@ -0,0 +1,194 @@
+from maya import OpenMaya
+
+from .. import utils
+
+
+# ----------------------------------------------------------------------------
+
+
+class AnimationCurveIndex(object):
+    """
+    Keep track of the animation curves connected to nodes and the attribute
+    and validity of each animation curve. The entries are computed the first
+    time they are requested and removed by callbacks when the nodes they
+    depend on are added, removed or connected, which means repeated queries
+    of the same selection are dictionary lookups.
+
+    The node names are used as keys, dag nodes are stored using their full
+    path. Renaming or reparenting nodes and opening or creating scenes clears
+    the index.
+    ::
+        index = AnimationCurveIndex()
+        index.registerCallbacks()
+        data = index.getAnimationCurvesByPlug(cmds.ls(sl=True, long=True))
+        index.removeCallbacks()
+    """
+    def __init__(self):
+        self._nodes = {}
+        self._animationCurves = {}
+        self._ids = []
+
+    def __repr__(self):
+        return "< AnimationCurveIndex object | nodes: {} | animation-curves: {} >".format(
+            len(self._nodes),
+            len(self._animationCurves)
+        )
+
+    # ------------------------------------------------------------------------
+
+    def getNodeAnimationCurves(self, node):
+        """
+        :param str node:
+        :return: Animation curves of the node
+        :rtype: list
+        """
+        if node not in self._nodes:
+            self._nodes[node] = utils.getNodeAnimationCurves(node)
+
+        return self._nodes[node]
+
+    def getAnimationCurveAttribute(self, animationCurve):
+        """
+        :param str animationCurve:
+        :return: Attribute the animation curve is connected to, None when the
+            animation curve is not connected or not suitable for reduction
+        :rtype: str/None
+        """
+        self.update([animationCurve])
+        return self._animationCurves[animationCurve]
+
+    def getAnimationCurvesByPlug(self, nodes):
+        """
+        Get the suitable animation curves of the provided nodes grouped by
+        the attribute they are connected to.
+
+        :param list nodes:
+        :return: Filtered animation curves
+        :rtype: dict
+        """
+        # get animation curves
+        animationCurves = []
+        for node in nodes:
+            animationCurves.extend(self.getNodeAnimationCurves(node))
+
+        self.update(animationCurves)
+
+        # group animation curves by attribute
+        data = {}
+        visited = set()
+
+        for animationCurve in animationCurves:
+            if animationCurve in visited:
+                continue
+
+            visited.add(animationCurve)
+
+            attribute = self._animationCurves[animationCurve]
+            if attribute:
+                data.setdefault(attribute, []).append(animationCurve)
+
+        return data
+
+    def update(self, animationCurves):
+        """
+        Add the animation curves that are not indexed yet, the validity and
+        attributes of those animation curves are queried at once.
+
+        :param list animationCurves:
+        """
+        missing = [
+            animationCurve
+            for animationCurve in set(animationCurves)
+            if animationCurve not in self._animationCurves
+        ]
+
+        if not missing:
+            return
+
+        valid = utils.filterAnimationCurves(missing)
+        attributes = utils.getAnimationCurveAttributes(valid)
+
+        for animationCurve in missing:
+            self._animationCurves[animationCurve] = attributes.get(animationCurve)
+
+    # ------------------------------------------------------------------------
+
+    def invalidate(self, node):
+        """
+        Remove the entries of the node.
+
+        :param str node:
+        """
+        self._nodes.pop(node, None)
+        self._animationCurves.pop(node, None)
+
+    def clear(self):
+        self._nodes.clear()
+        self._animationCurves.clear()
+
+    # ------------------------------------------------------------------------
+
+    def getName(self, obj):
+        """
+        :param OpenMaya.MObject obj:
+        :return: Name of the node, the full path of dag nodes
+        :rtype: str
+        """
+        if obj.hasFn(OpenMaya.MFn.kDagNode):
+            return OpenMaya.MFnDagNode(obj).fullPathName()
+
+        return OpenMaya.MFnDependencyNode(obj).name()
+
+    def nodeChanged(self, obj, *args):
+        """
+        :param OpenMaya.MObject obj:
+        """
+        self.invalidate(self.getName(obj))
+
+    def connectionChanged(self, source, destination, made, *args):
+        """
+        Remove the entries of both nodes of the connection. When the
+        connection involves a unit conversion node the index is cleared as
+        the animation curves are queried skipping those nodes.
+
+        :param OpenMaya.MPlug source:
+        :param OpenMaya.MPlug destination:
+        :param bool made:
+        """
+        for plug in [source, destination]:
+            obj = plug.node()
+            if obj.hasFn(OpenMaya.MFn.kUnitConversion):
+                self.clear()
+                return
+
+            self.invalidate(self.getName(obj))
+
+    def sceneChanged(self, *args):
+        self.clear()
+
+    # ------------------------------------------------------------------------
+
+    def registerCallbacks(self):
+        """
+        Register the callbacks that keep the index up to date, the index is
+        cleared as changes made while the callbacks were not registered are
+        unknown.
+        """
+        self.removeCallbacks()
+        self.clear()
+
+        self._ids = [
+            OpenMaya.MDGMessage.addNodeAddedCallback(self.nodeChanged),
+            OpenMaya.MDGMessage.addNodeRemovedCallback(self.nodeChanged),
+            OpenMaya.MDGMessage.addConnectionCallback(self.connectionChanged),
+            OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self.sceneChanged),
+            OpenMaya.MDagMessage.addParentAddedCallback(self.sceneChanged),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterNew, self.sceneChanged),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterOpen, self.sceneChanged),
+        ]
+
+    def removeCallbacks(self):
+        for id in self._ids:
+            OpenMaya.MMessage.removeCallback(id)
+
+        self._ids = []
@@ -0,0 +1,491 @@
+import os
+import hashlib
+import tempfile
+from array import array
+from collections import OrderedDict
+
+from .fit import fitSegments, getFitters, FITTER_GREEDY
+from .exchange import KEYFRAME_ARRAYS, keyframesToArrays, arraysToKeyframes
+
+
+# ----------------------------------------------------------------------------
+
+
+# the version is part of every key, it should be increased when the fitting
+# changes so results stored on disk by previous versions are not used.
+CACHE_VERSION = 3
+CACHE_EXTENSION = ".kfc"
+
+
+# ----------------------------------------------------------------------------
+
+
+def getFingerprint(segments, error, weightedTangents, splitSimplify=False, fitter=FITTER_GREEDY):
+    """
+    Get a hash of the sampled points, the split segments and the fit
+    settings. Segments with the same fingerprint result in the same
+    keyframes.
+
+    :param list segments:
+    :param int/float error:
+    :param bool weightedTangents:
+    :param bool splitSimplify:
+    :param str fitter:
+    :return: Fingerprint
+    :rtype: str
+    """
+    settings = (CACHE_VERSION, float(error), bool(weightedTangents), bool(splitSimplify), str(fitter))
+    return hashSegments(segments, settings)
+
+
+def getHierarchyKey(segments, weightedTangents, splitSimplify=False, fitter=FITTER_GREEDY):
+    """
+    Get a hash of the sampled points, the split segments and the fit
+    settings except for the error. Segments with the same key can be
+    refitted using the split tree of a previous fit.
+
+    :param list segments:
+    :param bool weightedTangents:
+    :param bool splitSimplify:
+    :param str fitter:
+    :return: Key
+    :rtype: str
+    """
+    settings = (CACHE_VERSION, bool(weightedTangents), bool(splitSimplify), str(fitter))
+    return hashSegments(segments, settings)
+
+
+def replaceFile(source, destination):
+    """
+    Move the source file to the destination, replacing the destination if it
+    exists. Python 2 doesn't have os.replace, os.rename replaces the
+    destination on posix but fails on windows in which case the destination
+    is removed first.
+
+    :param str source:
+    :param str destination:
+    """
+    if hasattr(os, "replace"):
+        os.replace(source, destination)
+        return
+
+    try:
+        os.rename(source, destination)
+    except OSError:
+        removeFile(destination)
+        os.rename(source, destination)
+
+
+def removeFile(path):
+    """
+    Remove the file, files that are already removed by another process are
+    ignored.
+
+    :param str path:
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        if os.path.exists(path):
+            raise
+
+
+# ----------------------------------------------------------------------------
+
+
+def hashSegments(segments, settings):
+    """
+    :param list segments:
+    :param tuple settings:
+    :return: Hash of the segments and settings
+    :rtype: str
+    """
+    key = hashlib.sha1()
+    key.update(repr(settings).encode("utf-8"))
+
+    for points in segments:
+        data = array("d", [len(points)])
+        data.extend(c for point in points for c in point)
+        key.update(data)
+
+    return key.hexdigest()
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitCache(object):
+    """
+    Cache the fitted keyframes of segments of sampled points. The key is a
+    hash of the sampled points, the split segments and the fit settings,
+    which means unchanged animation curves don't have to be fitted again.
+    The results are stored in memory using least recently used eviction and
+    optionally in a directory on disk that is capped in size.
+
+    When the hierarchy size is set refits can be requested, the fitters of
+    the most recently refitted segments are kept. Refitting the same
+    segments using a different error walks the split tree of the previous
+    fit rather than fitting the segments from scratch. Refitted keyframes
+    are identical to keyframes fitted from scratch and are cached as well.
+    ::
+        cache = FitCache(size=1024, path="/tmp/keyframeReduction", hierarchySize=64)
+        keyframes = cache.fitSegments(segments, error=0.1, refit=True)
+        keyframes = cache.fitSegments(segments, error=0.2, refit=True)
+        print(cache.hits, cache.misses, cache.refits)
+    """
+    def __init__(self, size=1024, path=None, maxBytes=256 * 1024 * 1024, hierarchySize=0):
+        """
+        :param int size: Maximum number of results in memory
+        :param str/None path: Cache directory, nothing is stored on disk when None
+        :param int maxBytes: Maximum size of the cache directory
+        :param int hierarchySize: Maximum number of fitted segments to keep the split tree of
+        """
+        self._size = size
+        self._path = path
+        self._maxBytes = maxBytes
+        self._hierarchySize = hierarchySize
+        self._hierarchies = OrderedDict()
+        self._refits = 0
+        self._memory = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+        # get size of cache directory
+        self._bytes = 0
+        if path:
+            if not os.path.exists(path):
+                os.makedirs(path)
+
+            self._bytes = sum(size for _, size, _ in self.getFileStats())
+
+    def __repr__(self):
+        return "< FitCache object | hits: {} | misses: {} | path: {} >".format(
+            self.hits,
+            self.misses,
+            self.path
+        )
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def size(self):
+        """
+        :return: Maximum number of results in memory
+        :rtype: int
+        """
+        return self._size
+
+    @property
+    def path(self):
+        """
+        :return: Cache directory
+        :rtype: str/None
+        """
+        return self._path
+
+    @property
+    def maxBytes(self):
+        """
+        :return: Maximum size of the cache directory
+        :rtype: int
+        """
+        return self._maxBytes
+
+    @property
+    def hierarchySize(self):
+        """
+        :return: Maximum number of fitted segments to keep the split tree of
+        :rtype: int
+        """
+        return self._hierarchySize
+
+    @property
+    def refits(self):
+        """
+        :return: Number of fits that reused a split tree
+        :rtype: int
+        """
+        return self._refits
+
+    @property
+    def hits(self):
+        """
+        :return: Number of cache hits
+        :rtype: int
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        :return: Number of cache misses
+        :rtype: int
+        """
+        return self._misses
+
+    # ------------------------------------------------------------------------
+
+    def getKey(self, segments, error, weightedTangents, splitSimplify=False, fitter=FITTER_GREEDY):
+        """
+        :param list segments:
+        :param int/float error:
+        :param bool weightedTangents:
+        :param bool splitSimplify:
+        :param str fitter:
+        :return: Hash of the segments and fit settings
+        :rtype: str
+        """
+        return getFingerprint(segments, error, weightedTangents, splitSimplify, fitter)
+
+    def getFiles(self):
+        """
+        :return: Files in the cache directory
+        :rtype: list
+        """
+        return [
+            os.path.join(self.path, f)
+            for f in os.listdir(self.path)
+            if f.endswith(CACHE_EXTENSION)
+        ]
+
+    def getFileStats(self):
+        """
+        Get the modification time and size of the files in the cache
+        directory, files that are removed by another process while the
+        directory is read are ignored.
+
+        :return: Modification time, size and path of each file
+        :rtype: list
+        """
+        stats = []
+        for f in self.getFiles():
+            try:
+                stat = os.stat(f)
+            except OSError:
+                continue
+
+            stats.append((stat.st_mtime, stat.st_size, f))
+
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    def get(self, key):
+        """
+        Get the keyframe arrays of the key, the hit and miss counters are
+        updated.
+
+        :param str key:
+        :return: Keyframe arrays or None when the key is not cached
+        :rtype: dict/None
+        """
+        # get from memory, the key is moved to the end to mark it as the
+        # most recently used.
+        if key in self._memory:
+            arrays = self._memory.pop(key)
+            self._memory[key] = arrays
+            self._hits += 1
+            return arrays
+
+        # get from disk
+        path = os.path.join(self.path, key + CACHE_EXTENSION) if self.path else None
+        if not path or not os.path.exists(path):
+            self._misses += 1
+            return
+
+        # the file can be removed by another process after it is found, in
+        # which case the key is not cached. The modification time marks the
+        # most recently used files.
+        data = array("d")
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size % (data.itemsize * len(KEYFRAME_ARRAYS)) == 0:
+                    data.fromfile(f, size // data.itemsize)
+
+            os.utime(path, None)
+        except (IOError, OSError, EOFError):
+            self._misses += 1
+            return
+
+        # validate data, a truncated or corrupted file doesn't contain the
+        # same amount of values for every array. The file is removed and the
+        # key is not cached.
+        count = len(data) // len(KEYFRAME_ARRAYS)
+        if not count or len(data) != count * len(KEYFRAME_ARRAYS):
+            removeFile(path)
+            self._bytes = max(self._bytes - size, 0)
+            self._misses += 1
+            return
+
+        arrays = {
+            name: data[i * count:(i + 1) * count]
+            for i, name in enumerate(KEYFRAME_ARRAYS)
+        }
+        self.setMemory(key, arrays)
+        self._hits += 1
+        return arrays
+
+    def set(self, key, arrays):
+        """
+        :param str key:
+        :param dict arrays:
+        """
+        self.setMemory(key, arrays)
+        if self.path:
+            self.setDisk(key, arrays)
+
+    def setMemory(self, key, arrays):
+        """
+        :param str key:
+        :param dict arrays:
+        """
+        self._memory[key] = arrays
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    def setDisk(self, key, arrays):
+        """
+        Store the keyframe arrays in the cache directory, the least recently
+        used files are removed when the directory exceeds the maximum size.
+        The data is written to a temporary file that is moved into place,
+        which means other processes sharing the directory never read a
+        partially written file.
+
+        :param str key:
+        :param dict arrays:
+        """
+        # write file
+        data = array("d")
+        for name in KEYFRAME_ARRAYS:
+            data.extend(arrays[name])
+
+        path = os.path.join(self.path, key + CACHE_EXTENSION)
+        handle, temp = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(handle, "wb") as f:
+                data.tofile(f)
+
+            replaceFile(temp, path)
+        except Exception:
+            removeFile(temp)
+            raise
+
+        self._bytes += len(data) * data.itemsize
+
+        # validate size
+        if self._bytes <= self.maxBytes:
+            return
+
+        # the directory can be shared with other processes, the size is
+        # recalculated before removing the least recently used files.
+        stats = sorted(self.getFileStats())
+        self._bytes = sum(size for _, size, _ in stats)
+
+        for _, size, f in stats:
+            if self._bytes <= self.maxBytes * 0.9:
+                break
+
+            removeFile(f)
+            self._bytes -= size
+
+    def clear(self):
+        """
+        Clear the cache in memory and on disk and reset the counters.
+        """
+        self._memory.clear()
+        self._hierarchies.clear()
+        self._hits = 0
+        self._misses = 0
+        self._refits = 0
+
+        if self.path:
+            for f in self.getFiles():
+                removeFile(f)
+
+            self._bytes = 0
+
+    # ------------------------------------------------------------------------
+
+    def fitSegments(
+            self,
+            segments,
+            error=2.5,
+            weightedTangents=True,
+            splitSimplify=False,
+            fitter=FITTER_GREEDY,
+            refit=False,
+    ):
+        """
+        Get the cached keyframes of the segments, the segments are only
+        fitted when they are not cached. When refit is enabled and the
+        hierarchy size is set segments that are not cached are refitted
+        using the split trees of a previous fit.
+
+        :param list segments:
+        :param int/float error:
+        :param bool weightedTangents:
+        :param bool splitSimplify:
+        :param str fitter:
+        :param bool refit:
+        :return: Keyframes
+        :rtype: list
+        """
+        key = self.getKey(segments, error, weightedTangents, splitSimplify, fitter)
+        arrays = self.get(key)
+
+        if arrays is not None:
+            return arraysToKeyframes(arrays)
+
+        # fit keyframes
+        if refit and self.hierarchySize:
+            keyframes = self.refitSegments(segments, error, weightedTangents, splitSimplify, fitter)
+        else:
+            keyframes = fitSegments(segments, error, weightedTangents, splitSimplify, fitter)
+
+        self.set(key, keyframesToArrays(keyframes))
+
+        return keyframes
+
+    def refitSegments(
+            self,
+            segments,
+            error=2.5,
+            weightedTangents=True,
+            splitSimplify=False,
+            fitter=FITTER_GREEDY,
+    ):
+        """
+        Fit the segments reusing the split trees of a previous fit of the
+        same segments, the fitters are kept using least recently used
+        eviction. The breakpoints of split simplify depend on the error,
+        segments using split simplify are always fitted from scratch.
+
+        :param list segments:
+        :param int/float error:
+        :param bool weightedTangents:
+        :param bool splitSimplify:
+        :param str fitter:
+        :return: Keyframes
+        :rtype: list
+        """
+        if splitSimplify:
+            return fitSegments(segments, error, weightedTangents, splitSimplify, fitter)
+
+        key = getHierarchyKey(segments, weightedTangents, splitSimplify, fitter)
+        fitters = self._hierarchies.pop(key, None)
+
+        # fit or refit segments
+        if fitters is None:
+            fitters = getFitters(segments, error, weightedTangents, splitSimplify, fitter)
+            keyframes = [keyframe for obj in fitters for keyframe in obj.fit() or []]
+        else:
+            keyframes = [keyframe for obj in fitters for keyframe in obj.refit(error) or []]
+            self._refits += 1
+
+        # store fitters
+        self._hierarchies[key] = fitters
+        while len(self._hierarchies) > self.hierarchySize:
+            self._hierarchies.popitem(last=False)
+
+        return keyframes
@@ -0,0 +1,357 @@
+import sys
+import math
+import json
+import struct
+from array import array
+
+from .keyframe import Keyframe
+from .animCurve import AnimCurve, STEP, STEP_NEXT
+
+try:
+    import numpy
+except ImportError:
+    # numpy is not available, the arrays will be read from the file into
+    # python arrays rather than memory-mapped.
+    numpy = None
+
+
+# ----------------------------------------------------------------------------
+
+
+MAGIC = b"KFRX"
+VERSION = 1
+
+# the file starts with a header, followed by the little-endian float64 data
+# of all arrays. The json index describing the records is stored at the end
+# of the file so records can be written one at a time, its offset and size
+# are stored in the trailer.
+HEADER = struct.Struct("<4sI")
+TRAILER = struct.Struct("<QQ")
+ITEM_SIZE = 8
+
+KEYFRAME_ARRAYS = ["times", "values", "inX", "inY", "outX", "outY", "stepped"]
+
+# the stepped array stores the out tangent type of each keyframe, fixed out
+# tangents are stored as zero.
+STEPPED_VALUES = {STEP: 1.0, STEP_NEXT: 2.0}
+STEPPED_TYPES = {1.0: STEP, 2.0: STEP_NEXT}
+
+# the keys of animation curves that are merged rather than sampled are
+# exported using these arrays, the tangent types and the weighted tangents
+# state are stored in the metadata of the record.
+ANIM_CURVE_ARRAYS = ["keyTimes", "keyValues", "inAngles", "outAngles", "inWeights", "outWeights"]
+
+
+# ----------------------------------------------------------------------------
+
+
+class ExchangeWriter(object):
+    """
+    Write named records of float arrays and json metadata to a single binary
+    file. The arrays are written as soon as a record is added which keeps
+    the memory usage bounded, only the index is kept in memory.
+    ::
+        with ExchangeWriter(path, {"step": 1}) as writer:
+            writer.add("animCurve1", {"times": times, "values": values}, split=[])
+    """
+    def __init__(self, path, metadata=None):
+        """
+        :param str path:
+        :param dict/None metadata: Metadata of the file
+        """
+        self._path = path
+        self._metadata = metadata or {}
+        self._records = []
+        self._file = None
+        self._offset = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def path(self):
+        """
+        :return: Path
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def metadata(self):
+        """
+        :return: Metadata of the file
+        :rtype: dict
+        """
+        return self._metadata
+
+    @property
+    def records(self):
+        """
+        :return: Records written so far
+        :rtype: list
+        """
+        return self._records
+
+    # ------------------------------------------------------------------------
+
+    def open(self):
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION))
+        self._offset = HEADER.size
+
+    def add(self, name, arrays, **metadata):
+        """
+        :param str name:
+        :param dict arrays: Float arrays by name
+        """
+        record = {"name": name, "arrays": {}, "metadata": metadata}
+
+        for key in sorted(arrays.keys()):
+            data = array("d", arrays[key])
+            if sys.byteorder == "big":
+                data.byteswap()
+
+            data.tofile(self._file)
+            record["arrays"][key] = [self._offset, len(data)]
+            self._offset += ITEM_SIZE * len(data)
+
+        self._records.append(record)
+
+    def close(self):
+        index = json.dumps({"metadata": self.metadata, "records": self.records})
+        index = index.encode("utf-8")
+
+        self._file.write(index)
+        self._file.write(TRAILER.pack(self._offset, len(index)))
+        self._file.close()
+        self._file = None
+
+
+class ExchangeReader(object):
+    """
+    Read the records written by the ExchangeWriter. When numpy is available
+    the arrays are memory-mapped, which allows files that are larger than
+    the available memory to be processed.
+    ::
+        with ExchangeReader(path) as reader:
+            for record in reader:
+                times = reader.getArray(record, "times")
+    """
+    def __init__(self, path):
+        """
+        :param str path:
+        :raise ValueError: When the file is not a keyframe reduction file
+        """
+        self._path = path
+        self._file = open(path, "rb")
+        self._data = None
+
+        # validate header
+        magic, version = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError("'{}' is not a valid keyframe reduction file.".format(path))
+
+        # read index
+        self._file.seek(-TRAILER.size, 2)
+        self._offset, size = TRAILER.unpack(self._file.read(TRAILER.size))
+        self._file.seek(self._offset)
+        index = json.loads(self._file.read(size).decode("utf-8"))
+
+        self._metadata = index["metadata"]
+        self._records = index["records"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def path(self):
+        """
+        :return: Path
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def metadata(self):
+        """
+        :return: Metadata of the file
+        :rtype: dict
+        """
+        return self._metadata
+
+    @property
+    def records(self):
+        """
+        :return: Records
+        :rtype: list
+        """
+        return self._records
+
+    @property
+    def data(self):
+        """
+        :return: Memory-mapped data of all arrays
+        :rtype: numpy.memmap
+        """
+        if self._data is None:
+            self._data = numpy.memmap(
+                self.path,
+                dtype="<f8",
+                mode="r",
+                shape=(self._offset // ITEM_SIZE,)
+            )
+
+        return self._data
+
+    # ------------------------------------------------------------------------
+
+    def getArray(self, record, key):
+        """
+        :param dict record:
+        :param str key:
+        :return: Array
+        :rtype: numpy.memmap/array.array
+        """
+        offset, count = record["arrays"][key]
+
+        # get memory-mapped array
+        if numpy is not None:
+            index = offset // ITEM_SIZE
+            return self.data[index:index + count]
+
+        # read array
+        data = array("d")
+        self._file.seek(offset)
+        data.fromfile(self._file, count)
+        if sys.byteorder == "big":
+            data.byteswap()
+
+        return data
+
+    def getArrays(self, record):
+        """
+        :param dict record:
+        :return: Arrays by name
+        :rtype: dict
+        """
+        return {key: self.getArray(record, key) for key in record["arrays"]}
+
+    def close(self):
+        self._data = None
+        self._file.close()
+
+
+# ----------------------------------------------------------------------------
+
+
+def keyframesToArrays(keyframes):
+    """
+    Convert keyframes into flat arrays, handles that are not defined are
+    stored as nan and stepped out tangents are stored as one or two.
+
+    :param list keyframes:
+    :return: Arrays by name
+    :rtype: dict
+    """
+    nan = float("nan")
+    arrays = {key: [] for key in KEYFRAME_ARRAYS}
+
+    for keyframe in keyframes:
+        inHandle = keyframe.inHandle or (nan, nan)
+        outHandle = keyframe.outHandle or (nan, nan)
+
+        arrays["times"].append(keyframe.point[0])
+        arrays["values"].append(keyframe.point[1])
+        arrays["inX"].append(inHandle[0])
+        arrays["inY"].append(inHandle[1])
+        arrays["outX"].append(outHandle[0])
+        arrays["outY"].append(outHandle[1])
+        arrays["stepped"].append(STEPPED_VALUES.get(keyframe.outTangentType, 0.0))
+
+    return arrays
+
+
+def arraysToKeyframes(arrays):
+    """
+    Convert flat arrays created by the keyframesToArrays function back into
+    keyframes. Arrays without stepped out tangents only contain fixed
+    tangents.
+
+    :param dict arrays:
+    :return: Keyframes
+    :rtype: list
+    """
+    keyframes = []
+
+    arrays = dict(arrays)
+    arrays.setdefault("stepped", [0.0] * len(arrays["times"]))
+    iterator = zip(*[arrays[key] for key in KEYFRAME_ARRAYS])
+    for time, value, inX, inY, outX, outY, stepped in iterator:
+        inHandle = None if math.isnan(inX) else (float(inX), float(inY))
+        outHandle = None if math.isnan(outX) else (float(outX), float(outY))
+        outTangentType = STEPPED_TYPES.get(float(stepped), "fixed")
+        keyframes.append(Keyframe((float(time), float(value)), inHandle, outHandle, outTangentType))
+
+    return keyframes
+
+
+def animCurveToArrays(animCurve):
+    """
+    Convert the keys of the animation curve into flat arrays and record
+    metadata, the infinity types are not stored.
+
+    :param AnimCurve animCurve:
+    :return: Arrays by name and metadata
+    :rtype: tuple
+    """
+    arrays = {
+        "keyTimes": animCurve.times,
+        "keyValues": animCurve.values,
+        "inAngles": animCurve.inAngles,
+        "outAngles": animCurve.outAngles,
+        "inWeights": animCurve.inWeights,
+        "outWeights": animCurve.outWeights,
+    }
+    metadata = {
+        "inTangentTypes": list(animCurve.inTangentTypes),
+        "outTangentTypes": list(animCurve.outTangentTypes),
+        "weightedTangents": animCurve.weightedTangents,
+    }
+
+    return arrays, metadata
+
+
+def arraysToAnimCurve(arrays, metadata):
+    """
+    Convert flat arrays and record metadata created by the
+    animCurveToArrays function back into an animation curve.
+
+    :param dict arrays:
+    :param dict metadata:
+    :return: Animation curve
+    :rtype: AnimCurve
+    """
+    return AnimCurve(
+        *[[float(value) for value in arrays[key]] for key in ANIM_CURVE_ARRAYS],
+        inTangentTypes=metadata["inTangentTypes"],
+        outTangentTypes=metadata["outTangentTypes"],
+        weightedTangents=metadata["weightedTangents"]
+    )
@@ -1,43 +1,182 @@
 import math
 
-from .vector import Vector2D
 from .keyframe import Keyframe
-from ..utils import EPSILON
+from .split import findSplitSimplify
+from ..utils import EPSILON, THRESHOLD
+
+try:
+    import numpy
+except ImportError:
+    # numpy is not available, the fitting will fall back on the python
+    # implementation which produces the same results.
+    numpy = None
+
+
+# ----------------------------------------------------------------------------
+
+
+# the minimum amount of points in a segment before the numpy implementation
+# is used, for smaller segments the overhead of creating the arrays is
+# larger than the time saved by the vectorization.
+NUMPY_MIN_POINTS = 32
+
+# the maximum deviation of the points for them to be detected as linear or
+# flat, the tolerance is kept small so only exact shapes are detected.
+SHAPE_TOLERANCE = THRESHOLD
+
+# the simplify split tolerance is a multiple of the fit error, a cubic bezier
+# can follow more than a single line which means the candidate breakpoints
+# can be further apart than the error allows for lines.
+SIMPLIFY_SCALE = 4
+
+# the amount of candidates of a layer in the layered fitter that are
+# processed without reaching further before the layer is considered done.
+LAYERED_CANDIDATES = 2
+
+# ----------------------------------------------------------------------------
+
+
+def normal(x, y):
+    """
+    :param float x:
+    :param float y:
+    :return: Normalized vector
+    :rtype: tuple
+    """
+    length = math.sqrt(x * x + y * y)
+    if not length:
+        return x, y
+
+    return x / length, y / length
+
+
+def distanceBetween(x1, y1, x2, y2):
+    """
+    :param float x1:
+    :param float y1:
+    :param float x2:
+    :param float y2:
+    :return: Distance between two points
+    :rtype: float
+    """
+    x = x1 - x2
+    y = y1 - y2
+    return math.sqrt(x * x + y * y)
+
+
+# ----------------------------------------------------------------------------
 
 
 class FitBezier(object):
     """
     Ported from Paper.js - The Swiss Army Knife of Vector Graphics Scripting.
     http://paperjs.org/
+
+    The points are stored as flat time and value arrays and all of the
+    calculations are done on floats, this means the fitting doesn't depend on
+    Maya and can be run using any Python interpreter.
     """
-    def __init__(self, points, error=2.5, weightedTangents=True):
+    def __init__(
+            self,
+            points,
+            error=2.5,
+            weightedTangents=True,
+            maxDepth=None,
+            maxSegments=None,
+            breakpoints=None,
+    ):
         """
-        :param list points:
+        :param list points: Vector2Ds or (x, y) pairs
         :param int/float error:
         :param bool weightedTangents:
+        :param int/None maxDepth: Maximum split depth of a segment
+        :param int/None maxSegments: Maximum amount of fitted segments
+        :param list/None breakpoints: Point indices to start fitting from
         """
         # variables
+        self._queue = []
+        self._tree = None
         self._keyframes = []
-        self._points = points
+        self._times = [float(point[0]) for point in points]
+        self._values = [float(point[1]) for point in points]
+        self._timesArray = None
+        self._valuesArray = None
         self._error = error
         self._weightedTangents = weightedTangents
+        self._maxDepth = maxDepth
+        self._maxSegments = maxSegments
+        self._breakpoints = sorted(breakpoints or [])
 
     def __repr__(self):
         return "< BezierFitter object | points: {} | error: {} | weighted-tangents: {} >".format(
-            len(self.points),
+            len(self.times),
             self.error,
             self.weightedTangents
         )
 
     # ------------------------------------------------------------------------
 
+    @classmethod
+    def fromArrays(cls, times, values, *args, **kwargs):
+        """
+        Create a fitter from flat time and value arrays, the arrays can be
+        lists, tuples, arrays or NumPy arrays. Additional arguments are
+        passed to the constructor.
+
+        :param list times:
+        :param list values:
+        :return: Fitter
+        :rtype: FitBezier
+        """
+        return cls(list(zip(times, values)), *args, **kwargs)
+
+    # ------------------------------------------------------------------------
+
     @property
     def points(self):
         """
-        :return: Vector2Ds
+        :return: Points
+        :rtype: list
+        """
+        return list(zip(self.times, self.values))
+
+    @property
+    def times(self):
+        """
+        :return: Point times
+        :rtype: list
+        """
+        return self._times
+
+    @property
+    def values(self):
+        """
+        :return: Point values
         :rtype: list
         """
-        return self._points
+        return self._values
+
+    @property
+    def timesArray(self):
+        """
+        :return: Point times as a numpy array
+        :rtype: numpy.ndarray
+        """
+        if self._timesArray is None:
+            self._timesArray = numpy.array(self.times)
+
+        return self._timesArray
+
+    @property
+    def valuesArray(self):
+        """
+        :return: Point values as a numpy array
+        :rtype: numpy.ndarray
+        """
+        if self._valuesArray is None:
+            self._valuesArray = numpy.array(self.values)
+
+        return self._valuesArray
 
     @property
     def error(self):
@@ -55,6 +194,62 @@ class FitBezier(object):
         """
         return self._weightedTangents
 
+    @property
+    def maxDepth(self):
+        """
+        :return: Maximum split depth
+        :rtype: int/None
+        """
+        return self._maxDepth
+
+    @property
+    def maxSegments(self):
+        """
+        :return: Maximum amount of fitted segments
+        :rtype: int/None
+        """
+        return self._maxSegments
+
+    @property
+    def breakpoints(self):
+        """
+        The point indices the fitting starts from, the points are initially
+        split at these indices rather than fitted as a whole. The tangents
+        at the breakpoints remain continuous.
+
+        :return: Breakpoints
+        :rtype: list
+        """
+        return self._breakpoints
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def queue(self):
+        """
+        The outstanding segments that still need to be fitted. Each segment
+        is a node of the split tree.
+
+        :return: Outstanding segments
+        :rtype: list
+        """
+        return self._queue
+
+    @property
+    def tree(self):
+        """
+        The split tree of the last fit, stored as a list of root nodes. Each
+        node is a dictionary containing the first and last index, both
+        tangents, the split depth, the curve of each fitted iteration with
+        its max error and max index, the iteration picked for the error and
+        the child nodes once the node is split. The tree is None when the
+        points didn't have to be fitted.
+
+        :return: Split tree
+        :rtype: list/None
+        """
+        return self._tree
+
     # ------------------------------------------------------------------------
 
     @property
@@ -83,76 +278,359 @@ class FitBezier(object):
         :rtype: list
         """
         # get length of point
-        length = len(self.points)
+        x = self.times
+        y = self.values
+        length = len(x)
 
         # validate points
         if length == 0:
             return
 
         # add first point as a keyframe
+        self._tree = None
         self.keyframes = []
-        self.keyframes.append(Keyframe(self.points[0]))
+        self.keyframes.append(Keyframe((x[0], y[0])))
 
         # return keyframes if there is only 1 point
         if length == 1:
             return self.keyframes
 
+        # linear points are converted into keyframes directly, this shape
+        # doesn't need to be fitted. Stepped points are fitted as any other
+        # points, the samples cannot tell a step apart from a fast move.
+        if self.isLinear():
+            self.fitLinear()
+            return self.keyframes
+
         # get tangents
-        tan1 = (self.points[1] - self.points[0]).normal()
-        tan2 = (self.points[length - 2] - self.points[length - 1]).normal()
+        tan1 = normal(x[1] - x[0], y[1] - y[0])
+        tan2 = normal(x[length - 2] - x[length - 1], y[length - 2] - y[length - 1])
 
         # fit cubic
         self.fitCubic(0, length - 1, tan1, tan2)
 
         return self.keyframes
 
+    def fitArrays(self):
+        """
+        Fit bezier curves to the points and return the keyframes as flat
+        arrays. The handles are stored as (x, y) offsets relative to the
+        keyframe, the in handle of the first keyframe and the out handle of
+        the last keyframe are None.
+
+        :return: Times, values, in handles and out handles
+        :rtype: tuple
+        """
+        keyframes = self.fit() or []
+        return (
+            [keyframe.point[0] for keyframe in keyframes],
+            [keyframe.point[1] for keyframe in keyframes],
+            [keyframe.inHandle for keyframe in keyframes],
+            [keyframe.outHandle for keyframe in keyframes],
+        )
+
+    def refit(self, error):
+        """
+        Fit the points again using a different error. The split tree of the
+        previous fit is reused, the iterations of the curve of each node are
+        kept so the curve a fit from scratch would find for the new error
+        is picked without fitting the node again. Nodes are only fitted
+        when the new error needs more iterations, and nodes that are not
+        split yet or that are split at a different point are split again.
+        The keyframes are identical to the keyframes of a fit from scratch.
+
+        :param int/float error:
+        :return: Keyframes
+        :rtype: list
+        """
+        self._error = error
+        if self.tree is None:
+            return self.fit()
+
+        # add first point as a keyframe
+        self.keyframes = [Keyframe((self.times[0], self.values[0]))]
+
+        # walk tree
+        self._queue = list(reversed(self.tree))
+        while self.queue:
+            self.fitSegment(self.queue.pop())
+
+        return self.keyframes
+
+    def isLinear(self):
+        """
+        Check if all points lie on the line between the first and last
+        point, this includes flat points. Points without a line between the
+        first and last point, because there are less than two points or
+        because the first and last point share the same time, are never
+        linear.
+
+        :return: Linear state
+        :rtype: bool
+        """
+        x = self.times
+        y = self.values
+
+        # validate line
+        if len(x) < 2 or x[-1] == x[0]:
+            return False
+
+        slope = (y[-1] - y[0]) / (x[-1] - x[0])
+
+        for i in range(1, len(x) - 1):
+            if abs(y[0] + (x[i] - x[0]) * slope - y[i]) > SHAPE_TOLERANCE:
+                return False
+
+        return True
+
+    def getSteps(self):
+        """
+        Get the start index of each step when the points are stepped. The
+        points are stepped when they consist of at least two flat regions
+        where every region but the last contains at least two points and
+        every jump between the regions is larger than the error.
+
+        :return: Start indices of the steps
+        :rtype: list
+        """
+        y = self.values
+        steps = [0]
+
+        for i in range(1, len(y)):
+            jump = abs(y[i] - y[steps[-1]])
+            if jump <= SHAPE_TOLERANCE:
+                continue
+
+            # validate previous step and jump
+            if i - steps[-1] < 2 or jump <= self.error:
+                return []
+
+            steps.append(i)
+
+        return steps if len(steps) > 1 else []
+
+    def fitLinear(self):
+        """
+        Add a single curve between the first and last point with the handles
+        on the line between them.
+        """
+        x = self.times
+        y = self.values
+        dx = (x[-1] - x[0]) / 3
+        dy = (y[-1] - y[0]) / 3
+
+        self.addCurve(
+            (x[0], y[0]),
+            (x[0] + dx, y[0] + dy),
+            (x[-1] - dx, y[-1] - dy),
+            (x[-1], y[-1])
+        )
+
     def fitCubic(self, first, last, tan1, tan2):
         """
-        But a cubic bezier points between the provided first and last index
-        and it's tangents. Based in the weighted tangent settings the
-        iterations will be adjusted to gain speed. If a curve can be matched
-        the curve will be added to the keyframes, if not the curve will be
-        split at the point of max error and the function will be called
-        again.
+        Fit cubic bezier curves between the provided first and last index
+        and it's tangents. The region is added to a work queue, segments are
+        processed from the queue until it is empty. Segments that cannot be
+        matched are split and both halves are added to the queue, the left
+        half is processed first so the keyframes are created in order. When
+        breakpoints are provided the region is split at the breakpoints
+        before it is added to the queue.
+
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        """
+        # get root nodes of the regions
+        self._tree = [
+            self.getNode(regionFirst, regionLast, regionTan1, regionTan2, 0)
+            for regionFirst, regionLast, regionTan1, regionTan2 in self.getRegions(first, last, tan1, tan2)
+        ]
+
+        # add regions in reverse so the first region is processed first
+        self._queue = list(reversed(self.tree))
+        while self.queue:
+            self.fitSegment(self.queue.pop())
+
+    def getRegions(self, first, last, tan1, tan2):
+        """
+        Get the regions between the breakpoints that are within the provided
+        first and last index. The tangents at the breakpoints are calculated
+        the same way as when a segment is split.
 
         :param int first:
         :param int last:
-        :param Vector2D tan1:
-        :param Vector2D tan2:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: First index, last index and tangents of each region
+        :rtype: list
         """
+        x = self.times
+        y = self.values
+
+        indices = [first] + [i for i in self.breakpoints if first < i < last] + [last]
+        tangents = [tan1]
+        for i in indices[1:-1]:
+            tangents.append(normal(x[i - 1] - x[i + 1], y[i - 1] - y[i + 1]))
+        tangents.append(tan2)
+
+        regions = []
+        for i in range(len(indices) - 1):
+            tanStart = tangents[i] if i == 0 else (-tangents[i][0], -tangents[i][1])
+            regions.append((indices[i], indices[i + 1], tanStart, tangents[i + 1]))
+
+        return regions
+
+    def getNode(self, first, last, tan1, tan2, depth):
+        """
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :param int depth:
+        :return: Split tree node that is not fitted yet
+        :rtype: dict
+        """
+        return {
+            "first": first,
+            "last": last,
+            "tan1": tan1,
+            "tan2": tan2,
+            "depth": depth,
+            "iterations": [],
+            "curve": None,
+            "maxError": None,
+            "maxIndex": None,
+            "children": None,
+        }
+
+    def fitSegment(self, node):
+        """
+        Fit a cubic bezier between the first and last index of the node and
+        it's tangents. If a curve can be matched the curve will be added to
+        the keyframes, if not the region will be split at the point of max
+        error and both halves are added to the work queue. If splitting
+        would exceed the maximum depth or maximum segments the best found
+        curve will be added instead. The iterations and split of the node
+        are stored so the node doesn't have to be fitted again when
+        refitting.
+
+        :param dict node:
+        """
+        x = self.times
+        y = self.values
+
+        # get curve, the iterations of a previous fit are reused when they
+        # contain the iteration the error stops at.
+        iteration = self.getIteration(node["iterations"])
+        if iteration is None:
+            node["iterations"] = self.getIterations(
+                node["first"],
+                node["last"],
+                node["tan1"],
+                node["tan2"]
+            )
+            iteration = node["iterations"][-1]
+
+        node["curve"], node["maxError"], node["maxIndex"] = iteration
+
+        # validate curve and add it
+        if node["maxError"] < self.error:
+            self.addCurve(*node["curve"])
+            return
+
+        # validate the split, if the limits are reached the best curve is
+        # added even though it doesn't match the maximum error.
+        if not self.canSplit(node["depth"]):
+            self.addCurve(*node["curve"])
+            return
+
+        # fitting failed -- split at max error point and add both halves to
+        # the queue, the right half is added first so the left half is
+        # processed first.
+        maxIndex = node["maxIndex"]
+        if node["children"] is None or node["children"][0]["last"] != maxIndex:
+            tanCenter = normal(
+                x[maxIndex - 1] - x[maxIndex + 1],
+                y[maxIndex - 1] - y[maxIndex + 1]
+            )
+
+            node["children"] = [
+                self.getNode(node["first"], maxIndex, node["tan1"], tanCenter, node["depth"] + 1),
+                self.getNode(maxIndex, node["last"], (-tanCenter[0], -tanCenter[1]), node["tan2"], node["depth"] + 1),
+            ]
+
+        self.queue.append(node["children"][1])
+        self.queue.append(node["children"][0])
+
+    def getCurve(self, first, last, tan1, tan2):
+        """
+        Get the cubic bezier that best matches the points between the
+        provided first and last index and it's tangents. The curve matches
+        the points if the max error is smaller than the error.
+
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Curve, max error and max index
+        :rtype: tuple
+        """
+        return self.getIterations(first, last, tan1, tan2)[-1]
+
+    def getIterations(self, first, last, tan1, tan2):
+        """
+        Get the cubic bezier of each iteration up to the iteration that
+        matches the points between the provided first and last index or
+        that cannot be improved. Based in the weighted tangent settings the
+        iterations will be adjusted to gain speed.
+
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Curve, max error and max index of each iteration
+        :rtype: list
+        """
+        x = self.times
+        y = self.values
+
         #  use heuristic if region only has two points in it
         if last - first == 1:
             # get points
-            pt1 = self.points[first]
-            pt2 = self.points[last]
+            pt1 = (x[first], y[first])
+            pt2 = (x[last], y[last])
 
             # get distance between points
-            dist = pt1.distanceBetween(pt2) / 3
+            dist = distanceBetween(pt1[0], pt1[1], pt2[0], pt2[1]) / 3
 
-            # add curve
-            self.addCurve(pt1, pt1 + tan1 * dist, pt2 + tan2 * dist, pt2)
-            return
+            # get curve
+            curve = [
+                pt1,
+                (pt1[0] + tan1[0] * dist, pt1[1] + tan1[1] * dist),
+                (pt2[0] + tan2[0] * dist, pt2[1] + tan2[1] * dist),
+                pt2
+            ]
+            return [(curve, 0, first)]
 
         # parameterize points, and attempt to fit curve
         uPrime = self.chordLengthParameterize(first, last)
         errorThreshold = max(self.error, self.error * 4)
 
-        # get iterations, when weighted tangents is turned off the bezier
-        # generator cannot be improved using multiple iterations.
-        iterations = 4 if self.weightedTangents else 1
+        iterations = []
 
         # try 4 iterations
-        for i in range(iterations):
+        for i in range(self.getIterationCount()):
             # generate curve
             curve = self.generateBezier(first, last, uPrime, tan1, tan2)
 
             # find max deviation of points to fitted curve
             maxError, maxIndex = self.findMaxError(first, last, curve, uPrime)
+            iterations.append((curve, maxError, maxIndex))
 
-            # validate max error and add curve
+            # validate max error
             if maxError < self.error:
-                self.addCurve(*curve)
-                return
+                break
 
             # if error not too large, try reparameterization and iteration
             if maxError >= errorThreshold:
@@ -161,28 +639,72 @@ class FitBezier(object):
             self.reparameterize(first, last, uPrime, curve)
             errorThreshold = maxError
 
-        # fitting failed -- split at max error point and fit recursively
-        tanCenter = (self.points[maxIndex - 1] - self.points[
-            maxIndex + 1]).normal()
+        return iterations
+
+    def getIterationCount(self):
+        """
+        When weighted tangents is turned off the bezier generator cannot be
+        improved using multiple iterations.
+
+        :return: Maximum amount of iterations
+        :rtype: int
+        """
+        return 4 if self.weightedTangents else 1
+
+    def getIteration(self, iterations):
+        """
+        Get the iteration the fitting stops at for the current error from
+        the iterations of a previous fit. None is returned when the
+        iterations stopped before the current error would stop.
+
+        :param list iterations: Curve, max error and max index of each iteration
+        :return: Curve, max error and max index
+        :rtype: tuple/None
+        """
+        errorThreshold = max(self.error, self.error * 4)
 
-        self.fitCubic(first, maxIndex, tan1, tanCenter)
-        self.fitCubic(maxIndex, last, tanCenter * -1, tan2)
+        for i, iteration in enumerate(iterations):
+            maxError = iteration[1]
+            if maxError < self.error or maxError >= errorThreshold or i == self.getIterationCount() - 1:
+                return iteration
+
+            errorThreshold = maxError
+
+    def canSplit(self, depth):
+        """
+        Validate if a segment at the provided depth can be split, the split
+        is not allowed if it would exceed the maximum depth or if the amount
+        of fitted and outstanding segments would exceed the maximum segments.
+
+        :param int depth:
+        :return: Split state
+        :rtype: bool
+        """
+        if self.maxDepth is not None and depth >= self.maxDepth:
+            return False
+
+        # the split replaces the current segment with two new segments
+        segments = len(self.keyframes) - 1 + len(self.queue) + 2
+        if self.maxSegments is not None and segments > self.maxSegments:
+            return False
+
+        return True
 
     # ------------------------------------------------------------------------
 
     def addCurve(self, pt1, tan1, tan2, pt2):
         """
-        :param Vector2D pt1:
-        :param Vector2D tan1:
-        :param Vector2D tan2:
-        :param Vector2D pt2:
+        :param tuple pt1:
+        :param tuple tan1:
+        :param tuple tan2:
+        :param tuple pt2:
         """
         # update previous keyframe with out handle
         prev = self.keyframes[len(self.keyframes) - 1]
-        prev.outHandle = Vector2D(tan1 - pt1)
+        prev.outHandle = (tan1[0] - pt1[0], tan1[1] - pt1[1])
 
         # create new keyframe
-        keyframe = Keyframe(pt2, Vector2D(tan2 - pt2))
+        keyframe = Keyframe(pt2, (tan2[0] - pt2[0], tan2[1] - pt2[1]))
         self.keyframes.append(keyframe)
 
     # ------------------------------------------------------------------------
@@ -195,14 +717,18 @@ class FitBezier(object):
 
         :param int first:
         :param int last:
-        :param dict uPrime:
-        :param Vector2D tan1:
-        :param Vector2D tan2:
+        :param list uPrime:
+        :param tuple tan1:
+        :param tuple tan2:
         """
         # variables
         epsilon = EPSILON
-        pt1 = self.points[first]
-        pt2 = self.points[last]
+        x = self.times
+        y = self.values
+        pt1x, pt1y = x[first], y[first]
+        pt2x, pt2y = x[last], y[last]
+        tan1x, tan1y = tan1
+        tan2x, tan2y = tan2
 
         alpha1 = alpha2 = 0
         handle1 = handle2 = None
@@ -211,28 +737,12 @@ class FitBezier(object):
         # Only if weighted tangents are allowed. If this is not the case we
         # will fall back on Wu/Barsky heuristic.
         if self.weightedTangents:
-            # create the C and X matrices
-            C = [[0, 0], [0, 0]]
-            X = [0, 0]
-
-            for i in range(last - first + 1):
-                u = uPrime[i]
-                t = 1 - u
-                b = 3 * u * t
-                b0 = t * t * t
-                b1 = b * t
-                b2 = b * u
-                b3 = u * u * u
-                a1 = tan1 * b1
-                a2 = tan2 * b2
-                tmp = (self.points[first + i] - pt1 * (b0 + b1) - pt2 * (
-                            b2 + b3))
-                C[0][0] += a1 * a1
-                C[0][1] += a1 * a2
-                C[1][0] = C[0][1]
-                C[1][1] += a2 * a2
-                X[0] += a1 * tmp
-                X[1] += a2 * tmp
+            # create the C and X matrices, the vectorized numpy
+            # implementation is used for larger segments when available.
+            if numpy is not None and last - first + 1 >= NUMPY_MIN_POINTS:
+                C, X = self.leastSquaresMatricesNumpy(first, last, uPrime, tan1, tan2)
+            else:
+                C, X = self.leastSquaresMatrices(first, last, uPrime, tan1, tan2)
 
             # compute the determinants of C and X
             detC0C1 = C[0][0] * C[1][1] - C[1][0] * C[0][1]
@@ -257,7 +767,7 @@ class FitBezier(object):
         # if alpha negative, use the Wu/Barsky heuristic (see text)
         # (if alpha is 0, you get coincident control points that lead to
         # divide by zero in any subsequent NewtonRaphsonRootFind() call.
-        segLength = pt2.distanceBetween(pt1)
+        segLength = distanceBetween(pt2x, pt2y, pt1x, pt1y)
         epsilon *= segLength
         if alpha1 < epsilon or alpha2 < epsilon:
             # fall back on standard (probably inaccurate) formula,
@@ -266,73 +776,245 @@ class FitBezier(object):
         else:
             # check if the found control points are in the right order when
             # projected onto the line through pt1 and pt2.
-            line = pt2 - pt1
+            lineX = pt2x - pt1x
+            lineY = pt2y - pt1y
 
             # control points 1 and 2 are positioned an alpha distance out
             # on the tangent vectors, left and right, respectively
-            handle1 = tan1 * alpha1
-            handle2 = tan2 * alpha2
+            handle1 = (tan1x * alpha1, tan1y * alpha1)
+            handle2 = (tan2x * alpha2, tan2y * alpha2)
 
-            if ((handle1 * line) - (handle2 * line)) > segLength * segLength:
+            dot1 = handle1[0] * lineX + handle1[1] * lineY
+            dot2 = handle2[0] * lineX + handle2[1] * lineY
+            if (dot1 - dot2) > segLength * segLength:
                 # fall back to the Wu/Barsky heuristic above.
-                alpha1 = alpha2 = segLength / 3;
+                alpha1 = alpha2 = segLength / 3
                 handle1 = handle2 = None
 
-                # first and last control points of the Bezier curve are
+        if handle1 is None:
+            handle1 = (tan1x * alpha1, tan1y * alpha1)
+        if handle2 is None:
+            handle2 = (tan2x * alpha2, tan2y * alpha2)
+
+        # first and last control points of the Bezier curve are
         # positioned exactly at the first and last data points
         # Control points 1 and 2 are positioned an alpha distance out
         # on the tangent vectors, left and right, respectively
         return [
-            pt1,
-            pt1 + (handle1 or (tan1 * alpha1)),
-            pt2 + (handle2 or (tan2 * alpha2)),
-            pt2
+            (pt1x, pt1y),
+            (pt1x + handle1[0], pt1y + handle1[1]),
+            (pt2x + handle2[0], pt2y + handle2[1]),
+            (pt2x, pt2y)
+        ]
+
+    def leastSquaresMatrices(self, first, last, uPrime, tan1, tan2):
+        """
+        Create the C and X matrices used to solve the alpha values of the
+        least-squares method by looping over all points in the region.
+
+        :param int first:
+        :param int last:
+        :param list uPrime:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: C and X matrices
+        :rtype: tuple
+        """
+        # variables
+        x = self.times
+        y = self.values
+        pt1x, pt1y = x[first], y[first]
+        pt2x, pt2y = x[last], y[last]
+        tan1x, tan1y = tan1
+        tan2x, tan2y = tan2
+
+        # create the C and X matrices
+        C = [[0, 0], [0, 0]]
+        X = [0, 0]
+
+        for i in range(last - first + 1):
+            u = uPrime[i]
+            t = 1 - u
+            b = 3 * u * t
+            b0 = t * t * t
+            b1 = b * t
+            b2 = b * u
+            b3 = u * u * u
+            a1x, a1y = tan1x * b1, tan1y * b1
+            a2x, a2y = tan2x * b2, tan2y * b2
+            tmpx = x[first + i] - pt1x * (b0 + b1) - pt2x * (b2 + b3)
+            tmpy = y[first + i] - pt1y * (b0 + b1) - pt2y * (b2 + b3)
+            C[0][0] += a1x * a1x + a1y * a1y
+            C[0][1] += a1x * a2x + a1y * a2y
+            C[1][0] = C[0][1]
+            C[1][1] += a2x * a2x + a2y * a2y
+            X[0] += a1x * tmpx + a1y * tmpy
+            X[1] += a2x * tmpx + a2y * tmpy
+
+        return C, X
+
+    def leastSquaresMatricesNumpy(self, first, last, uPrime, tan1, tan2):
+        """
+        Create the C and X matrices used to solve the alpha values of the
+        least-squares method. The bernstein weights of all points in the
+        region are calculated at once using numpy.
+
+        :param int first:
+        :param int last:
+        :param list uPrime:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: C and X matrices
+        :rtype: tuple
+        """
+        # variables
+        x = self.timesArray[first:last + 1]
+        y = self.valuesArray[first:last + 1]
+        pt1x, pt1y = self.times[first], self.values[first]
+        pt2x, pt2y = self.times[last], self.values[last]
+        tan1x, tan1y = tan1
+        tan2x, tan2y = tan2
+
+        # get bernstein weights
+        u = numpy.asarray(uPrime, dtype=float)
+        t = 1 - u
+        b = 3 * u * t
+        b0 = t * t * t
+        b1 = b * t
+        b2 = b * u
+        b3 = u * u * u
+
+        # get tangent and point offset vectors
+        a1x, a1y = tan1x * b1, tan1y * b1
+        a2x, a2y = tan2x * b2, tan2y * b2
+        tmpx = x - pt1x * (b0 + b1) - pt2x * (b2 + b3)
+        tmpy = y - pt1y * (b0 + b1) - pt2y * (b2 + b3)
+
+        # create the C and X matrices
+        c01 = float(numpy.dot(a1x, a2x) + numpy.dot(a1y, a2y))
+        C = [
+            [float(numpy.dot(a1x, a1x) + numpy.dot(a1y, a1y)), c01],
+            [c01, float(numpy.dot(a2x, a2x) + numpy.dot(a2y, a2y))]
         ]
+        X = [
+            float(numpy.dot(a1x, tmpx) + numpy.dot(a1y, tmpy)),
+            float(numpy.dot(a2x, tmpx) + numpy.dot(a2y, tmpy))
+        ]
+
+        return C, X
 
     # ------------------------------------------------------------------------
 
     def reparameterize(self, first, last, u, curve):
         """
         Given set of points and their parameterization, try to find a better
-        parameterization.
+        parameterization. The vectorized numpy implementation is used for
+        larger segments when available.
 
         :param int first:
         :param int last:
-        :param dict u:
+        :param list u:
         :param list curve:
         """
+        if numpy is not None and last - first + 1 >= NUMPY_MIN_POINTS:
+            self.reparameterizeNumpy(first, last, u, curve)
+            return
+
+        # variables
+        x = self.times
+        y = self.values
+
+        # generate control vertices for Q' and Q''
+        curve1, curve2 = self.derivativeCurves(curve)
+
         for i in range(first, last + 1):
-            u[i - first] = self.findRoot(curve, self.points[i], u[i - first])
+            u[i - first] = self.findRoot(curve, (x[i], y[i]), u[i - first], curve1, curve2)
 
-    def findRoot(self, curve, point, u):
+    def reparameterizeNumpy(self, first, last, u, curve):
         """
-        Use Newton-Raphson iteration to find better root.
+        Given set of points and their parameterization, try to find a better
+        parameterization. The Newton-Raphson update is done for all points
+        in the region at once using numpy.
 
+        :param int first:
+        :param int last:
+        :param list u:
         :param list curve:
-        :param Vector2D point:
-        :param Vector2D u:
-        :return: New root point
-        :rtype: Vector2D
         """
-        # generate control vertices for Q'
-        curve1 = [(curve[i + 1] - curve[i]) * 3 for i in range(3)]
+        # variables
+        x = self.timesArray[first:last + 1]
+        y = self.valuesArray[first:last + 1]
+        uArray = numpy.asarray(u, dtype=float)
 
-        # generate control vertices for Q''
-        curve2 = [(curve1[i + 1] - curve1[i]) * 2 for i in range(2)]
+        # compute Q(u), Q'(u) and Q''(u)
+        pt, pt1, pt2 = self.evaluateDerivativesArray(curve, uArray)
+        diffX = pt[0] - x
+        diffY = pt[1] - y
+        df = (pt1[0] * pt1[0] + pt1[1] * pt1[1]) + (diffX * pt2[0] + diffY * pt2[1])
+
+        # u = u - f(u) / f'(u), only where f'(u) is large enough
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            root = uArray - (diffX * pt1[0] + diffY * pt1[1]) / df
+
+        u[:] = numpy.where(numpy.abs(df) >= EPSILON, root, uArray).tolist()
+
+    def findRoot(self, curve, point, u, curve1=None, curve2=None):
+        """
+        Use Newton-Raphson iteration to find better root. The control
+        vertices of Q' and Q'' can be provided when the same curve is used
+        for multiple points to prevent them from being generated each time.
+
+        :param list curve:
+        :param tuple point:
+        :param float u:
+        :param list/None curve1:
+        :param list/None curve2:
+        :return: New root
+        :rtype: float
+        """
+        # generate control vertices for Q' and Q''
+        if curve1 is None or curve2 is None:
+            curve1, curve2 = self.derivativeCurves(curve)
 
         # compute Q(u), Q'(u) and Q''(u)
         pt = self.evaluate(3, curve, u)
         pt1 = self.evaluate(2, curve1, u)
         pt2 = self.evaluate(1, curve2, u)
-        diff = pt - point
-        df = (pt1 * pt1) + (diff * pt2)
+        diffX = pt[0] - point[0]
+        diffY = pt[1] - point[1]
+        df = (pt1[0] * pt1[0] + pt1[1] * pt1[1]) + (diffX * pt2[0] + diffY * pt2[1])
 
         # compute f(u) / f'(u)
         if abs(df) < EPSILON:
             return u
 
         # u = u - f(u) / f'(u)
-        return u - (diff * pt1) / df
+        return u - (diffX * pt1[0] + diffY * pt1[1]) / df
+
+    # ------------------------------------------------------------------------
+
+    def derivativeCurves(self, curve):
+        """
+        Generate the control vertices of the first and second derivative of
+        the provided cubic bezier curve.
+
+        :param list curve:
+        :return: Control vertices for Q' and Q''
+        :rtype: tuple
+        """
+        # generate control vertices for Q'
+        curve1 = [
+            ((curve[i + 1][0] - curve[i][0]) * 3, (curve[i + 1][1] - curve[i][1]) * 3)
+            for i in range(3)
+        ]
+
+        # generate control vertices for Q''
+        curve2 = [
+            ((curve1[i + 1][0] - curve1[i][0]) * 2, (curve1[i + 1][1] - curve1[i][1]) * 2)
+            for i in range(2)
+        ]
+
+        return curve1, curve2
 
     def evaluate(self, degree, curve, t):
         """
@@ -342,7 +1024,7 @@ class FitBezier(object):
         :param list curve:
         :param float t:
         :return: Point on curve
-        :rtype: Vector2D
+        :rtype: tuple
         """
         # copy array
         tmp = curve[:]
@@ -350,10 +1032,60 @@ class FitBezier(object):
         # triangle computation
         for i in range(1, degree + 1):
             for j in range(degree - i + 1):
-                tmp[j] = (tmp[j] * (1 - t)) + (tmp[j + 1] * t)
+                tmp[j] = (
+                    (tmp[j][0] * (1 - t)) + (tmp[j + 1][0] * t),
+                    (tmp[j][1] * (1 - t)) + (tmp[j + 1][1] * t)
+                )
 
         return tmp[0]
 
+    def evaluateArray(self, degree, curve, t):
+        """
+        Evaluate a bezier curve at an array of parameter values at once. The
+        same triangle computation is used as in the evaluate method so the
+        results are identical.
+
+        :param int degree:
+        :param list curve:
+        :param numpy.ndarray t:
+        :return: Points on curve as x and y arrays
+        :rtype: tuple
+        """
+        # variables
+        s = 1 - t
+        tmp = curve[:]
+
+        # triangle computation
+        for i in range(1, degree + 1):
+            for j in range(degree - i + 1):
+                tmp[j] = (
+                    (tmp[j][0] * s) + (tmp[j + 1][0] * t),
+                    (tmp[j][1] * s) + (tmp[j + 1][1] * t)
+                )
+
+        # make sure arrays are returned for constant curves
+        x, y = tmp[0]
+        return x + numpy.zeros_like(t), y + numpy.zeros_like(t)
+
+    def evaluateDerivativesArray(self, curve, t):
+        """
+        Evaluate Q, Q' and Q'' of a cubic bezier curve at an array of
+        parameter values at once.
+
+        :param list curve:
+        :param numpy.ndarray t:
+        :return: Points on Q, Q' and Q'' as x and y arrays
+        :rtype: tuple
+        """
+        curve1, curve2 = self.derivativeCurves(curve)
+        return (
+            self.evaluateArray(3, curve, t),
+            self.evaluateArray(2, curve1, t),
+            self.evaluateArray(1, curve2, t)
+        )
+
+    # ------------------------------------------------------------------------
+
     def chordLengthParameterize(self, first, last):
         """
         Assign parameter values to digitized points using relative distances
@@ -362,13 +1094,14 @@ class FitBezier(object):
         :param int first:
         :param int last:
         :return: Chord length parameterization
-        :rtype: dict
+        :rtype: list
         """
-        u = {0: 0}
+        x = self.times
+        y = self.values
+        u = [0]
 
         for i in range(first + 1, last + 1):
-            u[i - first] = u[i - first - 1] + self.points[i].distanceBetween(
-                self.points[i - 1])
+            u.append(u[i - first - 1] + distanceBetween(x[i], y[i], x[i - 1], y[i - 1]))
 
         m = last - first
         for i in range(1, m + 1):
@@ -379,24 +1112,366 @@ class FitBezier(object):
     def findMaxError(self, first, last, curve, u):
         """
         Find the maximum squared distance of digitized points to fitted
-        curve.
+        curve. The vectorized numpy implementation is used for larger
+        segments when available.
 
         :param int first:
         :param int last:
         :param list curve:
-        :param dict u:
+        :param list u:
         :return: Max distance and max index
         :rtype: tuple
         """
+        if numpy is not None and last - first + 1 >= NUMPY_MIN_POINTS:
+            return self.findMaxErrorNumpy(first, last, curve, u)
+
+        x = self.times
+        y = self.values
         maxDist = 0
-        maxIndex = math.floor((last - first + 1) / 2)
+        maxIndex = (last - first + 1) // 2
 
         for i in range(first + 1, last):
             P = self.evaluate(3, curve, u[i - first])
-            dist = (P - self.points[i]).length()
+            dist = distanceBetween(P[0], P[1], x[i], y[i])
 
             if dist >= maxDist:
                 maxDist = dist
                 maxIndex = i
 
         return maxDist, maxIndex
+
+    def findMaxErrorNumpy(self, first, last, curve, u):
+        """
+        Find the maximum squared distance of digitized points to fitted
+        curve. All points in the region are evaluated at once using numpy.
+
+        :param int first:
+        :param int last:
+        :param list curve:
+        :param list u:
+        :return: Max distance and max index
+        :rtype: tuple
+        """
+        # evaluate the points in between the first and last point
+        x = self.timesArray[first + 1:last]
+        y = self.valuesArray[first + 1:last]
+        P = self.evaluateArray(3, curve, numpy.asarray(u[1:last - first], dtype=float))
+
+        diffX = P[0] - x
+        diffY = P[1] - y
+        dist = numpy.sqrt(diffX * diffX + diffY * diffY)
+
+        # get the last index of the max distance to match the python
+        # implementation
+        index = len(dist) - 1 - int(numpy.argmax(dist[::-1]))
+        return float(dist[index]), first + 1 + index
+
+
+class FitLayered(FitBezier):
+    """
+    Fit bezier curves to the points by searching for keyframes that reach
+    as far as possible rather than splitting at the point of max error,
+    which uses less keyframes than the greedy fitter in most cases. Every
+    point is a candidate keyframe with the same tangent the greedy fitter
+    would use when splitting at that point. The candidates that can be
+    reached using the same amount of keyframes form a layer, the candidate
+    of a layer that reaches the furthest using a single curve becomes a
+    keyframe. The curves are matched using the same max error as the
+    greedy fitter.
+
+    The search is approximate, the least amount of keyframes is not
+    guaranteed. The furthest reach of a candidate is found using an
+    exponential and binary search, assuming a curve that matches a region
+    also matches the regions inside of it. The candidates of a layer are
+    processed from the end, once the amount of candidates defined by the
+    maximum candidates don't reach any further the remaining candidates are
+    skipped.
+
+    The regions between the breakpoints are searched separately. Regions
+    that need more curves than the maximum depth or maximum segments allow
+    are fitted using the greedy fitter, which honours these limits.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        :param int maxCandidates: Candidates per layer without improvement
+        """
+        self._maxCandidates = kwargs.pop("maxCandidates", LAYERED_CANDIDATES)
+        super(FitLayered, self).__init__(*args, **kwargs)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def maxCandidates(self):
+        """
+        :return: Candidates per layer without improvement
+        :rtype: int
+        """
+        return self._maxCandidates
+
+    # ------------------------------------------------------------------------
+
+    def fitCubic(self, first, last, tan1, tan2):
+        """
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        """
+        for regionFirst, regionLast, regionTan1, regionTan2 in self.getRegions(first, last, tan1, tan2):
+            path = self.findPath(regionFirst, regionLast, regionTan1, regionTan2)
+            if not self.canFollow(path):
+                super(FitLayered, self).fitCubic(regionFirst, regionLast, regionTan1, regionTan2)
+                continue
+
+            # add curves, regions that don't match as the reach was assumed
+            # are fitted using the greedy fitter.
+            for i, j in zip(path[:-1], path[1:]):
+                start, end = self.getTangents(i, j, regionFirst, regionLast, regionTan1, regionTan2)
+                curve, maxError, _ = self.getCurve(i, j, start, end)
+                if maxError < self.error:
+                    self.addCurve(*curve)
+                    continue
+
+                super(FitLayered, self).fitCubic(i, j, start, end)
+
+        # the split tree of the greedy fitted regions doesn't cover all
+        # points so it is not kept.
+        self._tree = None
+
+    def findPath(self, first, last, tan1, tan2):
+        """
+        Find the keyframe indices between the first and last index, the
+        candidate of each layer that reaches the furthest becomes a
+        keyframe.
+
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Keyframe indices, including the first and last index
+        :rtype: list
+        """
+        path = []
+        layerStart = first
+        layerEnd = first
+
+        while True:
+            furthest = layerEnd
+            candidate = layerEnd
+            misses = 0
+
+            for index in reversed(range(layerStart, layerEnd + 1)):
+                guess = max(furthest, index + 1)
+                reach = self.findReach(index, first, last, guess, tan1, tan2)
+
+                if reach > furthest:
+                    furthest = reach
+                    candidate = index
+                    misses = 0
+                else:
+                    misses += 1
+
+                if furthest == last or misses >= self.maxCandidates:
+                    break
+
+            path.append(candidate)
+            if furthest == last:
+                break
+
+            layerStart = layerEnd + 1
+            layerEnd = furthest
+
+        path.append(last)
+        return path
+
+    def canFollow(self, path):
+        """
+        Validate if the curves of the path can be added without exceeding
+        the maximum depth or maximum segments. A split tree of the maximum
+        depth holds two curves for every level.
+
+        :param list path:
+        :return: Follow state
+        :rtype: bool
+        """
+        segments = len(path) - 1
+        if self.maxDepth is not None and segments > 2 ** self.maxDepth:
+            return False
+
+        if self.maxSegments is not None and len(self.keyframes) - 1 + segments > self.maxSegments:
+            return False
+
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def getTangents(self, i, j, first, last, tan1, tan2):
+        """
+        Get the tangents of the region between the i and j index. The
+        tangents at the first and last index are the provided tangents, the
+        tangents in between are continuous.
+
+        :param int i:
+        :param int j:
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Tangents
+        :rtype: tuple
+        """
+        x = self.times
+        y = self.values
+
+        # get start tangent
+        if i == first:
+            start = tan1
+        else:
+            start = normal(x[i + 1] - x[i - 1], y[i + 1] - y[i - 1])
+
+        # get end tangent
+        if j == last:
+            end = tan2
+        else:
+            end = normal(x[j - 1] - x[j + 1], y[j - 1] - y[j + 1])
+
+        return start, end
+
+    def isMatch(self, i, j, first, last, tan1, tan2):
+        """
+        :param int i:
+        :param int j:
+        :param int first:
+        :param int last:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Match state of a single curve between the i and j index
+        :rtype: bool
+        """
+        _, maxError, _ = self.getCurve(i, j, *self.getTangents(i, j, first, last, tan1, tan2))
+        return maxError < self.error
+
+    def findReach(self, index, first, last, guess, tan1, tan2):
+        """
+        Find the furthest index that can be reached from the provided index
+        using a single curve. The search starts at the guess, grows
+        exponentially until the curve doesn't match and is then narrowed
+        down using a binary search.
+
+        :param int index:
+        :param int first:
+        :param int last:
+        :param int guess:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Furthest index
+        :rtype: int
+        """
+        guess = min(guess, last)
+
+        # get bounds, the low bound matches and the high bound doesn't
+        if not self.isMatch(index, guess, first, last, tan1, tan2):
+            low, high = index + 1, guess
+        else:
+            low, high, step = guess, None, 1
+            while low < last:
+                candidate = min(low + step, last)
+                if not self.isMatch(index, candidate, first, last, tan1, tan2):
+                    high = candidate
+                    break
+
+                low = candidate
+                step *= 2
+
+            if high is None:
+                return last
+
+        # narrow bounds
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.isMatch(index, middle, first, last, tan1, tan2):
+                low = middle
+            else:
+                high = middle
+
+        return low
+
+
+# ----------------------------------------------------------------------------
+
+
+# the merge fitter reduces the keyframes of the animation curve itself
+# rather than sampled points, which is why it is not one of the fitters
+# that can be used to fit segments.
+FITTER_GREEDY = "greedy"
+FITTER_LAYERED = "layered"
+FITTER_MERGE = "merge"
+FITTERS = {
+    FITTER_GREEDY: FitBezier,
+    FITTER_LAYERED: FitLayered,
+}
+
+
+# ----------------------------------------------------------------------------
+
+
+def getFitters(
+        segments,
+        error=2.5,
+        weightedTangents=True,
+        splitSimplify=False,
+        fitter=FITTER_GREEDY,
+):
+    """
+    Create a fitter for each of the segments of points. When split simplify
+    is enabled the fitting of each segment starts from the points kept by
+    simplifying the segment, which saves failed fit attempts on long
+    detailed curves. The greedy fitter splits at the point of max error,
+    the layered fitter often uses less keyframes at the cost of speed.
+
+    :param list segments:
+    :param int/float error:
+    :param bool weightedTangents:
+    :param bool splitSimplify:
+    :param str fitter: "greedy" or "layered"
+    :return: Fitters
+    :rtype: list
+    :raise ValueError: When the fitter is not supported
+    """
+    if fitter not in FITTERS:
+        raise ValueError("Fitter '{}' is not supported, options are {}.".format(fitter, sorted(FITTERS)))
+
+    fitters = []
+
+    for points in segments:
+        breakpoints = findSplitSimplify(points, error * SIMPLIFY_SCALE) if splitSimplify else None
+        fitters.append(FITTERS[fitter](points, error, weightedTangents, breakpoints=breakpoints))
+
+    return fitters
+
+
+def fitSegments(
+        segments,
+        error=2.5,
+        weightedTangents=True,
+        splitSimplify=False,
+        fitter=FITTER_GREEDY,
+):
+    """
+    Fit each of the segments of points and combine the keyframes of all
+    segments. This function doesn't depend on Maya, which makes it possible
+    to run the fitting in other processes.
+
+    :param list segments:
+    :param int/float error:
+    :param bool weightedTangents:
+    :param bool splitSimplify:
+    :param str fitter: "greedy" or "layered"
+    :return: Keyframes
+    :rtype: list
+    """
+    return [
+        keyframe
+        for obj in getFitters(segments, error, weightedTangents, splitSimplify, fitter)
+        for keyframe in obj.fit() or []
+    ]
@@ -1,19 +1,22 @@
 class Keyframe(object):
-    def __init__(self, point, inHandle=None, outHandle=None):
+    def __init__(self, point, inHandle=None, outHandle=None, outTangentType="fixed"):
         """
-        :param Vector2D point:
-        :param Vector2D inHandle:
-        :param Vector2D outHandle:
+        :param tuple point:
+        :param tuple inHandle:
+        :param tuple outHandle:
+        :param str outTangentType:
         """
         self._point = point
         self._inHandle = inHandle
         self._outHandle = outHandle
+        self._outTangentType = outTangentType
 
     def __repr__(self):
-        return "< Keyframe object | point: {} | in-handle: {} | out-handle: {} >".format(
+        return "< Keyframe object | point: {} | in-handle: {} | out-handle: {} | out-tangent-type: {} >".format(
             str(self.point),
             str(self.inHandle),
-            str(self.outHandle)
+            str(self.outHandle),
+            self.outTangentType
         )
 
     # ------------------------------------------------------------------------
@@ -21,15 +24,15 @@ class Keyframe(object):
     @property
     def point(self):
         """
-        :return: Vector2D
-        :rtype: Vector2D
+        :return: Point
+        :rtype: tuple
         """
         return self._point
 
     @point.setter
     def point(self, p):
         """
-        :param Vector2D p:
+        :param tuple p:
         """
         self._point = p
 
@@ -39,14 +42,14 @@ class Keyframe(object):
     def inHandle(self):
         """
         :return: In handle
-        :rtype: Vector2D
+        :rtype: tuple
         """
         return self._inHandle
 
     @inHandle.setter
     def inHandle(self, p):
         """
-        :param Vector2D p:
+        :param tuple p:
         """
         self._inHandle = p
 
@@ -54,13 +57,28 @@ class Keyframe(object):
     def outHandle(self):
         """
         :return: Out handle
-        :rtype: Vector2D
+        :rtype: tuple
         """
         return self._outHandle
 
     @outHandle.setter
     def outHandle(self, p):
         """
-        :param Vector2D p:
+        :param tuple p:
         """
         self._outHandle = p
+
+    @property
+    def outTangentType(self):
+        """
+        :return: Out tangent type
+        :rtype: str
+        """
+        return self._outTangentType
+
+    @outTangentType.setter
+    def outTangentType(self, t):
+        """
+        :param str t:
+        """
+        self._outTangentType = t
@@ -1,21 +1,117 @@
 import math
 import time
-from maya import cmds
-
-from .vector import Vector2D
-from .fit import FitBezier
+from array import array
+from maya import cmds, OpenMaya, OpenMayaAnim
+
+from .fit import fitSegments, FITTER_GREEDY, FITTER_MERGE
+from .merge import mergeAnimCurve
+from .animCurve import AnimCurve, isStepped
+from .split import (
+    getAngles,
+    getStepAngles,
+    findTangentSplitAuto,
+    findTangentSplitExisting,
+    findTangentSplitThreshold,
+    splitPoints,
+)
+from .sample import sampleAdaptive, getSampleTolerance
 from ..utils import floatRange, THRESHOLD
 
 
+# ----------------------------------------------------------------------------
+
+
+SAMPLER_API = "api"
+SAMPLER_CMDS = "cmds"
+SAMPLER_PYTHON = "python"
+
+WRITER_API = "api"
+WRITER_CMDS = "cmds"
+
+# the api works with values in internal units, the values are converted
+# from and to ui units to match the values used by the keyframe command.
+# The values of animation curves that output time are stored in seconds.
+def timeInternalToUI(value):
+    """
+    :param float value: Time in seconds
+    :return: Time in ui units
+    :rtype: float
+    """
+    return OpenMaya.MTime(value, OpenMaya.MTime.kSeconds).asUnits(OpenMaya.MTime.uiUnit())
+
+
+def timeUIToInternal(value):
+    """
+    :param float value: Time in ui units
+    :return: Time in seconds
+    :rtype: float
+    """
+    return OpenMaya.MTime(value, OpenMaya.MTime.uiUnit()).asUnits(OpenMaya.MTime.kSeconds)
+
+
+API_INTERNAL_TO_UI = {
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTA: OpenMaya.MAngle.internalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTL: OpenMaya.MDistance.internalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTT: timeInternalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTU: float,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUA: OpenMaya.MAngle.internalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUL: OpenMaya.MDistance.internalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUT: timeInternalToUI,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUU: float,
+}
+API_UI_TO_INTERNAL = {
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTA: OpenMaya.MAngle.uiToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTL: OpenMaya.MDistance.uiToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTT: timeUIToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveTU: float,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUA: OpenMaya.MAngle.uiToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUL: OpenMaya.MDistance.uiToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUT: timeUIToInternal,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUU: float,
+}
+
+# animation curves driven by an attribute other than time, such as set
+# driven keys, have unitless inputs.
+API_UNITLESS_INPUT = {
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUA,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUL,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUT,
+    OpenMayaAnim.MFnAnimCurve.kAnimCurveUU,
+}
+
+API_TANGENT_TYPES = {
+    "auto": OpenMayaAnim.MFnAnimCurve.kTangentAuto,
+    "clamped": OpenMayaAnim.MFnAnimCurve.kTangentClamped,
+    "fixed": OpenMayaAnim.MFnAnimCurve.kTangentFixed,
+    "flat": OpenMayaAnim.MFnAnimCurve.kTangentFlat,
+    "linear": OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+    "plateau": OpenMayaAnim.MFnAnimCurve.kTangentPlateau,
+    "spline": OpenMayaAnim.MFnAnimCurve.kTangentSmooth,
+    "step": OpenMayaAnim.MFnAnimCurve.kTangentStep,
+    "stepnext": OpenMayaAnim.MFnAnimCurve.kTangentStepNext,
+}
+
+
+# ----------------------------------------------------------------------------
+
+
 class KeyframeReduction(object):
-    def __init__(self, path):
+    def __init__(self, path, sampler=SAMPLER_API, writer=WRITER_CMDS):
         """
         :param str path:
+        :param str sampler: "api", "cmds" or "python"
+        :param str writer: "api" or "cmds"
         """
         self._path = path
+        self._sampler = sampler
+        self._writer = writer
 
     def __repr__(self):
-        return "< KeyframeReduction object | path: {} >".format(self.path)
+        return "< KeyframeReduction object | path: {} | sampler: {} | writer: {} >".format(
+            self.path,
+            self.sampler,
+            self.writer
+        )
 
     # ------------------------------------------------------------------------
 
@@ -27,6 +123,160 @@ class KeyframeReduction(object):
         """
         return self._path
 
+    @property
+    def sampler(self):
+        """
+        The sampler determines how the animation curve is evaluated. The api
+        sampler evaluates the animation curve node directly which is a lot
+        faster than the cmds sampler which runs a command for each frame. The
+        python sampler reads the keyframe data once and evaluates the curve
+        without Maya.
+
+        :return: Sampler
+        :rtype: str
+        """
+        return self._sampler
+
+    @property
+    def writer(self):
+        """
+        The writer determines how the reduced keyframes are written to the
+        animation curve. The cmds writer runs multiple undoable commands for
+        each keyframe. The api writer replaces all keyframes in one bulk
+        operation, changes made by the api writer are not added to the undo
+        queue.
+
+        :return: Writer
+        :rtype: str
+        """
+        return self._writer
+
+    # ------------------------------------------------------------------------
+
+    def getAnimCurveFn(self):
+        """
+        :return: Animation curve function set
+        :rtype: OpenMayaAnim.MFnAnimCurve
+        """
+        selection = OpenMaya.MSelectionList()
+        selection.add(self.path)
+
+        obj = OpenMaya.MObject()
+        selection.getDependNode(0, obj)
+
+        return OpenMayaAnim.MFnAnimCurve(obj)
+
+    def getAnimCurve(self):
+        """
+        Read all of the keyframe and tangent data of the animation curve at
+        once, the returned object can evaluate the curve without Maya.
+
+        :return: Animation curve data
+        :rtype: AnimCurve
+        """
+        # get keyframe data
+        times = cmds.keyframe(self.path, query=True, timeChange=True) or []
+        values = cmds.keyframe(self.path, query=True, valueChange=True) or []
+
+        # get tangent data
+        tangents = {}
+        for flag in [
+            "inAngle", "outAngle",
+            "inWeight", "outWeight",
+            "inTangentType", "outTangentType"
+        ]:
+            tangents[flag] = cmds.keyTangent(self.path, query=True, **{flag: True}) or []
+
+        # get curve data
+        weightedTangents = cmds.keyTangent(self.path, query=True, weightedTangents=True)
+        preInfinity = cmds.setInfinity(self.path, query=True, preInfinite=True)
+        postInfinity = cmds.setInfinity(self.path, query=True, postInfinite=True)
+
+        return AnimCurve(
+            times,
+            values,
+            tangents["inAngle"],
+            tangents["outAngle"],
+            tangents["inWeight"],
+            tangents["outWeight"],
+            tangents["inTangentType"],
+            tangents["outTangentType"],
+            weightedTangents[0] if weightedTangents else False,
+            preInfinity[0] if preInfinity else "constant",
+            postInfinity[0] if postInfinity else "constant",
+        )
+
+    def setAnimCurve(self, animCurve, change=None):
+        """
+        Replace all of the keyframes of the animation curve with the
+        keyframes and tangents of the provided animation curve data in one
+        bulk operation using the api. The infinity types are not changed. An
+        animation curve change can be provided to be able to undo the
+        changes.
+
+        :param AnimCurve animCurve:
+        :param OpenMayaAnim.MAnimCurveChange/None change:
+        :raise RuntimeError: When the animation curve cannot be written.
+        """
+        # get function set and unit conversion
+        fn = self.getAnimCurveFn()
+        animCurveType = fn.animCurveType()
+        convert = API_UI_TO_INTERNAL.get(animCurveType)
+        if convert is None:
+            raise RuntimeError(
+                "Unable to write '{}' using the api, "
+                "its type is not supported.".format(self.path)
+            )
+
+        # replace keyframes, keys with a unitless input cannot be added in
+        # bulk so the existing keys are removed and the keys added one by one.
+        fixed = OpenMayaAnim.MFnAnimCurve.kTangentFixed
+        fn.setIsWeighted(animCurve.weightedTangents, change)
+
+        if animCurveType in API_UNITLESS_INPUT:
+            for i in reversed(range(fn.numKeys())):
+                fn.remove(i, change)
+
+            for frame, value in zip(animCurve.times, animCurve.values):
+                fn.addKey(frame, convert(value), fixed, fixed, change)
+        else:
+            unit = OpenMaya.MTime.uiUnit()
+            times = OpenMaya.MTimeArray()
+            values = OpenMaya.MDoubleArray()
+
+            for frame, value in zip(animCurve.times, animCurve.values):
+                times.append(OpenMaya.MTime(frame, unit))
+                values.append(convert(value))
+
+            fn.addKeys(times, values, fixed, fixed, False, change)
+
+        # set tangents
+        iterator = enumerate(zip(
+            animCurve.inAngles,
+            animCurve.outAngles,
+            animCurve.inWeights,
+            animCurve.outWeights,
+            animCurve.inTangentTypes,
+            animCurve.outTangentTypes
+        ))
+        for i, (inAngle, outAngle, inWeight, outWeight, inType, outType) in iterator:
+            # unlock tangents so in and out tangent can be set separately
+            fn.setTangentsLocked(i, False, change)
+            fn.setWeightsLocked(i, False, change)
+
+            # set tangent angles and weights
+            inTangentAngle = OpenMaya.MAngle(inAngle, OpenMaya.MAngle.kDegrees)
+            outTangentAngle = OpenMaya.MAngle(outAngle, OpenMaya.MAngle.kDegrees)
+            fn.setTangent(i, inTangentAngle, inWeight, True, change)
+            fn.setTangent(i, outTangentAngle, outWeight, False, change)
+
+            # set tangent types
+            fn.setInTangentType(i, API_TANGENT_TYPES.get(inType, fixed), change)
+            fn.setOutTangentType(i, API_TANGENT_TYPES.get(outType, fixed), change)
+
+            # lock tangents if they are not split
+            fn.setTangentsLocked(i, abs(inAngle - outAngle) <= THRESHOLD, change)
+
     # ------------------------------------------------------------------------
 
     def getIndices(self):
@@ -48,144 +298,120 @@ class KeyframeReduction(object):
             index=(indices[0], indices[-1])
         ) or []
 
+    def isStepped(self):
+        """
+        :return: Stepped state, every keyframe but the last has a stepped out tangent
+        :rtype: bool
+        """
+        return isStepped(cmds.keyTangent(self.path, query=True, outTangentType=True) or [])
+
     def getValues(self, frames):
         """
+        Sample the animation curve using the sampler. If the api sampler is
+        unable to evaluate the animation curve the cmds sampler will be used
+        instead.
+
         :param list frames: Frames to sample
         :return: List of values
-        :rtype: list
+        :rtype: list/array.array
         """
-        return [
-            cmds.keyframe(self.path, query=True, eval=True, time=(frame,))[0]
-            for frame in frames
-        ]
+        if self.sampler == SAMPLER_PYTHON:
+            return self.getAnimCurve().evaluateFrames(frames)
+        elif self.sampler == SAMPLER_API:
+            values = self.getValuesApi(frames)
+            if values is not None:
+                return values
 
-    # ------------------------------------------------------------------------
+        return self.getValuesCmds(frames)
 
-    def _findTangentSplitAuto(self, angles):
+    def getValuesApi(self, frames):
         """
-        The automatic tangent split will take the average of all values and
-        the average of just the minimum and maximum value and remaps that on
-        a logarithmic scale, this will give a predicted split angle value.
-        All angles will be processed to see if they fall in or outside that
-        threshold.
+        Evaluate the animation curve node directly through the api for all
+        frames in a single call. The values are stored in a contiguous
+        buffer. None is returned if the animation curve cannot be evaluated
+        using the api, this is the case for animation curves that are not
+        driven by time.
 
-        :param list angles:
-        :return: Split indices
-        :rtype: list
+        :param list frames: Frames to sample
+        :return: Values
+        :rtype: array.array/None
         """
-        # get angles from points
-        splits = []
-
-        # get average variables
-        minAngle = min(angles) or 0.00001
-        maxAngle = max(angles)
-        average = (minAngle + maxAngle) * 0.5
-        mean = sum(angles) / len(angles) * 0.5
-
-        # get value at which to split
-        threshold = (math.log(average) - math.log(mean)) / (math.log(maxAngle) - math.log(minAngle)) * average
-
-        # if curve is relatively smooth don't split
-        if mean * 10 > average:
-            return []
+        try:
+            fn = self.getAnimCurveFn()
+        except RuntimeError:
+            return
+
+        # get unit conversion, the conversions from internal to ui units are
+        # linear which means they can be applied as a single scale.
+        animCurveType = fn.animCurveType()
+        convert = API_INTERNAL_TO_UI.get(animCurveType)
+        if convert is None or animCurveType in API_UNITLESS_INPUT:
+            return
+
+        scale = convert(1.0)
+
+        # get times
+        unit = OpenMaya.MTime.uiUnit()
+        times = OpenMaya.MTimeArray()
+        for frame in frames:
+            times.append(OpenMaya.MTime(frame, unit))
+
+        # evaluate frames, versions of Maya without the array overload of
+        # evaluate raise a type error in which case every frame is evaluated
+        # separately.
+        values = OpenMaya.MDoubleArray()
+        try:
+            fn.evaluate(times, values)
+        except (TypeError, NotImplementedError):
+            return array("d", [fn.evaluate(times[i]) * scale for i in range(times.length())])
+
+        return array("d", [values[i] * scale for i in range(values.length())])
+
+    def getValuesCmds(self, frames):
+        """
+        Evaluate the animation curve using the keyframe command for each of
+        the frames.
 
-        # split based on angles
-        for i, angle in enumerate(angles):
-            if angle > threshold:
-                splits.append(i + 1)
+        :param list frames: Frames to sample
+        :return: List of values
+        :rtype: list
+        """
+        return [
+            cmds.keyframe(self.path, query=True, eval=True, time=(frame,))[0]
+            for frame in frames
+        ]
 
-        return splits
+    # ------------------------------------------------------------------------
 
-    def _findTangentSplitExisting(self, frames, start, end, step):
+    def getTangentSplitExisting(self, frames, start, end, step, sampleFrames=None):
         """
-        Loop existing frames and see if any keyframes contain tangents that
-        are not unified. If this is the case the index of the closest sampled
-        point will be returned.
+        Query the tangents of the existing frames and see if any keyframes
+        contain tangents that are not unified. If this is the case the index
+        of the closest sampled point will be returned.
 
         :param list frames:
         :param int start:
         :param int end:
         :param int/float step:
+        :param list/None sampleFrames: Sampled frames when not sampled at every step
         :return: Split indices
         :rtype: list
         """
-        splits = []
-        inTangentType = "step"
-        outTangentType = "stepnext"
-
         inAngles = cmds.keyTangent(self.path, query=True, time=(start, end), inAngle=True)
         outAngles = cmds.keyTangent(self.path, query=True, time=(start, end), outAngle=True)
         inTangentTypes = cmds.keyTangent(self.path, query=True, time=(start, end), inTangentType=True)
         outTangentTypes = cmds.keyTangent(self.path, query=True, time=(start, end), outTangentType=True)
 
-        iterator = zip(frames, inAngles, outAngles, inTangentTypes, outTangentTypes)
-        for frame, inAngle, outAngle, inType, outType in iterator:
-            # get closest index
-            index = int((frame - start) / step)
-
-            # validate split
-            if abs(inAngle - outAngle) > THRESHOLD:
-                splits.append(index)
-            elif inType == inTangentType:
-                splits.append(index)
-            elif outType == outTangentType:
-                splits.append(index)
-
-        return splits
-
-    def _findTangentSplitThreshold(self, angles, threshold):
-        """
-        The threshold tangent split will process all angles and check if that
-        angle falls in or outside of user provided threshold.
-
-        :param list angles:
-        :param int/float threshold:
-        :return: Split indices
-        :rtype: list
-        """
-        splits = []
-
-        # split based on angles
-        for i, angle in enumerate(angles):
-            if angle > threshold:
-                splits.append(i + 1)
-
-        return splits
-
-    # ------------------------------------------------------------------------
-
-    def _splitPoints(self, points, split):
-        """
-        Split provided points list based on the split indices provided. The
-        lists will have a duplicate end and start points relating to each
-        other.
-
-        :param list points:
-        :param list split:
-        :return: Split points
-        :rtype: list
-        """
-        # validate split
-        if not split:
-            return [points]
-
-        # complete split with adding start and end frames
-        if split[0] != 0:
-            split.insert(0, 0)
-
-        if split[-1] != len(points):
-            split.append(len(points))
-
-        # make sure split is sorted and doesn't contain any duplicates
-        split = list(set(split))
-        split.sort()
-
-        # split range for looping
-        splitA = split[:-1]
-        splitB = split[1:]
-
-        # get lists
-        return [points[a:b + 1] for a, b in zip(splitA, splitB)]
+        return findTangentSplitExisting(
+            frames,
+            inAngles,
+            outAngles,
+            inTangentTypes,
+            outTangentTypes,
+            start,
+            step,
+            sampleFrames
+        )
 
     # ------------------------------------------------------------------------
 
@@ -213,17 +439,14 @@ class KeyframeReduction(object):
         :param list keyframes:
         :param bool weightedTangents:
         """
-        # variables
-        inAngle = Vector2D(-1, 0)
-        outAngle = Vector2D(1, 0)
-
         # loop keyframes
         for keyframe in keyframes:
             # create keyframe point
-            cmds.setKeyframe(self.path, time=keyframe.point.x, value=keyframe.point.y)
+            frame, value = keyframe.point
+            cmds.setKeyframe(self.path, time=frame, value=value)
 
             # set keyframe tangent variable
-            arguments = {"edit": True, "absolute": True, "time": (keyframe.point.x,)}
+            arguments = {"edit": True, "absolute": True, "time": (frame,)}
 
             # set weighted tangents
             cmds.keyTangent(self.path, weightedTangents=weightedTangents, **arguments)
@@ -232,75 +455,102 @@ class KeyframeReduction(object):
             if not keyframe.inHandle or not keyframe.outHandle:
                 cmds.keyTangent(self.path, lock=False, **arguments)
 
-                # add in tangent to arguments
+            # add in tangent to arguments, the in handle points backwards
+            # in time so its angle is relative to the negative x axis.
             if keyframe.inHandle:
-                arguments["inAngle"] = math.degrees(inAngle.signedAngle(keyframe.inHandle))
-                arguments["inWeight"] = keyframe.inHandle.length()
+                x, y = keyframe.inHandle
+                arguments["inAngle"] = math.degrees(math.atan2(-y, -x))
+                arguments["inWeight"] = math.sqrt(x * x + y * y)
 
             # add out tangent to arguments
             if keyframe.outHandle:
-                arguments["outAngle"] = math.degrees(outAngle.signedAngle(keyframe.outHandle))
-                arguments["outWeight"] = keyframe.outHandle.length()
+                x, y = keyframe.outHandle
+                arguments["outAngle"] = math.degrees(math.atan2(y, x))
+                arguments["outWeight"] = math.sqrt(x * x + y * y)
 
             # set keyframe tangent
             cmds.keyTangent(self.path, **arguments)
 
+            # set stepped out tangent, the tangent type is set after the
+            # angles as setting the angles changes the type to fixed.
+            if keyframe.outTangentType != "fixed":
+                cmds.keyTangent(
+                    self.path,
+                    edit=True,
+                    absolute=True,
+                    time=(frame,),
+                    outTangentType=keyframe.outTangentType
+                )
+
     # ------------------------------------------------------------------------
 
-    def sample(self, start, end, step):
+    def sample(self, start, end, step, tolerance=None):
         """
         Sample the current animation curve based on the start and end frame,
-        and the provided step size. Vector2Ds and angles will be returned.
+        and the provided step size. Points and angles will be returned. When
+        a tolerance is provided the animation curve is sampled adaptively,
+        frames that are within the tolerance of the line between the
+        sampled frames around them are skipped.
 
         :param int start:
         :param int end:
         :param int/float step:
+        :param float/None tolerance: Adaptive sampling tolerance
         :return: Sample points and angles
         :rtype: list
         """
-        # get frames and values
+        # get frames, values and angles, the angles of adaptively sampled
+        # frames are calculated using the points a step away.
         frames = floatRange(start, end, step)
-        values = self.getValues(frames)
-
-        # get points and angles
-        angles = []
-        points = [Vector2D(*coord) for coord in zip(frames, values)]
-
-        for i in range(1, len(points) - 2):
-            v1 = points[i - 1] - points[i]
-            v2 = points[i + 1] - points[i]
-            angles.append(math.degrees(math.pi - v1.angle(v2)))
+        if tolerance is None:
+            values = self.getValues(frames)
+            angles = getAngles(frames, values)
+        else:
+            # the python sampler reads the animation curve once, rather than
+            # for every level of the adaptive sampling.
+            if self.sampler == SAMPLER_PYTHON:
+                animCurve = self.getAnimCurve()
+                times, keyValues = animCurve.times, animCurve.values
+                getValues = animCurve.evaluateFrames
+            else:
+                times = cmds.keyframe(self.path, query=True, timeChange=True) or []
+                keyValues = cmds.keyframe(self.path, query=True, valueChange=True) or []
+                getValues = self.getValues
+
+            frames, values = sampleAdaptive(frames, times, keyValues, getValues, tolerance)
+            angles = getStepAngles(frames, values, getValues, step)
+
+        points = list(zip(frames, values))
 
         return [points, angles]
 
     # ------------------------------------------------------------------------
 
-    def reduce(
+    def getSegments(
             self,
-            error=1,
             step=1,
-            weightedTangents=True,
             tangentSplitAuto=False,
             tangentSplitExisting=False,
             tangentSplitAngleThreshold=False,
             tangentSplitAngleThresholdValue=15.0,
+            tolerance=None,
     ):
         """
-        Reduce the number of keyframes on the animation curve. Useful when
-        you are working with baked curves.
+        Sample the animation curve and split the sampled points into
+        segments based on the tangent split settings. The segments can be
+        fitted without Maya. When a tolerance is provided the animation
+        curve is sampled adaptively.
 
-        :param int/float error:
         :param int/float step:
-        :param bool weightedTangents:
         :param bool tangentSplitAuto:
         :param bool tangentSplitExisting:
         :param bool tangentSplitAngleThreshold:
         :param int/float tangentSplitAngleThresholdValue:
-        :return: Reduction rate
-        :rtype: float
+        :param float/None tolerance: Adaptive sampling tolerance
+        :return: Segments of sampled points
+        :rtype: list
         """
         # get existing frames
-        t = time.time()
         original = self.getFrames()
 
         # get start and end frames
@@ -308,49 +558,189 @@ class KeyframeReduction(object):
         end = int(math.ceil(original[-1])) + 1
 
         # get sample frames and values
-        points, angles = self.sample(start, end, step)
+        points, angles = self.sample(start, end, step, tolerance)
 
         # get split indices
         split = []
 
         if tangentSplitAuto:
-            split.extend(self._findTangentSplitAuto(angles))
+            split.extend(findTangentSplitAuto(angles))
         if tangentSplitExisting:
-            split.extend(self._findTangentSplitExisting(original, start, end, step))
+            sampleFrames = [point[0] for point in points] if tolerance is not None else None
+            split.extend(self.getTangentSplitExisting(original, start, end, step, sampleFrames))
         if tangentSplitAngleThreshold:
-            split.extend(self._findTangentSplitThreshold(angles, tangentSplitAngleThresholdValue))
+            split.extend(findTangentSplitThreshold(angles, tangentSplitAngleThresholdValue))
 
         # get split points
-        points = self._splitPoints(points, split)
+        return splitPoints(points, split)
 
-        # fit points and get keyframes
-        keyframes = [
-            keyframe
-            for p in points
-            for keyframe in FitBezier(p, error, weightedTangents).fit()
-        ]
+    def fit(
+            self,
+            error=1,
+            step=1,
+            weightedTangents=True,
+            tangentSplitAuto=False,
+            tangentSplitExisting=False,
+            tangentSplitAngleThreshold=False,
+            tangentSplitAngleThresholdValue=15.0,
+            splitSimplify=False,
+            fitter=FITTER_GREEDY,
+            adaptiveSampling=False,
+            cache=None,
+    ):
+        """
+        Sample the animation curve and fit keyframes to the sampled points
+        without changing the animation curve. When a cache is provided the
+        sampled points are only fitted if they are not cached. The merge
+        fitter merges the segments of the animation curve without sampling,
+        the sample and split settings are not used. Stepped animation curves
+        are always merged, as the samples cannot tell a step apart from a
+        fast move.
+
+        :param int/float error:
+        :param int/float step:
+        :param bool weightedTangents:
+        :param bool tangentSplitAuto:
+        :param bool tangentSplitExisting:
+        :param bool tangentSplitAngleThreshold:
+        :param int/float tangentSplitAngleThresholdValue:
+        :param bool splitSimplify:
+        :param str fitter: "greedy", "layered" or "merge"
+        :param bool adaptiveSampling:
+        :param FitCache/None cache:
+        :return: Keyframes
+        :rtype: list
+        """
+        if fitter == FITTER_MERGE or self.isStepped():
+            return mergeAnimCurve(self.getAnimCurve(), error, weightedTangents)
+
+        segments = self.getSegments(
+            step,
+            tangentSplitAuto,
+            tangentSplitExisting,
+            tangentSplitAngleThreshold,
+            tangentSplitAngleThresholdValue,
+            getSampleTolerance(error, adaptiveSampling),
+        )
+
+        if cache is not None:
+            return cache.fitSegments(segments, error, weightedTangents, splitSimplify, fitter)
+
+        return fitSegments(segments, error, weightedTangents, splitSimplify, fitter)
+
+    def apply(self, keyframes, weightedTangents=True, force=False, change=None):
+        """
+        Replace the keyframes of the animation curve with the provided
+        keyframes using the writer. The keyframes are only applied if they
+        reduce the amount of keyframes on the animation curve, unless the
+        keyframes are forced in which case the reduction rate can be
+        negative. An animation curve change can be provided to be able to
+        undo the changes of the api writer.
+
+        :param list keyframes:
+        :param bool weightedTangents:
+        :param bool force:
+        :param OpenMayaAnim.MAnimCurveChange/None change:
+        :return: Reduction rate
+        :rtype: float
+        """
+        # get existing frames
+        original = self.getFrames()
+        start = int(math.floor(original[0]))
 
         # only set values if the curve can be optimized.
-        if len(keyframes) >= len(original):
-            print "< KeyframeReduction.reduce() " \
-                "| path: {0} " \
-                "| process-time: {1:,.2f} seconds " \
-                "| unable-to-reduce >".format(self.path, time.time() - t)
+        if len(keyframes) >= len(original) and not force:
             return 0
 
-        # remove all keys but the first one and add keyframes
-        self._removeKeys(original, start)
-        self._addKeys(keyframes, weightedTangents)
+        # replace keyframes, either in one bulk operation using the api or
+        # by removing all keys but the first one and adding the keyframes.
+        # The first key is removed afterwards when none of the keyframes
+        # replaced it, which happens when forced keyframes start earlier.
+        if self.writer == WRITER_API:
+            self.setAnimCurve(AnimCurve.fromKeyframes(keyframes, weightedTangents), change)
+        else:
+            self._removeKeys(original, start)
+            self._addKeys(keyframes, weightedTangents)
+
+            if keyframes and all(abs(keyframe.point[0] - start) > THRESHOLD for keyframe in keyframes):
+                cmds.cutKey(self.path, time=(start, start), option="keys")
+
+        return 100 - ((len(keyframes) / float(len(original))) * 100)
+
+    def reduce(
+            self,
+            error=1,
+            step=1,
+            weightedTangents=True,
+            tangentSplitAuto=False,
+            tangentSplitExisting=False,
+            tangentSplitAngleThreshold=False,
+            tangentSplitAngleThresholdValue=15.0,
+            splitSimplify=False,
+            fitter=FITTER_GREEDY,
+            adaptiveSampling=False,
+    ):
+        """
+        Reduce the number of keyframes on the animation curve. Useful when
+        you are working with baked curves. The greedy fitter splits the
+        curve at the point of max error, the layered fitter searches for
+        keyframes that reach as far as possible, which often uses less
+        keyframes within the error at the cost of speed. The
+        merge fitter merges the existing segments of the curve, which is a
+        lot faster on long curves with few keyframes.
+        Adaptive sampling skips the frames that are close to the line
+        between their neighbours, which speeds up the sampling and fitting
+        of curves with long holds or smooth motion.
+
+        :param int/float error:
+        :param int/float step:
+        :param bool weightedTangents:
+        :param bool tangentSplitAuto:
+        :param bool tangentSplitExisting:
+        :param bool tangentSplitAngleThreshold:
+        :param int/float tangentSplitAngleThresholdValue:
+        :param bool splitSimplify:
+        :param str fitter: "greedy", "layered" or "merge"
+        :param bool adaptiveSampling:
+        :return: Reduction rate
+        :rtype: float
+        """
+        # fit and apply keyframes
+        t = time.time()
+        keyframes = self.fit(
+            error,
+            step,
+            weightedTangents,
+            tangentSplitAuto,
+            tangentSplitExisting,
+            tangentSplitAngleThreshold,
+            tangentSplitAngleThresholdValue,
+            splitSimplify,
+            fitter,
+            adaptiveSampling,
+        )
+        rate = self.apply(keyframes, weightedTangents)
+
+        # only set values if the curve can be optimized.
+        if not rate:
+            print(
+                "< KeyframeReduction.reduce() "
+                "| path: {0} "
+                "| process-time: {1:,.2f} seconds "
+                "| unable-to-reduce >".format(self.path, time.time() - t)
+            )
+            return 0
 
         # print reduction rate
-        rate = 100 - ((len(keyframes) / float(len(original))) * 100)
-        print "< KeyframeReduction.reduce() " \
-            "| path: {0} " \
-            "| process-time: {1:,.2f} seconds " \
+        print(
+            "< KeyframeReduction.reduce() "
+            "| path: {0} "
+            "| process-time: {1:,.2f} seconds "
             "| reduction-rate: {2:,.2f}%  >".format(
                 self.path,
                 time.time() - t,
                 rate
             )
+        )
 
         return rate
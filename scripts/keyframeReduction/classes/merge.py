@@ -0,0 +1,492 @@
+import math
+
+from .keyframe import Keyframe
+from .animCurve import STEP, STEP_NEXT, bezier, bezierDerivative, solveBezier
+from .fit import FitBezier, normal
+from ..utils import EPSILON, THRESHOLD
+
+
+# ----------------------------------------------------------------------------
+
+
+# the maximum amount of points evaluated inside each segment of the
+# animation curve, the merged curves are fitted to and validated against
+# these points. Together with the keyframe segments get a point per frame
+# up to the maximum, the segments of baked animation curves only get their
+# keyframe which keeps the amount of points small.
+MERGE_SAMPLES = 5
+
+
+# ----------------------------------------------------------------------------
+
+
+class MergeBezier(object):
+    """
+    Reduce an animation curve by merging its existing bezier segments rather
+    than fitting keyframes to sampled frames. The work depends on the amount
+    of keyframes rather than the amount of frames, which makes it a lot
+    faster on long curves with few keyframes.
+
+    Consecutive segments are replaced by a single bezier that keeps the
+    tangent directions of the original keyframes at its ends, only the
+    tangent weights are solved. The merged bezier is validated at a few
+    points inside each of the original segments. When a segment cannot be
+    merged it is kept as it is, which means the original curve is matched
+    exactly where no reduction is possible. Only when weighted tangents are
+    converted into tangents that are not weighted a segment can be split
+    into multiple curves, as it cannot always be matched by a single curve.
+
+    The first and last keyframe, keyframes with split tangents and the
+    keyframes around stepped segments are always kept. Keyframes between
+    two stepped segments are only removed when their value is within the
+    error of the value that is held before them, which reduces the holds
+    of stepped animation curves without sampling.
+    ::
+        merge = MergeBezier(animCurve, error=0.1)
+        keyframes = merge.fit()
+    """
+    def __init__(self, animCurve, error=2.5, weightedTangents=True):
+        """
+        :param AnimCurve animCurve:
+        :param int/float error:
+        :param bool weightedTangents:
+        """
+        self._animCurve = animCurve
+        self._error = error
+        self._weightedTangents = weightedTangents
+        self._keyframes = []
+
+        # get points of all segments, the fitter is shared by all merges
+        points = []
+        self._indices = []
+        for i, controls in enumerate(animCurve.controls):
+            self._indices.append(len(points))
+            points.extend(self.getSegmentPoints(i, controls))
+
+        self._indices.append(len(points))
+
+        if animCurve.times:
+            points.append((animCurve.times[-1], animCurve.values[-1]))
+
+        self._fitter = FitBezier(points, error, weightedTangents)
+
+    def __repr__(self):
+        return "< MergeBezier object | keys: {} | error: {} | weighted-tangents: {} >".format(
+            len(self.animCurve.times),
+            self.error,
+            self.weightedTangents
+        )
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def animCurve(self):
+        """
+        :return: Animation curve
+        :rtype: AnimCurve
+        """
+        return self._animCurve
+
+    @property
+    def error(self):
+        """
+        :return: Maximum error
+        :rtype: int/float
+        """
+        return self._error
+
+    @property
+    def weightedTangents(self):
+        """
+        :return: Weighted tangents
+        :rtype: bool
+        """
+        return self._weightedTangents
+
+    @property
+    def keyframes(self):
+        """
+        :return: Keyframes
+        :rtype: list
+        """
+        return self._keyframes
+
+    # ------------------------------------------------------------------------
+
+    def getSegmentPoints(self, index, controls):
+        """
+        Get the keyframe point at the start of the segment and the points
+        evaluated inside of the segment.
+
+        :param int index:
+        :param tuple controls:
+        :return: Points
+        :rtype: list
+        """
+        x0, y0, x1, y1, x2, y2, x3, y3 = controls
+        outTangentType = self.animCurve.outTangentTypes[index]
+        points = [(x0, y0)]
+
+        samples = min(max(int(math.ceil(x3 - x0)) - 1, 0), MERGE_SAMPLES)
+        for i in range(1, samples + 1):
+            u = i / float(samples + 1)
+            x = bezier(x0, x1, x2, x3, u)
+
+            if outTangentType == STEP:
+                points.append((x, y0))
+            elif outTangentType == STEP_NEXT:
+                points.append((x, y3))
+            else:
+                points.append((x, bezier(y0, y1, y2, y3, u)))
+
+        return points
+
+    def getPointIndex(self, index):
+        """
+        :param int index: Keyframe index
+        :return: Point index
+        :rtype: int
+        """
+        return self._indices[index]
+
+    def getFixed(self):
+        """
+        Get the indices of the keyframes that cannot be merged, these are the
+        first and last keyframe, keyframes with split tangents and the
+        keyframes around stepped segments. Keyframes between two stepped
+        segments can be merged into the hold before them.
+
+        :return: Keyframe indices
+        :rtype: list
+        """
+        curve = self.animCurve
+        steps = [STEP, STEP_NEXT]
+        fixed = [0]
+
+        for i in range(1, len(curve.times) - 1):
+            if curve.outTangentTypes[i] == STEP and curve.outTangentTypes[i - 1] == STEP:
+                continue
+            elif abs(curve.inAngles[i] - curve.outAngles[i]) > THRESHOLD:
+                fixed.append(i)
+            elif curve.outTangentTypes[i] in steps or curve.outTangentTypes[i - 1] in steps:
+                fixed.append(i)
+
+        fixed.append(len(curve.times) - 1)
+        return fixed
+
+    # ------------------------------------------------------------------------
+
+    def fit(self):
+        """
+        Merge the segments between the keyframes that cannot be merged, each
+        merge starts at the last kept keyframe and reaches as far as
+        possible.
+
+        :return: Keyframes
+        :rtype: list
+        """
+        self._keyframes = []
+        curve = self.animCurve
+
+        # validate keyframes
+        if not curve.times:
+            return self.keyframes
+
+        self.keyframes.append(Keyframe((curve.times[0], curve.values[0])))
+
+        # the reach of the previous merge is used as the first guess of the
+        # next merge, as neighbouring merges tend to reach equally far.
+        guess = 2
+        fixed = self.getFixed()
+
+        for first, last in zip(fixed[:-1], fixed[1:]):
+            i = first
+            while i < last:
+                # only stepped tangents are kept, all other tangents are
+                # stored as fixed tangents.
+                outTangentType = curve.outTangentTypes[i]
+                if outTangentType not in [STEP, STEP_NEXT]:
+                    outTangentType = "fixed"
+
+                j, controls = self.findReach(i, last, guess)
+                if controls is None:
+                    self.addSegmentCurves(i, outTangentType)
+                else:
+                    self.addCurve(controls, outTangentType)
+
+                guess = max(j - i, 2)
+                i = j
+
+        return self.keyframes
+
+    def findReach(self, first, last, guess=2):
+        """
+        Find the furthest keyframe the segments starting at the first
+        keyframe can be merged up to. Starting at the guess the reach is
+        doubled until the merge fails after which a binary search is used.
+        The control points are None when the segment at the first keyframe
+        cannot be matched by a single curve, which happens when weighted
+        tangents are converted into tangents that are not weighted.
+
+        :param int first:
+        :param int last:
+        :param int guess: Amount of segments to try first
+        :return: Keyframe index and control points
+        :rtype: tuple
+        """
+        lower, upper = first + 1, last + 1
+        best = self.getSegmentCurve(first)
+        if not self.weightedTangents and self.animCurve.weightedTangents:
+            if not self.isMatch(self.getPointIndex(first), self.getPointIndex(lower), best):
+                best = None
+
+        # validate stepped segment
+        if self.animCurve.outTangentTypes[first] == STEP:
+            return self.findStepReach(first, last)
+        elif self.animCurve.outTangentTypes[first] == STEP_NEXT:
+            return lower, best
+
+        # double reach
+        size = guess
+        while lower < last:
+            index = min(first + size, last)
+            controls = self.getMergedCurve(first, index)
+            if controls is None:
+                upper = index
+                break
+
+            lower, best = index, controls
+            size *= 2
+
+        # binary search
+        while upper - lower > 1:
+            index = (lower + upper) // 2
+            controls = self.getMergedCurve(first, index)
+            if controls is None:
+                upper = index
+            else:
+                lower, best = index, controls
+
+        return lower, best
+
+    def findStepReach(self, first, last):
+        """
+        Find the furthest keyframe the stepped segments starting at the first
+        keyframe can be merged up to. The value of the first keyframe is
+        held, stepped keyframes of which the value is within the error of
+        the held value are merged.
+
+        :param int first:
+        :param int last:
+        :return: Keyframe index and control points
+        :rtype: tuple
+        """
+        curve = self.animCurve
+        index = first + 1
+
+        while (
+                index < last
+                and curve.outTangentTypes[index] == STEP
+                and abs(curve.values[index] - curve.values[first]) < self.error
+        ):
+            index += 1
+
+        controls = self.getSegmentCurve(first)[:2] + self.getSegmentCurve(index - 1)[2:]
+        return index, controls
+
+    # ------------------------------------------------------------------------
+
+    def getSegmentCurve(self, index):
+        """
+        Get the control points of a single segment. When the tangents are
+        not weighted the control points are placed at a third of the
+        segment, which matches the original curve if its tangents are not
+        weighted either.
+
+        :param int index:
+        :return: Control points
+        :rtype: list
+        """
+        x0, y0, x1, y1, x2, y2, x3, y3 = self.animCurve.controls[index]
+
+        if not self.weightedTangents and self.animCurve.weightedTangents:
+            return self.getThirdsCurve(x0, y0, x3, y3, (x1 - x0, y1 - y0), (x2 - x3, y2 - y3))
+
+        return [(x0, y0), (x1, y1), (x2, y2), (x3, y3)]
+
+    def getThirdsCurve(self, x0, y0, x3, y3, tan1, tan2):
+        """
+        Get the control points placed at a third of the segment along the
+        slopes of the tangents, which is how tangents that are not weighted
+        are evaluated.
+
+        :param float x0:
+        :param float y0:
+        :param float x3:
+        :param float y3:
+        :param tuple tan1:
+        :param tuple tan2:
+        :return: Control points
+        :rtype: list
+        """
+        third = (x3 - x0) / 3.0
+        slope1 = tan1[1] / tan1[0] if abs(tan1[0]) > EPSILON else 0.0
+        slope2 = tan2[1] / tan2[0] if abs(tan2[0]) > EPSILON else 0.0
+
+        return [
+            (x0, y0),
+            (x0 + third, y0 + slope1 * third),
+            (x3 - third, y3 - slope2 * third),
+            (x3, y3)
+        ]
+
+    def getMergedCurve(self, first, last):
+        """
+        Get a single bezier that replaces the segments between the first and
+        last keyframe. The tangent directions of the first and last
+        keyframe are kept. None is returned when the bezier doesn't match
+        the points of the segments within the error.
+
+        :param int first:
+        :param int last:
+        :return: Control points
+        :rtype: list/None
+        """
+        x0, y0, x1, y1 = self.animCurve.controls[first][:4]
+        x2, y2, x3, y3 = self.animCurve.controls[last - 1][4:]
+        tan1 = normal(x1 - x0, y1 - y0)
+        tan2 = normal(x2 - x3, y2 - y3)
+
+        # validate tangents, vertical tangents cannot be merged
+        if tan1[0] < EPSILON or tan2[0] > -EPSILON:
+            return
+
+        # get control points
+        pointFirst, pointLast = self.getPointIndex(first), self.getPointIndex(last)
+        if self.weightedTangents:
+            controls, maxError, _ = self._fitter.getCurve(pointFirst, pointLast, tan1, tan2)
+            if maxError >= self.error:
+                return
+        else:
+            controls = self.getThirdsCurve(x0, y0, x3, y3, tan1, tan2)
+
+        if not self.isMatch(pointFirst, pointLast, controls):
+            return
+
+        return controls
+
+    def isMatch(self, pointFirst, pointLast, controls):
+        """
+        Validate the control points against the points between the first
+        and last point index. The time of the curve has to increase and the
+        value of the curve at the time of each point has to be within the
+        error.
+
+        :param int pointFirst:
+        :param int pointLast:
+        :param list controls:
+        :return: Match state
+        :rtype: bool
+        """
+        # validate control points, the time of the curve has to increase
+        cx0, cx1, cx2, cx3 = [point[0] for point in controls]
+        if not cx0 <= cx1 <= cx3 or not cx0 <= cx2 <= cx3:
+            return False
+
+        # validate the value at the time of each point
+        cy0, cy1, cy2, cy3 = [point[1] for point in controls]
+        times = self._fitter.times
+        values = self._fitter.values
+
+        for i in range(pointFirst + 1, pointLast):
+            if self.weightedTangents:
+                u = solveBezier(cx0, cx1, cx2, cx3, times[i])
+            else:
+                u = (times[i] - cx0) / (cx3 - cx0)
+
+            if abs(bezier(cy0, cy1, cy2, cy3, u) - values[i]) >= self.error:
+                return False
+
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def addSegmentCurves(self, index, outTangentType="fixed"):
+        """
+        Add the segment at the keyframe index as multiple curves. The
+        segment is split at its points until each part matches, the
+        tangents at the points follow the slope of the segment.
+
+        :param int index: Keyframe index
+        :param str outTangentType: Out tangent type of the previous keyframe
+        """
+        x0, y0, x1, y1, x2, y2, x3, y3 = self.animCurve.controls[index]
+        first, last = self.getPointIndex(index), self.getPointIndex(index + 1)
+        times = self._fitter.times
+        values = self._fitter.values
+
+        # get tangents of the points, the parameter of each point matches
+        # the parameter the point was evaluated at.
+        tangents = []
+        for i in range(first, last + 1):
+            u = (i - first) / float(last - first)
+            tangents.append((
+                bezierDerivative(x0, x1, x2, x3, u),
+                bezierDerivative(y0, y1, y2, y3, u)
+            ))
+
+        # split parts, the right half is added first so the left half is
+        # processed first.
+        parts = [(first, last)]
+        while parts:
+            i, j = parts.pop()
+            controls = self.getThirdsCurve(
+                times[i],
+                values[i],
+                times[j],
+                values[j],
+                tangents[i - first],
+                tangents[j - first]
+            )
+
+            if j - i > 1 and not self.isMatch(i, j, controls):
+                middle = (i + j) // 2
+                parts.append((middle, j))
+                parts.append((i, middle))
+                continue
+
+            self.addCurve(controls, outTangentType)
+            outTangentType = "fixed"
+
+    def addCurve(self, controls, outTangentType="fixed"):
+        """
+        :param list controls:
+        :param str outTangentType: Out tangent type of the previous keyframe
+        """
+        pt1, tan1, tan2, pt2 = controls
+
+        # update previous keyframe with out handle
+        prev = self.keyframes[-1]
+        prev.outHandle = (tan1[0] - pt1[0], tan1[1] - pt1[1])
+        prev.outTangentType = outTangentType
+
+        # create new keyframe
+        keyframe = Keyframe(pt2, (tan2[0] - pt2[0], tan2[1] - pt2[1]))
+        self.keyframes.append(keyframe)
+
+
+# ----------------------------------------------------------------------------
+
+
+def mergeAnimCurve(animCurve, error=2.5, weightedTangents=True):
+    """
+    Reduce the animation curve by merging its bezier segments, the
+    keyframes that cannot be merged are kept as they are.
+
+    :param AnimCurve animCurve:
+    :param int/float error:
+    :param bool weightedTangents:
+    :return: Keyframes
+    :rtype: list
+    """
+    return MergeBezier(animCurve, error, weightedTangents).fit()
@@ -0,0 +1,166 @@
+import bisect
+
+from ..utils import EPSILON
+
+
+# ----------------------------------------------------------------------------
+
+
+# the adaptive sampling tolerance is a multiple of the fit error, the points
+# that are skipped are within this tolerance of the line between the
+# sampled points around them.
+ADAPTIVE_SAMPLING_SCALE = 0.25
+
+# intervals up to this size are probed at every frame, larger intervals
+# are probed at a quarter, half and three quarters of the interval.
+ADAPTIVE_SAMPLING_MIN_INTERVAL = 4
+
+
+# ----------------------------------------------------------------------------
+
+
+def getSampleTolerance(error, adaptiveSampling):
+    """
+    :param int/float error:
+    :param bool adaptiveSampling:
+    :return: Adaptive sampling tolerance, None when every frame is sampled
+    :rtype: float/None
+    """
+    if not adaptiveSampling:
+        return
+
+    return error * ADAPTIVE_SAMPLING_SCALE
+
+
+def getKeyframeIndices(frames, times):
+    """
+    Get the indices of the frames around the keyframes that are further
+    apart than the minimum interval, when a keyframe time matches a frame
+    only the index of that frame is used. The first and last index are
+    always included. Keyframes that are close together, like the keyframes
+    of baked animation curves, are not included.
+
+    :param list frames:
+    :param list times:
+    :return: Indices
+    :rtype: list
+    """
+    last = len(frames) - 1
+    indices = set([0, last])
+
+    # get minimum interval in frames
+    step = frames[1] - frames[0] if last else 1
+    interval = step * ADAPTIVE_SAMPLING_MIN_INTERVAL
+
+    for i, t in enumerate(times):
+        # validate interval
+        isolated = i == 0 or t - times[i - 1] > interval
+        isolated = isolated or i == len(times) - 1 or times[i + 1] - t > interval
+        if not isolated:
+            continue
+
+        index = min(bisect.bisect_left(frames, t), last)
+        indices.add(index)
+
+        if index > 0 and abs(frames[index] - t) > EPSILON:
+            indices.add(index - 1)
+
+    return sorted(indices)
+
+
+def getProbeIndices(first, last):
+    """
+    :param int first:
+    :param int last:
+    :return: Indices to probe between the first and last index
+    :rtype: list
+    """
+    if last - first <= ADAPTIVE_SAMPLING_MIN_INTERVAL:
+        return list(range(first + 1, last))
+
+    size = last - first
+    return [first + size // 4, first + size // 2, last - size // 4]
+
+
+def sampleAdaptive(frames, times, values, evaluate, tolerance):
+    """
+    Sample the frames adaptively, only the frames where the curve deviates
+    from the line between the sampled frames around it are kept.
+
+    The frames around keyframes that are far apart are always sampled,
+    which means long intervals between sampled frames are part of a single
+    curve segment. Each interval is probed at a few frames and the
+    keyframes within the interval are checked as well, as their values are
+    known. If all of them are within the tolerance of the line the interval
+    is done, otherwise it is divided at the probes. Intervals are divided
+    until they are a single frame.
+
+    The evaluate function is called once for every level of division with
+    all of the frames that need to be probed, which keeps the amount of
+    calls into the sampler small.
+
+    :param list frames: Frames to sample
+    :param list times: Keyframe times
+    :param list values: Keyframe values
+    :param callable evaluate: Returns the values of a list of frames
+    :param float tolerance:
+    :return: Sampled frames and values
+    :rtype: tuple
+    """
+    # evaluate frames around keyframes
+    indices = getKeyframeIndices(frames, times)
+    samples = dict(zip(indices, evaluate([frames[i] for i in indices])))
+    kept = set(indices)
+
+    # get intervals between the keyframes
+    intervals = [
+        (first, last)
+        for first, last in zip(indices[:-1], indices[1:])
+        if last - first > 1
+    ]
+
+    while intervals:
+        # evaluate probes of all intervals
+        probes = [getProbeIndices(first, last) for first, last in intervals]
+        missing = sorted(set(i for probe in probes for i in probe) - set(samples))
+        samples.update(zip(missing, evaluate([frames[i] for i in missing])))
+
+        # validate intervals
+        divided = []
+
+        for (first, last), probe in zip(intervals, probes):
+            x1, y1 = frames[first], samples[first]
+            slope = (samples[last] - y1) / (frames[last] - x1)
+
+            # get probes and keyframes within the interval
+            start = bisect.bisect_right(times, x1)
+            end = bisect.bisect_left(times, frames[last])
+
+            points = [(frames[i], samples[i]) for i in probe]
+            points.extend(zip(times[start:end], values[start:end]))
+
+            # the probes are kept to constrain the fit between the sampled
+            # frames around them.
+            kept.update(probe)
+
+            matched = True
+            for x, y in points:
+                if abs(y1 + (x - x1) * slope - y) > tolerance:
+                    matched = False
+                    break
+
+            if matched:
+                continue
+
+            # divide interval at probes
+            bounds = [first] + probe + [last]
+            divided.extend(
+                (a, b)
+                for a, b in zip(bounds[:-1], bounds[1:])
+                if b - a > 1
+            )
+
+        intervals = divided
+
+    kept = sorted(kept)
+    return [frames[i] for i in kept], [samples[i] for i in kept]
@@ -0,0 +1,405 @@
+import math
+import bisect
+
+from .keyframe import Keyframe
+from .animCurve import STEP
+from .fit import FitBezier, normal
+from .split import (
+    getAngles,
+    findTangentSplitAuto,
+    findTangentSplitExisting,
+    findTangentSplitThreshold,
+    splitPoints,
+)
+from ..utils import floatRange, THRESHOLD
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitShared(object):
+    """
+    Fit multiple channels of points using the same key times, the channels
+    have to be sampled at the same times. A region is fitted on every
+    channel and only accepted when all of the channels match the error, if
+    not the region is split at the point of max error of the worst channel
+    for all channels at once. The keyframes of every channel end up at the
+    same times, which means the key times shared by all channels are
+    reduced rather than the key times of each channel.
+
+    Channels that are marked as stepped are split at the start of each
+    step, the keyframes of these channels get stepped out tangents. The
+    samples cannot tell a step apart from a fast move, which is why the
+    channels have to be marked by the caller.
+    ::
+        fit = FitShared([translateX, translateY, translateZ], error=0.1)
+        keyframes = fit.fit()
+    """
+    def __init__(self, channels, error=2.5, weightedTangents=True, stepped=None):
+        """
+        :param list channels: Points of each channel
+        :param int/float error:
+        :param bool weightedTangents:
+        :param list/None stepped: Stepped state of each channel
+        :raise ValueError: When the channels are not sampled at the same times
+        """
+        self._fitters = [FitBezier(points, error, weightedTangents) for points in channels]
+        self._error = error
+        self._weightedTangents = weightedTangents
+
+        # validate times
+        times = self.times
+        for fitter in self.fitters:
+            if fitter.times != times:
+                raise ValueError("The channels are not sampled at the same times.")
+
+        # get steps, the start of each step is shared by all channels
+        self._stepped = []
+        self._breakpoints = set()
+
+        for fitter, channelStepped in zip(self.fitters, stepped or [False] * len(self.fitters)):
+            steps = fitter.getSteps() if channelStepped and len(times) > 2 else []
+            self._stepped.append(bool(steps))
+            self._breakpoints.update(steps)
+
+    def __repr__(self):
+        return "< FitShared object | channels: {} | points: {} | error: {} | weighted-tangents: {} >".format(
+            len(self.fitters),
+            len(self.times),
+            self.error,
+            self.weightedTangents
+        )
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def fitters(self):
+        """
+        :return: Fitter of each channel
+        :rtype: list
+        """
+        return self._fitters
+
+    @property
+    def times(self):
+        """
+        :return: Times shared by the channels
+        :rtype: list
+        """
+        return self.fitters[0].times if self.fitters else []
+
+    @property
+    def error(self):
+        """
+        :return: Maximum error
+        :rtype: int/float
+        """
+        return self._error
+
+    @property
+    def weightedTangents(self):
+        """
+        :return: Weighted tangents
+        :rtype: bool
+        """
+        return self._weightedTangents
+
+    @property
+    def breakpoints(self):
+        """
+        :return: Point indices every channel has a keyframe at
+        :rtype: list
+        """
+        return sorted(self._breakpoints)
+
+    # ------------------------------------------------------------------------
+
+    def fit(self):
+        """
+        Fit bezier curves to the points of all channels, the keyframes of
+        each channel are returned in the order of the channels.
+
+        :return: Keyframes of each channel
+        :rtype: list
+        """
+        x = self.times
+        length = len(x)
+
+        # validate points
+        if length == 0:
+            return [[] for _ in self.fitters]
+
+        # add first point as a keyframe
+        for fitter in self.fitters:
+            fitter.keyframes = [Keyframe((x[0], fitter.values[0]))]
+
+        if length == 1:
+            return [fitter.keyframes for fitter in self.fitters]
+
+        # get regions between the breakpoints, the tangents at the
+        # breakpoints are calculated the same way as when a region is split.
+        indices = [0] + [i for i in self.breakpoints if 0 < i < length - 1] + [length - 1]
+        tangents = [self.getTangents(0, 1)]
+        tangents.extend(self.getCenterTangents(i) for i in indices[1:-1])
+        tangents.append(self.getTangents(length - 1, -1))
+
+        queue = []
+        for i in range(len(indices) - 1):
+            tansStart = tangents[i] if i == 0 else [(-t[0], -t[1]) for t in tangents[i]]
+            queue.append((indices[i], indices[i + 1], tansStart, tangents[i + 1]))
+
+        # add regions in reverse so the first region is processed first
+        queue.reverse()
+        while queue:
+            queue.extend(self.fitSegment(*queue.pop()))
+
+        return [fitter.keyframes for fitter in self.fitters]
+
+    def getTangents(self, index, direction):
+        """
+        Get the tangent of each channel at the first or last point, the
+        tangent points towards the next point in the direction.
+
+        :param int index:
+        :param int direction: 1 at the first and -1 at the last point
+        :return: Tangents
+        :rtype: list
+        """
+        x = self.times
+        tangents = []
+
+        for fitter in self.fitters:
+            y = fitter.values
+            tangents.append(normal(x[index + direction] - x[index], y[index + direction] - y[index]))
+
+        return tangents
+
+    def getCenterTangents(self, index):
+        """
+        :param int index:
+        :return: Tangents of each channel at the point of a split
+        :rtype: list
+        """
+        x = self.times
+        return [
+            normal(x[index - 1] - x[index + 1], fitter.values[index - 1] - fitter.values[index + 1])
+            for fitter in self.fitters
+        ]
+
+    def fitSegment(self, first, last, tans1, tans2):
+        """
+        Fit a cubic bezier between the first and last index on every
+        channel. If all channels match the curves are added to the
+        keyframes of the channels, if not the region is split at the point
+        of max error of the worst channel and both halves are returned.
+
+        :param int first:
+        :param int last:
+        :param list tans1:
+        :param list tans2:
+        :return: Regions to fit, the left half is last
+        :rtype: list
+        """
+        curves = []
+        maxError, maxIndex = 0, first
+
+        # get curves
+        for i, fitter in enumerate(self.fitters):
+            if self._stepped[i]:
+                curves.append(self.getSteppedCurve(fitter, first, last))
+                continue
+
+            curve, error, index = fitter.getCurve(first, last, tans1[i], tans2[i])
+            curves.append(curve)
+
+            if error > maxError:
+                maxError, maxIndex = error, index
+
+        # validate curves and add them
+        if maxError < self.error or last - first < 2:
+            for i, (fitter, curve) in enumerate(zip(self.fitters, curves)):
+                fitter.addCurve(*curve)
+                if self._stepped[i]:
+                    fitter.keyframes[-2].outTangentType = STEP
+
+            return []
+
+        # fitting failed -- split all channels at max error point
+        tansCenter = self.getCenterTangents(maxIndex)
+        return [
+            (maxIndex, last, [(-t[0], -t[1]) for t in tansCenter], tans2),
+            (first, maxIndex, tans1, tansCenter),
+        ]
+
+    def getSteppedCurve(self, fitter, first, last):
+        """
+        Get the curve of a stepped channel, the handles are flat. As the
+        channel is split at the start of every step the value of the first
+        point is held until the last point.
+
+        :param FitBezier fitter:
+        :param int first:
+        :param int last:
+        :return: Curve
+        :rtype: list
+        """
+        x = fitter.times
+        y = fitter.values
+        dx = (x[last] - x[first]) / 3
+
+        return [
+            (x[first], y[first]),
+            (x[first] + dx, y[first]),
+            (x[last] - dx, y[last]),
+            (x[last], y[last])
+        ]
+
+
+# ----------------------------------------------------------------------------
+
+
+def getRangeIndices(frames, times):
+    """
+    Get the indices of the sampled frames that cover the keyframe times of
+    an animation curve, from the sampled frame at or before the whole frame
+    of the first keyframe to the sampled frame at or after the whole frame
+    of the last keyframe.
+
+    :param list frames: Sampled frames of the group
+    :param list times: Keyframe times of the animation curve
+    :return: First and last index
+    :rtype: tuple
+    """
+    first = bisect.bisect_right(frames, math.floor(times[0]) + THRESHOLD) - 1
+    last = bisect.bisect_left(frames, math.ceil(times[-1]) - THRESHOLD)
+    return max(first, 0), min(last, len(frames) - 1)
+
+
+def trimKeyframes(keyframes, first, last):
+    """
+    Remove the keyframes outside of the first and last time. The channels
+    are split at these times, which means the keyframes at the first and
+    last time are there twice, once for each of the segments around them.
+    Only the keyframes of the segments inside of the range are kept.
+
+    :param list keyframes:
+    :param float first:
+    :param float last:
+    :return: Keyframes
+    :rtype: list
+    """
+    keyframes = [
+        keyframe
+        for keyframe in keyframes
+        if first - THRESHOLD <= keyframe.point[0] <= last + THRESHOLD
+    ]
+
+    if len(keyframes) > 1 and abs(keyframes[1].point[0] - first) <= THRESHOLD:
+        keyframes.pop(0)
+    if len(keyframes) > 1 and abs(keyframes[-2].point[0] - last) <= THRESHOLD:
+        keyframes.pop()
+
+    return keyframes
+
+
+def fitSegmentsShared(channels, error=2.5, weightedTangents=True, stepped=None):
+    """
+    Fit the segments of multiple channels using the same key times, the
+    channels have to be split into segments at the same indices. Every
+    segment is fitted on its own and the keyframes of all segments of a
+    channel are combined.
+
+    :param list channels: Segments of each channel
+    :param int/float error:
+    :param bool weightedTangents:
+    :param list/None stepped: Stepped state of each channel
+    :return: Keyframes of each channel
+    :rtype: list
+    """
+    keyframes = [[] for _ in channels]
+
+    for segments in zip(*channels):
+        fitted = FitShared(segments, error, weightedTangents, stepped).fit()
+        for channel, fittedChannel in zip(keyframes, fitted):
+            channel.extend(fittedChannel)
+
+    return keyframes
+
+
+def fitAnimCurvesShared(
+        animCurves,
+        error=1,
+        step=1,
+        weightedTangents=True,
+        tangentSplitAuto=False,
+        tangentSplitExisting=False,
+        tangentSplitAngleThreshold=False,
+        tangentSplitAngleThresholdValue=15.0,
+):
+    """
+    Fit snapshots of a group of animation curves using the same key times.
+    The animation curves are sampled between the first and last frame of the
+    group and split at the tangent splits of any of the animation curves,
+    which matches the reduction of a group in Maya using the python sampler.
+    The samples are also split at the first and last frame of every
+    animation curve, the keyframes of each animation curve are limited to
+    its own range so its infinity is evaluated the same as before.
+
+    :param list animCurves:
+    :param int/float error:
+    :param int/float step:
+    :param bool weightedTangents:
+    :param bool tangentSplitAuto:
+    :param bool tangentSplitExisting:
+    :param bool tangentSplitAngleThreshold:
+    :param int/float tangentSplitAngleThresholdValue:
+    :return: Keyframes of each animation curve
+    :rtype: list
+    """
+    # get frames of the group
+    start = int(math.floor(min(animCurve.times[0] for animCurve in animCurves)))
+    end = int(math.ceil(max(animCurve.times[-1] for animCurve in animCurves))) + 1
+    frames = floatRange(start, end, step)
+
+    # sample animation curves and get split indices of all animation curves
+    samples = []
+    split = set()
+
+    for animCurve in animCurves:
+        values = animCurve.evaluateFrames(frames)
+        angles = getAngles(frames, values)
+        samples.append(list(zip(frames, values)))
+
+        if tangentSplitAuto:
+            split.update(findTangentSplitAuto(angles))
+        if tangentSplitExisting:
+            split.update(
+                findTangentSplitExisting(
+                    animCurve.times,
+                    animCurve.inAngles,
+                    animCurve.outAngles,
+                    animCurve.inTangentTypes,
+                    animCurve.outTangentTypes,
+                    start,
+                    step
+                )
+            )
+        if tangentSplitAngleThreshold:
+            split.update(findTangentSplitThreshold(angles, tangentSplitAngleThresholdValue))
+
+    # split at the range of each animation curve
+    ranges = [getRangeIndices(frames, animCurve.times) for animCurve in animCurves]
+    split.update(i for indices in ranges for i in indices if 0 < i < len(frames) - 1)
+
+    # fit animation curves using shared key times
+    keyframes = fitSegmentsShared(
+        [splitPoints(points, sorted(split)) for points in samples],
+        error,
+        weightedTangents,
+        [animCurve.isStepped() for animCurve in animCurves],
+    )
+
+    return [
+        trimKeyframes(channel, frames[first], frames[last])
+        for channel, (first, last) in zip(keyframes, ranges)
+    ]
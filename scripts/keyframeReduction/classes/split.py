@@ -0,0 +1,284 @@
+import math
+import bisect
+
+from ..utils import THRESHOLD
+
+
+# ----------------------------------------------------------------------------
+
+
+def getAngles(frames, values):
+    """
+    Get the angles between each sampled point and its neighbours, the
+    angles are used to determine where tangents should be split.
+
+    :param list frames:
+    :param list values:
+    :return: Angles in degrees
+    :rtype: list
+    """
+    angles = []
+
+    for i in range(1, len(frames) - 2):
+        x1 = frames[i - 1] - frames[i]
+        y1 = values[i - 1] - values[i]
+        x2 = frames[i + 1] - frames[i]
+        y2 = values[i + 1] - values[i]
+        angle = math.atan2(abs(x1 * y2 - y1 * x2), x1 * x2 + y1 * y2)
+        angles.append(math.degrees(math.pi - angle))
+
+    return angles
+
+
+def getStepAngles(frames, values, evaluate, step):
+    """
+    Get the angles between each sampled point and the points a step away in
+    time, the neighbouring points are evaluated. This is required when the
+    frames are not sampled at every step, the angles then match the angles
+    of the same frames when sampled at every step.
+
+    :param list frames:
+    :param list values:
+    :param callable evaluate: Returns the values of a list of frames
+    :param int/float step:
+    :return: Angles in degrees
+    :rtype: list
+    """
+    # get neighbouring values
+    frames = frames[1:len(frames) - 2]
+    values = values[1:len(values) - 2]
+    previous = evaluate([frame - step for frame in frames])
+    following = evaluate([frame + step for frame in frames])
+
+    angles = []
+    x1, x2 = -step, step
+
+    for value, previousValue, followingValue in zip(values, previous, following):
+        y1 = previousValue - value
+        y2 = followingValue - value
+        angle = math.atan2(abs(x1 * y2 - y1 * x2), x1 * x2 + y1 * y2)
+        angles.append(math.degrees(math.pi - angle))
+
+    return angles
+
+
+# ----------------------------------------------------------------------------
+
+
+def findTangentSplitAuto(angles):
+    """
+    The automatic tangent split will take the average of all values and
+    the average of just the minimum and maximum value and remaps that on
+    a logarithmic scale, this will give a predicted split angle value.
+    All angles will be processed to see if they fall in or outside that
+    threshold.
+
+    :param list angles:
+    :return: Split indices
+    :rtype: list
+    """
+    # get angles from points
+    splits = []
+
+    # get average variables
+    minAngle = min(angles) or 0.00001
+    maxAngle = max(angles)
+    average = (minAngle + maxAngle) * 0.5
+    mean = sum(angles) / len(angles) * 0.5
+
+    # get value at which to split
+    threshold = (math.log(average) - math.log(mean)) / (math.log(maxAngle) - math.log(minAngle)) * average
+
+    # if curve is relatively smooth don't split
+    if mean * 10 > average:
+        return []
+
+    # split based on angles
+    for i, angle in enumerate(angles):
+        if angle > threshold:
+            splits.append(i + 1)
+
+    return splits
+
+
+def findTangentSplitExisting(
+        frames,
+        inAngles,
+        outAngles,
+        inTangentTypes,
+        outTangentTypes,
+        start,
+        step,
+        sampleFrames=None,
+):
+    """
+    Loop existing frames and see if any keyframes contain tangents that
+    are not unified. If this is the case the index of the closest sampled
+    point will be returned. When the sampled frames are provided the index
+    of the last sampled frame before the keyframe is used, this is required
+    when the frames are not sampled at every step.
+
+    :param list frames:
+    :param list inAngles:
+    :param list outAngles:
+    :param list inTangentTypes:
+    :param list outTangentTypes:
+    :param int start:
+    :param int/float step:
+    :param list/None sampleFrames:
+    :return: Split indices
+    :rtype: list
+    """
+    splits = []
+    inTangentType = "step"
+    outTangentType = "stepnext"
+
+    iterator = zip(frames, inAngles, outAngles, inTangentTypes, outTangentTypes)
+    for frame, inAngle, outAngle, inType, outType in iterator:
+        # get closest index
+        if sampleFrames is None:
+            index = int((frame - start) / step)
+        else:
+            index = max(bisect.bisect_right(sampleFrames, frame) - 1, 0)
+
+        # validate split
+        if abs(inAngle - outAngle) > THRESHOLD:
+            splits.append(index)
+        elif inType == inTangentType:
+            splits.append(index)
+        elif outType == outTangentType:
+            splits.append(index)
+
+    return splits
+
+
+def findTangentSplitThreshold(angles, threshold):
+    """
+    The threshold tangent split will process all angles and check if that
+    angle falls in or outside of user provided threshold.
+
+    :param list angles:
+    :param int/float threshold:
+    :return: Split indices
+    :rtype: list
+    """
+    splits = []
+
+    # split based on angles
+    for i, angle in enumerate(angles):
+        if angle > threshold:
+            splits.append(i + 1)
+
+    return splits
+
+
+def findSplitSimplify(points, tolerance):
+    """
+    Simplify the points using the Ramer-Douglas-Peucker algorithm and return
+    the indices of the points that are kept, excluding the first and last
+    point. The points between two kept points are all within the tolerance
+    of the line between them, which makes the kept points good candidates
+    to start fitting from. Unlike the tangent splits the indices are not
+    meant to break the tangents.
+
+    :param list points:
+    :param int/float tolerance:
+    :return: Split indices
+    :rtype: list
+    """
+    splits = []
+    queue = [(0, len(points) - 1)]
+
+    while queue:
+        first, last = queue.pop()
+
+        # get line between first and last point
+        x1, y1 = points[first]
+        x2, y2 = points[last]
+        dx = x2 - x1
+        dy = y2 - y1
+        length = math.sqrt(dx * dx + dy * dy) or 1.0
+
+        # get furthest point from line
+        maxDist = 0
+        maxIndex = None
+
+        for i in range(first + 1, last):
+            x, y = points[i]
+            dist = abs(dy * (x - x1) - dx * (y - y1)) / length
+
+            if dist > maxDist:
+                maxDist = dist
+                maxIndex = i
+
+        # validate tolerance
+        if maxIndex is None or maxDist <= tolerance:
+            continue
+
+        splits.append(maxIndex)
+        queue.append((first, maxIndex))
+        queue.append((maxIndex, last))
+
+    splits.sort()
+    return splits
+
+
+# ----------------------------------------------------------------------------
+
+
+def splitPoints(points, split):
+    """
+    Split provided points list based on the split indices provided. The
+    lists will have a duplicate end and start points relating to each
+    other.
+
+    :param list points:
+    :param list split:
+    :return: Split points
+    :rtype: list
+    """
+    # validate split
+    if not split:
+        return [points]
+
+    # complete split with adding start and end frames
+    if split[0] != 0:
+        split.insert(0, 0)
+
+    if split[-1] != len(points):
+        split.append(len(points))
+
+    # make sure split is sorted and doesn't contain any duplicates
+    split = list(set(split))
+    split.sort()
+
+    # split range for looping
+    splitA = split[:-1]
+    splitB = split[1:]
+
+    # get lists
+    return [points[a:b + 1] for a, b in zip(splitA, splitB)]
+
+
+def joinSegments(segments):
+    """
+    Join split points back into a single points list, this is the inverse
+    of the splitPoints function. The duplicate start point of each segment
+    is removed and the split indices are returned so the segments can be
+    recreated.
+
+    :param list segments:
+    :return: Points and split indices
+    :rtype: tuple
+    """
+    points = []
+    split = []
+
+    for segment in segments:
+        if points:
+            split.append(len(points) - 1)
+            segment = segment[1:]
+
+        points.extend(segment)
+
+    return points, split
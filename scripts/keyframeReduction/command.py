@@ -0,0 +1,320 @@
+import os
+import time
+from maya import OpenMaya, OpenMayaAnim, OpenMayaMPx
+
+from . import utils
+from .classes.fit import FITTER_GREEDY, FITTER_MERGE
+from .classes.cache import FitCache, getFingerprint
+from .classes.merge import mergeAnimCurve
+from .classes.sample import getSampleTolerance
+from .classes.animCurve import AnimCurve
+from .classes.keyframeReduction import KeyframeReduction, WRITER_API
+
+
+# ----------------------------------------------------------------------------
+
+
+COMMAND_NAME = "keyframeReduction"
+
+# the flags match the arguments of the KeyframeReduction.reduce method, the
+# refit flag reuses the split trees of the cache and the animation curve
+# change flag adds a change that is already applied to the undo queue. Each
+# flag is stored as short name, long name, argument type and default value.
+FLAGS = [
+    ("-er", "-error", OpenMaya.MSyntax.kDouble, 1.0),
+    ("-st", "-step", OpenMaya.MSyntax.kDouble, 1.0),
+    ("-wt", "-weightedTangents", OpenMaya.MSyntax.kBoolean, True),
+    ("-tsa", "-tangentSplitAuto", OpenMaya.MSyntax.kBoolean, False),
+    ("-tse", "-tangentSplitExisting", OpenMaya.MSyntax.kBoolean, False),
+    ("-tst", "-tangentSplitAngleThreshold", OpenMaya.MSyntax.kBoolean, False),
+    ("-tsv", "-tangentSplitAngleThresholdValue", OpenMaya.MSyntax.kDouble, 15.0),
+    ("-ss", "-splitSimplify", OpenMaya.MSyntax.kBoolean, False),
+    ("-ft", "-fitter", OpenMaya.MSyntax.kString, FITTER_GREEDY),
+    ("-as", "-adaptiveSampling", OpenMaya.MSyntax.kBoolean, False),
+    ("-rf", "-refit", OpenMaya.MSyntax.kBoolean, False),
+    ("-acc", "-animCurveChange", OpenMaya.MSyntax.kString, ""),
+]
+
+# the cache is kept for the duration of the maya session so reducing
+# unchanged animation curves again doesn't require them to be fitted. The
+# results are stored on disk as well when the environment variable is set.
+# When the refit flag is set the split trees of the most recently fitted
+# animation curves are kept as well, so reducing an animation curve again
+# using a different error after undoing the reduction only fits the regions
+# that need splitting.
+CACHE_ENVIRONMENT_VARIABLE = "KEYFRAME_REDUCTION_CACHE"
+CACHE_HIERARCHY_SIZE = 256
+CACHE = FitCache(path=os.environ.get(CACHE_ENVIRONMENT_VARIABLE), hierarchySize=CACHE_HIERARCHY_SIZE)
+
+
+# ----------------------------------------------------------------------------
+
+
+class KeyframeReductionCommand(OpenMayaMPx.MPxCommand):
+    """
+    Reduce the keyframes of the provided animation curves or the animation
+    curves connected to the provided nodes. If no nodes are provided the
+    selection is used. The reduction rate of each animation curve is
+    returned.
+
+    The reduced keyframes are written in bulk and recorded in a single
+    animation curve change, undo and redo restore the keyframes exactly,
+    including tangent types and locks, while keeping the undo queue compact
+    when a lot of animation curves are reduced. The command can be used
+    from MEL, Python and batch mode.
+    ::
+        keyframeReduction -error 0.1 -weightedTangents true pCube1;
+
+        cmds.keyframeReduction("pCube1", error=0.1, weightedTangents=True)
+    """
+    def __init__(self):
+        OpenMayaMPx.MPxCommand.__init__(self)
+        self._reductions = []
+        self._change = None
+
+    # ------------------------------------------------------------------------
+
+    def isUndoable(self):
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def getSettings(self, argData):
+        """
+        :param OpenMaya.MArgDatabase argData:
+        :return: Reduce settings
+        :rtype: dict
+        """
+        settings = {}
+
+        for shortName, longName, argType, default in FLAGS:
+            # get value
+            if not argData.isFlagSet(shortName):
+                value = default
+            elif argType == OpenMaya.MSyntax.kBoolean:
+                value = argData.flagArgumentBool(shortName, 0)
+            elif argType == OpenMaya.MSyntax.kString:
+                value = argData.flagArgumentString(shortName, 0)
+            else:
+                value = argData.flagArgumentDouble(shortName, 0)
+
+            settings[longName[1:]] = value
+
+        return settings
+
+    def getAnimationCurves(self, argData):
+        """
+        :param OpenMaya.MArgDatabase argData:
+        :return: Animation curves
+        :rtype: list
+        """
+        # get objects
+        selection = OpenMaya.MSelectionList()
+        argData.getObjects(selection)
+
+        # get node names, dag nodes use their partial path as their name
+        # is not unique when nodes with the same name exist in the scene.
+        nodes = []
+        iterator = OpenMaya.MItSelectionList(selection)
+        while not iterator.isDone():
+            if iterator.itemType() == OpenMaya.MItSelectionList.kDagSelectionItem:
+                dag = OpenMaya.MDagPath()
+                iterator.getDagPath(dag)
+                nodes.append(dag.partialPathName())
+            else:
+                obj = OpenMaya.MObject()
+                iterator.getDependNode(obj)
+                nodes.append(OpenMaya.MFnDependencyNode(obj).name())
+            iterator.next()
+
+        return utils.getAnimationCurves(nodes)
+
+    # ------------------------------------------------------------------------
+
+    def doIt(self, args):
+        """
+        Fit the keyframes of all animation curves and store the reduced
+        keyframe data, the reduced keyframe data will be applied in the
+        redoIt method.
+
+        :param OpenMaya.MArgList args:
+        """
+        # get arguments
+        argData = OpenMaya.MArgDatabase(self.syntax(), args)
+        settings = self.getSettings(argData)
+
+        # take over animation curve change, the changes are already applied
+        # and are only added to the undo queue.
+        if settings["animCurveChange"]:
+            self._change = utils.ANIM_CURVE_CHANGES.pop(settings["animCurveChange"], None)
+            if self._change is None:
+                raise RuntimeError(
+                    "Animation curve change '{}' doesn't exist.".format(settings["animCurveChange"])
+                )
+
+            return
+
+        animationCurves = self.getAnimationCurves(argData)
+
+        # fit animation curves, curves with identical samples share the
+        # same fingerprint and are only fitted once. Merged animation curves
+        # are not sampled and not cached, stepped animation curves are
+        # always merged.
+        self.clearResult()
+        hits, misses, refits = CACHE.hits, CACHE.misses, CACHE.refits
+        fitted = {}
+        merged = 0
+
+        for animationCurve in animationCurves:
+            t = time.time()
+            reduction = KeyframeReduction(animationCurve, writer=WRITER_API)
+
+            # get original and fitted keyframes
+            original = reduction.getAnimCurve()
+            if settings["fitter"] == FITTER_MERGE or original.isStepped():
+                keyframes = mergeAnimCurve(original, settings["error"], settings["weightedTangents"])
+                merged += 1
+                self.appendReduction(animationCurve, reduction, original, keyframes, settings, t)
+                continue
+
+            segments = reduction.getSegments(
+                settings["step"],
+                settings["tangentSplitAuto"],
+                settings["tangentSplitExisting"],
+                settings["tangentSplitAngleThreshold"],
+                settings["tangentSplitAngleThresholdValue"],
+                getSampleTolerance(settings["error"], settings["adaptiveSampling"]),
+            )
+
+            arguments = (
+                segments,
+                settings["error"],
+                settings["weightedTangents"],
+                settings["splitSimplify"],
+                settings["fitter"]
+            )
+
+            fingerprint = getFingerprint(*arguments)
+            if fingerprint not in fitted:
+                fitted[fingerprint] = CACHE.fitSegments(*arguments, refit=settings["refit"])
+
+            keyframes = fitted[fingerprint]
+            self.appendReduction(animationCurve, reduction, original, keyframes, settings, t)
+
+        # print deduplication and cache statistics
+        print(
+            "< keyframeReduction "
+            "| animation-curves: {0} "
+            "| unique-curves: {1} "
+            "| fits-saved: {2} "
+            "| cache-hits: {3} "
+            "| cache-misses: {4} "
+            "| cache-refits: {5} >".format(
+                len(animationCurves),
+                len(fitted) + merged,
+                len(animationCurves) - len(fitted) - merged + CACHE.hits - hits,
+                CACHE.hits - hits,
+                CACHE.misses - misses,
+                CACHE.refits - refits
+            )
+        )
+
+        # apply reduced keyframes
+        self.redoIt()
+
+    def appendReduction(self, animationCurve, reduction, original, keyframes, settings, t):
+        """
+        Store the reduced keyframe data of the animation curve and append
+        the reduction rate to the result. Curves that cannot be optimized
+        are not stored.
+
+        :param str animationCurve:
+        :param KeyframeReduction reduction:
+        :param AnimCurve original:
+        :param list keyframes:
+        :param dict settings:
+        :param float t: Start time of the reduction
+        """
+        # only store curves that can be optimized
+        if len(keyframes) >= len(original.times):
+            print(
+                "< keyframeReduction "
+                "| path: {0} "
+                "| process-time: {1:,.2f} seconds "
+                "| unable-to-reduce >".format(animationCurve, time.time() - t)
+            )
+            self.appendToResult(0.0)
+            return
+
+        reduced = AnimCurve.fromKeyframes(keyframes, settings["weightedTangents"])
+        self._reductions.append((reduction, reduced))
+
+        # print reduction rate
+        rate = 100 - ((len(keyframes) / float(len(original.times))) * 100)
+        print(
+            "< keyframeReduction "
+            "| path: {0} "
+            "| process-time: {1:,.2f} seconds "
+            "| reduction-rate: {2:,.2f}%  >".format(
+                animationCurve,
+                time.time() - t,
+                rate
+            )
+        )
+        self.appendToResult(rate)
+
+    def redoIt(self):
+        """
+        Apply the reduced keyframe data, the first time the changes are
+        recorded in an animation curve change which is used to redo the
+        changes from then on. When any of the animation curves fails to be
+        written the recorded changes are undone before the error is raised,
+        leaving all of the animation curves untouched.
+        """
+        if self._change is not None:
+            self._change.redoIt()
+            return
+
+        change = OpenMayaAnim.MAnimCurveChange()
+        try:
+            for reduction, reduced in self._reductions:
+                reduction.setAnimCurve(reduced, change)
+        except Exception:
+            change.undoIt()
+            raise
+
+        self._change = change
+        self._reductions = []
+
+    def undoIt(self):
+        """
+        Restore the animation curves as they were before the reduction.
+        """
+        if self._change is not None:
+            self._change.undoIt()
+
+
+# ----------------------------------------------------------------------------
+
+
+def creator():
+    """
+    :return: Command
+    :rtype: OpenMayaMPx.MPxCommand
+    """
+    return OpenMayaMPx.asMPxPtr(KeyframeReductionCommand())
+
+
+def syntaxCreator():
+    """
+    :return: Command syntax
+    :rtype: OpenMaya.MSyntax
+    """
+    syntax = OpenMaya.MSyntax()
+    syntax.setObjectType(OpenMaya.MSyntax.kSelectionList)
+    syntax.useSelectionAsDefault(True)
+
+    for shortName, longName, argType, default in FLAGS:
+        syntax.addFlag(shortName, longName, argType)
+
+    return syntax
@@ -0,0 +1,168 @@
+"""
+Fit the samples exported by keyframeReduction.pipeline.exportSamples without
+Maya. The keyframes are written to a file that can be imported back using
+keyframeReduction.pipeline.importKeyframes.
+::
+    python -m keyframeReduction.offline samples.kfr keyframes.kfr --workers 8
+"""
+import sys
+import time
+import argparse
+
+from . import parallel
+from .classes.fit import fitSegments, FITTER_GREEDY, FITTER_MERGE
+from .classes.merge import mergeAnimCurve
+from .classes.split import splitPoints
+from .classes.exchange import ExchangeReader, ExchangeWriter, keyframesToArrays, arraysToAnimCurve
+
+
+# ----------------------------------------------------------------------------
+
+
+# readers are cached per process so the worker processes only have to open
+# and memory-map the samples file once.
+READERS = {}
+
+
+# ----------------------------------------------------------------------------
+
+
+def getReader(path):
+    """
+    :param str path:
+    :return: Cached reader
+    :rtype: ExchangeReader
+    """
+    if path not in READERS:
+        READERS[path] = ExchangeReader(path)
+
+    return READERS[path]
+
+
+def fitRecordWorker(arguments):
+    """
+    Fit the samples of the record. Records of animation curves that are
+    stepped or exported using the merge fitter contain the keys of the
+    animation curve rather than samples, these keys are merged which
+    matches the reduction in Maya.
+
+    :param tuple arguments: Path, record index and fit settings
+    :return: Keyframe arrays
+    :rtype: dict
+    """
+    # variables
+    path, index, error, weightedTangents, splitSimplify, fitter = arguments
+    reader = getReader(path)
+    record = reader.records[index]
+
+    # merge keys
+    metadata = record["metadata"]
+    if fitter == FITTER_MERGE or metadata.get("stepped"):
+        animCurve = arraysToAnimCurve(reader.getArrays(record), metadata)
+        return keyframesToArrays(mergeAnimCurve(animCurve, error, weightedTangents))
+
+    # get segments
+    times = reader.getArray(record, "times")
+    values = reader.getArray(record, "values")
+    segments = splitPoints(list(zip(times, values)), list(metadata["split"]))
+
+    # fit segments
+    return keyframesToArrays(fitSegments(segments, error, weightedTangents, splitSimplify, fitter))
+
+
+def fitFile(inputPath, outputPath, error=None, weightedTangents=None, workers=None):
+    """
+    Fit the samples of each record in the input file and write the keyframes
+    to the output file in the same order. The error and weighted tangents
+    default to the settings stored when the samples were exported. The
+    records are fitted one at a time in the worker processes, which means
+    only the keyframes of the records in flight are held in memory.
+
+    :param str inputPath:
+    :param str outputPath:
+    :param int/float/None error:
+    :param bool/None weightedTangents:
+    :param int/None workers: Number of processes, default is the cpu count
+    :return: Number of records
+    :rtype: int
+    """
+    # get settings
+    reader = getReader(inputPath)
+    metadata = dict(reader.metadata)
+    metadata["error"] = metadata.get("error", 1) if error is None else error
+    metadata["weightedTangents"] = (
+        metadata.get("weightedTangents", True)
+        if weightedTangents is None
+        else weightedTangents
+    )
+
+    arguments = [
+        (
+            inputPath,
+            i,
+            metadata["error"],
+            metadata["weightedTangents"],
+            metadata.get("splitSimplify", False),
+            metadata.get("fitter", FITTER_GREEDY),
+        )
+        for i in range(len(reader))
+    ]
+
+    # get results, in the current process or in a process pool
+    pool = None
+    if workers == 1 or len(arguments) <= 1:
+        results = (fitRecordWorker(a) for a in arguments)
+    else:
+        pool = parallel.getPool(workers)
+        results = pool.imap(fitRecordWorker, arguments, chunksize=8)
+
+    # write results
+    try:
+        with ExchangeWriter(outputPath, metadata) as writer:
+            for record, arrays in zip(reader.records, results):
+                writer.add(record["name"], arrays)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return len(arguments)
+
+
+# ----------------------------------------------------------------------------
+
+
+def main(args=None):
+    """
+    :param list/None args: Command line arguments, default is sys.argv
+    :return: Exit code
+    :rtype: int
+    """
+    # get arguments
+    parser = argparse.ArgumentParser(
+        prog="python -m keyframeReduction.offline",
+        description="Fit keyframes to exported animation curve samples."
+    )
+    parser.add_argument("input", help="Samples file.")
+    parser.add_argument("output", help="Keyframes file.")
+    parser.add_argument("--error", type=float, help="Default is the exported error.")
+    parser.add_argument("--weightedTangents", type=int, choices=[0, 1], help="Default is the exported value.")
+    parser.add_argument("--workers", type=int, help="Number of processes, default is the cpu count.")
+    args = parser.parse_args(args)
+
+    # fit file
+    t = time.time()
+    weightedTangents = None if args.weightedTangents is None else bool(args.weightedTangents)
+    count = fitFile(args.input, args.output, args.error, weightedTangents, args.workers)
+
+    print(
+        "< keyframeReduction.offline "
+        "| animation-curves: {0} "
+        "| process-time: {1:,.2f} seconds >".format(count, time.time() - t)
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,776 @@
+import os
+import sys
+import time
+import multiprocessing
+from collections import OrderedDict, deque
+
+from . import utils
+from .classes.fit import fitSegments, FITTER_GREEDY, FITTER_MERGE
+from .classes.merge import mergeAnimCurve
+from .classes.shared import fitAnimCurvesShared
+from .classes.cache import getFingerprint
+from .classes.sample import getSampleTolerance
+
+try:
+    from maya import OpenMayaAnim
+    from .shared import getGroups
+    from .classes.keyframeReduction import KeyframeReduction, WRITER_API
+except ImportError:
+    # maya is not available, the process pool can still be used to fit
+    # segments using any python interpreter.
+    OpenMayaAnim = None
+    getGroups = None
+    KeyframeReduction = None
+    WRITER_API = None
+
+
+# ----------------------------------------------------------------------------
+
+
+DEFAULT_SETTINGS = {
+    "error": 1,
+    "step": 1,
+    "weightedTangents": True,
+    "tangentSplitAuto": False,
+    "tangentSplitExisting": False,
+    "tangentSplitAngleThreshold": False,
+    "tangentSplitAngleThresholdValue": 15.0,
+    "splitSimplify": False,
+    "fitter": FITTER_GREEDY,
+    "adaptiveSampling": False,
+}
+
+# when the processes cannot be spawned inside of Maya the animation curves
+# are fitted in the main thread, a reduction job then only fits animation
+# curves for a slice of time on every step to keep Maya responsive.
+IN_PROCESS_TIME_SLICE = 0.05
+IN_PROCESS_WARNED = False
+
+
+# ----------------------------------------------------------------------------
+
+
+def getExecutable():
+    """
+    Get the python executable used to start the worker processes. Inside of
+    Maya the sys.executable points to the Maya executable, so mayapy is used
+    when it can be found.
+
+    :return: Python executable
+    :rtype: str
+    """
+    location = os.environ.get("MAYA_LOCATION")
+    if location:
+        extension = ".exe" if sys.platform.startswith("win") else ""
+        mayapy = os.path.join(location, "bin", "mayapy" + extension)
+        if os.path.exists(mayapy):
+            return mayapy
+
+    return sys.executable
+
+
+def canSpawn():
+    """
+    Processes can be spawned when the multiprocessing module supports start
+    methods, python 2 only spawns processes on windows.
+
+    :return: Spawn state
+    :rtype: bool
+    """
+    return hasattr(multiprocessing, "get_context") or sys.platform.startswith("win")
+
+
+def getPool(workers=None, initializer=None, initargs=()):
+    """
+    Create a process pool, when possible the processes are spawned rather
+    than forked as forking the Maya process is not safe. When Maya is loaded
+    and the processes cannot be spawned the functions are called in the
+    current process instead.
+
+    :param int/None workers: Number of processes, default is the cpu count
+    :param callable/None initializer: Called once in every process
+    :param tuple initargs:
+    :return: Process pool
+    :rtype: multiprocessing.Pool/InProcessPool
+    """
+    global IN_PROCESS_WARNED
+
+    if OpenMayaAnim is not None and not canSpawn():
+        if not IN_PROCESS_WARNED:
+            IN_PROCESS_WARNED = True
+            print(
+                "< keyframeReduction.parallel.getPool() "
+                "| warning: processes cannot be spawned, "
+                "animation curves are fitted in the current process >"
+            )
+
+        return InProcessPool(initializer, initargs)
+
+    context = multiprocessing
+    if hasattr(multiprocessing, "get_context"):
+        context = multiprocessing.get_context("spawn")
+
+    # the executable can only be set when the processes are spawned, python
+    # 2 only spawns processes on windows.
+    if hasattr(context, "set_executable"):
+        context.set_executable(getExecutable())
+
+    return context.Pool(workers, initializer, initargs)
+
+
+class InProcessPool(object):
+    """
+    Call the functions submitted to the pool in the current process, the
+    functions are called as soon as they are submitted. Only the methods of
+    the process pool used by this package are implemented.
+    """
+    def __init__(self, initializer=None, initargs=()):
+        """
+        :param callable/None initializer: Called once in the current process
+        :param tuple initargs:
+        """
+        if initializer is not None:
+            initializer(*initargs)
+
+    def apply_async(self, func, args=(), kwds=None):
+        """
+        :param callable func:
+        :param tuple args:
+        :param dict/None kwds:
+        :return: Result
+        :rtype: InProcessResult
+        """
+        return InProcessResult(func, args, kwds or {})
+
+    def map(self, func, iterable, chunksize=None):
+        """
+        :param callable func:
+        :param iterable iterable:
+        :param int/None chunksize: Not used
+        :return: Results
+        :rtype: list
+        """
+        return [func(a) for a in iterable]
+
+    def imap(self, func, iterable, chunksize=1):
+        """
+        :param callable func:
+        :param iterable iterable:
+        :param int chunksize: Not used
+        :return: Results
+        :rtype: generator
+        """
+        return (func(a) for a in iterable)
+
+    def close(self):
+        """
+        The functions are called as soon as they are submitted, there are
+        no processes to close.
+        """
+
+    def terminate(self):
+        """
+        The functions are called as soon as they are submitted, there are
+        no processes to terminate.
+        """
+
+    def join(self):
+        """
+        The functions are called as soon as they are submitted, there are
+        no processes to wait for.
+        """
+
+
+class InProcessResult(object):
+    """
+    Result of a function called by the in process pool, errors are raised
+    when the result is retrieved matching the results of a process pool.
+    """
+    def __init__(self, func, args, kwds):
+        """
+        :param callable func:
+        :param tuple args:
+        :param dict kwds:
+        """
+        self._value = None
+        self._error = None
+
+        try:
+            self._value = func(*args, **kwds)
+        except Exception as e:
+            self._error = e
+
+    def ready(self):
+        """
+        :return: Ready state, the function is always called
+        :rtype: bool
+        """
+        return True
+
+    def get(self, timeout=None):
+        """
+        :param float/None timeout: Not used
+        :return: Result
+        :raise Exception: When the function failed
+        """
+        if self._error is not None:
+            raise self._error
+
+        return self._value
+
+
+# ----------------------------------------------------------------------------
+
+
+def mapWorkers(worker, arguments, workers=None):
+    """
+    Call the worker with each of the arguments using a process pool, the
+    results are returned in the same order as the arguments. When the
+    workers are set to one the worker is called in the current process.
+
+    :param callable worker:
+    :param list arguments:
+    :param int/None workers: Number of processes, default is the cpu count
+    :return: Results
+    :rtype: list
+    """
+    # call in current process
+    if workers == 1 or len(arguments) <= 1:
+        return [worker(a) for a in arguments]
+
+    # call in process pool
+    pool = getPool(workers)
+    try:
+        return pool.map(worker, arguments)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def fitSegmentsWorker(arguments):
+    """
+    :param tuple arguments: Segments, error, weighted tangents, split simplify and fitter
+    :return: Keyframes
+    :rtype: list
+    """
+    return fitSegments(*arguments)
+
+
+def fitSnapshotWorker(arguments):
+    """
+    Sample, split and fit a snapshot of an animation curve. The segments of
+    the snapshot are merged when the merge fitter is used or when the
+    snapshot is stepped.
+
+    :param tuple arguments: Animation curve snapshot and settings
+    :return: Keyframes
+    :rtype: list
+    """
+    animCurve, settings = arguments
+    if settings["fitter"] == FITTER_MERGE or animCurve.isStepped():
+        return mergeAnimCurve(animCurve, settings["error"], settings["weightedTangents"])
+
+    segments = animCurve.getSegments(
+        settings["step"],
+        settings["tangentSplitAuto"],
+        settings["tangentSplitExisting"],
+        settings["tangentSplitAngleThreshold"],
+        settings["tangentSplitAngleThresholdValue"],
+        getSampleTolerance(settings["error"], settings["adaptiveSampling"]),
+    )
+
+    return fitSegments(
+        segments,
+        settings["error"],
+        settings["weightedTangents"],
+        settings["splitSimplify"],
+        settings["fitter"],
+    )
+
+
+def fitSharedWorker(arguments):
+    """
+    Sample, split and fit snapshots of a group of animation curves using the
+    same key times.
+
+    :param tuple arguments: Animation curve snapshots and settings
+    :return: Keyframes of each animation curve
+    :rtype: list
+    """
+    animCurves, settings = arguments
+    return fitAnimCurvesShared(
+        animCurves,
+        settings["error"],
+        settings["step"],
+        settings["weightedTangents"],
+        settings["tangentSplitAuto"],
+        settings["tangentSplitExisting"],
+        settings["tangentSplitAngleThreshold"],
+        settings["tangentSplitAngleThresholdValue"],
+    )
+
+
+def fitSegmentsParallel(
+        segments,
+        error=1,
+        weightedTangents=True,
+        workers=None,
+        splitSimplify=False,
+        fitter=FITTER_GREEDY,
+):
+    """
+    Fit the segments of multiple animation curves using a process pool. The
+    keyframes are returned in the same order as the provided segments. When
+    the workers are set to one the fitting is done in the current process.
+
+    :param list segments: Segments for each animation curve
+    :param int/float error:
+    :param bool weightedTangents:
+    :param int/None workers: Number of processes, default is the cpu count
+    :param bool splitSimplify:
+    :param str fitter:
+    :return: Keyframes for each animation curve
+    :rtype: list
+    """
+    arguments = [(s, error, weightedTangents, splitSimplify, fitter) for s in segments]
+    return mapWorkers(fitSegmentsWorker, arguments, workers)
+
+
+def fitSegmentsUnique(
+        segments,
+        error=1,
+        weightedTangents=True,
+        workers=None,
+        splitSimplify=False,
+        fitter=FITTER_GREEDY,
+):
+    """
+    Fit the segments of multiple animation curves using a process pool,
+    animation curves with identical segments are only fitted once and share
+    the same keyframes. The keyframes are returned in the same order as the
+    provided segments.
+
+    :param list segments: Segments for each animation curve
+    :param int/float error:
+    :param bool weightedTangents:
+    :param int/None workers: Number of processes, default is the cpu count
+    :param bool splitSimplify:
+    :param str fitter:
+    :return: Keyframes for each animation curve and number of duplicates
+    :rtype: tuple
+    """
+    fingerprints = [getFingerprint(s, error, weightedTangents, splitSimplify, fitter) for s in segments]
+    unique = OrderedDict(zip(fingerprints, segments))
+    fitted = fitSegmentsParallel(
+        list(unique.values()),
+        error,
+        weightedTangents,
+        workers,
+        splitSimplify,
+        fitter,
+    )
+    fitted = dict(zip(unique.keys(), fitted))
+
+    return [fitted[fingerprint] for fingerprint in fingerprints], len(segments) - len(unique)
+
+
+# ----------------------------------------------------------------------------
+
+
+def reduceAnimationCurves(
+        animationCurves,
+        workers=None,
+        error=1,
+        step=1,
+        weightedTangents=True,
+        tangentSplitAuto=False,
+        tangentSplitExisting=False,
+        tangentSplitAngleThreshold=False,
+        tangentSplitAngleThresholdValue=15.0,
+        splitSimplify=False,
+        fitter=FITTER_GREEDY,
+        adaptiveSampling=False,
+):
+    """
+    Reduce the number of keyframes on multiple animation curves. All of the
+    animation curves are sampled in the main thread, the fitting is spread
+    over a process pool after which the keyframes are applied in the main
+    thread. Animation curves with identical samples are only fitted once.
+    The results are identical to reducing the animation curves one after
+    another. When the merge fitter is used snapshots of the animation
+    curves are merged in the process pool instead, stepped animation
+    curves are always merged.
+
+    :param list animationCurves:
+    :param int/None workers: Number of processes, default is the cpu count
+    :param int/float error:
+    :param int/float step:
+    :param bool weightedTangents:
+    :param bool tangentSplitAuto:
+    :param bool tangentSplitExisting:
+    :param bool tangentSplitAngleThreshold:
+    :param int/float tangentSplitAngleThresholdValue:
+    :param bool splitSimplify:
+    :param str fitter:
+    :param bool adaptiveSampling:
+    :return: Reduction rate for each animation curve
+    :rtype: list
+    """
+    t = time.time()
+    reductions = [KeyframeReduction(animationCurve) for animationCurve in animationCurves]
+
+    # merge animation curves, stepped animation curves are always merged
+    merged = [fitter == FITTER_MERGE or reduction.isStepped() for reduction in reductions]
+    settings = dict(DEFAULT_SETTINGS, error=error, weightedTangents=weightedTangents, fitter=FITTER_MERGE)
+    arguments = [(reduction.getAnimCurve(), settings) for reduction, merge in zip(reductions, merged) if merge]
+    mergedResults = iter(mapWorkers(fitSnapshotWorker, arguments, workers))
+
+    # sample animation curves
+    segments = [
+        reduction.getSegments(
+            step,
+            tangentSplitAuto,
+            tangentSplitExisting,
+            tangentSplitAngleThreshold,
+            tangentSplitAngleThresholdValue,
+            getSampleTolerance(error, adaptiveSampling),
+        )
+        for reduction, merge in zip(reductions, merged)
+        if not merge
+    ]
+
+    # fit animation curves, animation curves with identical samples are
+    # only fitted once.
+    fitted, duplicates = fitSegmentsUnique(segments, error, weightedTangents, workers, splitSimplify, fitter)
+    sampledResults = iter(fitted)
+
+    results = [next(mergedResults) if merge else next(sampledResults) for merge in merged]
+
+    # apply keyframes
+    with utils.UndoChunkContext():
+        rates = [
+            reduction.apply(keyframes, weightedTangents)
+            for reduction, keyframes in zip(reductions, results)
+        ]
+
+    print(
+        "< keyframeReduction.parallel.reduceAnimationCurves() "
+        "| animation-curves: {0} "
+        "| process-time: {1:,.2f} seconds "
+        "| overall-reduction-rate: {2:,.2f}% "
+        "| duplicate-curves: {3} >".format(
+            len(rates),
+            time.time() - t,
+            sum(rates) / max(len(rates), 1),
+            duplicates
+        )
+    )
+
+    return rates
+
+
+# ----------------------------------------------------------------------------
+
+
+class ReductionJob(object):
+    """
+    Reduce the keyframes of multiple animation curves in small steps, which
+    allows the reduction to be driven by an event loop without blocking it.
+    Every step takes a snapshot of the next animation curves and submits
+    them to a process pool where they are sampled, split and fitted without
+    Maya. The keyframes of the finished animation curves are applied in the
+    order of the animation curves using the api writer. The changes of
+    every applied batch are added to the undo queue as a single step as
+    soon as the batch is applied. Maya stays interactive while the job
+    runs, a single step for the whole job would either keep an undo chunk
+    open that captures the edits the user makes in the meantime, or add the
+    changes after those edits even though they were made before them.
+    Animation curves that fail to be fitted or written are left untouched
+    and reported, the job continues with the other animation curves. When
+    the job is cancelled the applied animation curves remain reduced.
+
+    When a group is provided the animation curves are grouped by node or by
+    plug and every group is fitted using a single set of key times, the
+    fitter, split simplify and adaptive sampling settings are not used in
+    that case.
+    ::
+        job = ReductionJob(animationCurves, error=0.1)
+        while not job.step():
+            pass
+    """
+    def __init__(self, animationCurves, workers=None, window=64, batchSize=16, group=None, **settings):
+        """
+        :param list animationCurves:
+        :param int/None workers: Number of processes, default is the cpu count
+        :param int window: Maximum number of groups in flight
+        :param int batchSize: Maximum number of groups per step
+        :param str/None group: "node" or "plug" to share key times, None reduces every animation curve on its own
+        """
+        self._animationCurves = list(animationCurves)
+        self._group = group
+        self._groups = (
+            getGroups(self._animationCurves, group)
+            if group is not None
+            else [[animationCurve] for animationCurve in self._animationCurves]
+        )
+        self._settings = dict(DEFAULT_SETTINGS, **settings)
+        self._workers = workers
+        self._window = max(window, 1)
+        self._batchSize = max(batchSize, 1)
+
+        self._pool = None
+        self._pending = deque()
+        self._index = 0
+        self._rates = []
+        self._cancelled = False
+        self._changes = []
+        self._failed = []
+        self._error = None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def animationCurves(self):
+        """
+        :return: Animation curves
+        :rtype: list
+        """
+        return self._animationCurves
+
+    @property
+    def group(self):
+        """
+        :return: Group of the animation curves that share key times
+        :rtype: str/None
+        """
+        return self._group
+
+    @property
+    def groups(self):
+        """
+        :return: Groups of animation curves that are fitted together
+        :rtype: list
+        """
+        return self._groups
+
+    @property
+    def settings(self):
+        """
+        :return: Reduce settings
+        :rtype: dict
+        """
+        return self._settings
+
+    @property
+    def rates(self):
+        """
+        :return: Reduction rate of each processed animation curve in the order they are processed
+        :rtype: list
+        """
+        return self._rates
+
+    @property
+    def failed(self):
+        """
+        :return: Animation curves that failed to be fitted or written
+        :rtype: list
+        """
+        return self._failed
+
+    @property
+    def cancelled(self):
+        """
+        :return: Cancelled state
+        :rtype: bool
+        """
+        return self._cancelled
+
+    @property
+    def error(self):
+        """
+        :return: Error of the most recent animation curve that failed
+        :rtype: str/None
+        """
+        return self._error
+
+    @property
+    def done(self):
+        """
+        :return: Done state, either all animation curves are applied or the job is cancelled
+        :rtype: bool
+        """
+        if self.cancelled:
+            return True
+
+        return self._index >= len(self.groups) and not self._pending
+
+    # ------------------------------------------------------------------------
+
+    def step(self):
+        """
+        Submit the next batch of groups and apply the keyframes of the
+        groups that are finished. The process pool is closed once all
+        animation curves are applied.
+
+        :return: Done state
+        :rtype: bool
+        """
+        if self.done:
+            return True
+
+        if self._pool is None:
+            self._pool = getPool(self._workers)
+
+        # submit snapshots, the animation curve data is read in the main
+        # thread and sampled in the process pool. When the pool fits in the
+        # current process submitting stops once the time slice is used.
+        t = time.time()
+        inProcess = isinstance(self._pool, InProcessPool)
+        for i in range(self._batchSize):
+            if self._index >= len(self.groups) or len(self._pending) >= self._window:
+                break
+            if inProcess and i and time.time() - t > IN_PROCESS_TIME_SLICE:
+                break
+
+            paths = self.groups[self._index]
+            snapshots = [KeyframeReduction(path).getAnimCurve() for path in paths]
+            if self.group is None:
+                result = self._pool.apply_async(fitSnapshotWorker, ((snapshots[0], self.settings),))
+            else:
+                result = self._pool.apply_async(fitSharedWorker, ((snapshots, self.settings),))
+
+            self._pending.append((paths, snapshots, result))
+            self._index += 1
+
+        # get finished groups in order
+        batch = []
+        while self._pending and self._pending[0][2].ready() and len(batch) < self._batchSize:
+            batch.append(self._pending.popleft())
+
+        # apply keyframes, groups that failed to be fitted are reported and
+        # skipped. The changes of the batch are added to the undo queue as
+        # a single step.
+        try:
+            for paths, snapshots, result in batch:
+                try:
+                    keyframes = result.get()
+                except Exception as e:
+                    for path in paths:
+                        self.addFailed(path, e)
+                        self._rates.append(0)
+                    continue
+
+                self.applyGroup(paths, snapshots, [keyframes] if self.group is None else keyframes)
+        finally:
+            self.addChanges()
+
+        # close pool
+        if self.done:
+            self.close()
+
+        return self.done
+
+    def applyGroup(self, paths, snapshots, keyframes):
+        """
+        Apply the keyframes of each animation curve of the group. When the
+        group shares key times keyframes that are not reduced are forced if
+        the animation curve has keyframes outside of the shared key times.
+
+        :param list paths:
+        :param list snapshots:
+        :param list keyframes: Keyframes of each animation curve
+        """
+        for path, snapshot, channel in zip(paths, snapshots, keyframes):
+            times = set(keyframe.point[0] for keyframe in channel)
+            force = self.group is not None and not times.issuperset(snapshot.times)
+            self._rates.append(self.apply(path, snapshot, channel, force))
+
+    def apply(self, path, snapshot, keyframes, force=False):
+        """
+        Apply the keyframes to the animation curve using the api writer,
+        the changes are recorded in an animation curve change that is added
+        to the undo queue with the rest of the batch. When the keyframes
+        fail to be written the change is undone and the animation curve is
+        reported as failed.
+        Animation curves of which any of the keyframe or tangent data
+        changed after the snapshot was taken are not reduced.
+
+        :param str path:
+        :param AnimCurve snapshot:
+        :param list keyframes:
+        :param bool force:
+        :return: Reduction rate
+        :rtype: float
+        """
+        reduction = KeyframeReduction(path, writer=WRITER_API)
+        if reduction.getAnimCurve() != snapshot:
+            print(
+                "< keyframeReduction.parallel.ReductionJob() "
+                "| path: {0} "
+                "| changed-during-reduction >".format(path)
+            )
+            return 0
+
+        change = OpenMayaAnim.MAnimCurveChange()
+        try:
+            rate = reduction.apply(keyframes, self.settings["weightedTangents"], force, change)
+        except Exception as e:
+            change.undoIt()
+            self.addFailed(path, e)
+            return 0
+
+        self._changes.append(change)
+        return rate
+
+    def cancel(self):
+        """
+        Cancel the job, the animation curves that are submitted but not
+        applied yet are discarded. The applied animation curves remain
+        reduced.
+        """
+        self._cancelled = True
+        self._pending.clear()
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def close(self):
+        """
+        Close the process pool and wait for the processes to exit.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def addFailed(self, path, error):
+        """
+        Report the animation curve as failed, the animation curve is left
+        untouched.
+
+        :param str path:
+        :param Exception error:
+        """
+        self._failed.append(path)
+        self._error = str(error)
+        print(
+            "< keyframeReduction.parallel.ReductionJob() "
+            "| path: {0} "
+            "| error: {1} >".format(path, self.error)
+        )
+
+    def addChanges(self):
+        """
+        Add the animation curve changes of the current batch to the undo
+        queue as a single step, the changes are only added once.
+        """
+        if not self._changes:
+            return
+
+        with utils.UndoChunkContext():
+            for change in self._changes:
+                utils.addAnimCurveChange(change)
+
+        self._changes = []
@@ -0,0 +1,625 @@
+import math
+import time
+from collections import OrderedDict, deque
+
+from . import utils
+from . import parallel
+from .classes.fit import fitSegments, FITTER_GREEDY, FITTER_MERGE
+from .classes.split import findTangentSplitAuto, findTangentSplitThreshold, splitPoints, joinSegments
+from .classes.cache import getFingerprint
+from .classes.merge import mergeAnimCurve
+from .classes.sample import getSampleTolerance
+from .classes.exchange import (
+    ExchangeReader,
+    ExchangeWriter,
+    keyframesToArrays,
+    arraysToKeyframes,
+    animCurveToArrays,
+)
+
+try:
+    from .classes.keyframeReduction import KeyframeReduction, SAMPLER_API, WRITER_CMDS
+except ImportError:
+    # maya is not available, the split and fit stages can still be run on
+    # sampled points using any python interpreter.
+    KeyframeReduction = None
+    SAMPLER_API = None
+    WRITER_CMDS = None
+
+
+# ----------------------------------------------------------------------------
+
+
+READ, SAMPLE, SPLIT, FIT, WRITE = range(5)
+
+# the maximum amount of fingerprints the fit stages remember to detect
+# duplicate animation curves, the least recently used fingerprints are
+# forgotten which keeps the memory bounded on long streams.
+DUPLICATE_SIZE = 256
+
+DEFAULT_SETTINGS = {
+    "error": 1,
+    "step": 1,
+    "weightedTangents": True,
+    "tangentSplitAuto": False,
+    "tangentSplitExisting": False,
+    "tangentSplitAngleThreshold": False,
+    "tangentSplitAngleThresholdValue": 15.0,
+    "splitSimplify": False,
+    "fitter": FITTER_GREEDY,
+    "adaptiveSampling": False,
+    "sampler": SAMPLER_API,
+    "writer": WRITER_CMDS,
+    "cache": None,
+}
+
+
+# ----------------------------------------------------------------------------
+
+
+def getMergeSettings(settings):
+    """
+    :param dict settings:
+    :return: Settings used to merge a snapshot of an animation curve
+    :rtype: dict
+    """
+    return dict(
+        parallel.DEFAULT_SETTINGS,
+        error=settings["error"],
+        weightedTangents=settings["weightedTangents"],
+        fitter=FITTER_MERGE,
+    )
+
+
+def getFitArguments(segments, settings):
+    """
+    :param list segments:
+    :param dict settings:
+    :return: Segments and fit settings
+    :rtype: tuple
+    """
+    return (
+        segments,
+        settings["error"],
+        settings["weightedTangents"],
+        settings["splitSimplify"],
+        settings["fitter"],
+    )
+
+
+def getFitted(fitted, fingerprint):
+    """
+    Get the result of an earlier item with the same fingerprint, the
+    fingerprint is marked as the most recently used.
+
+    :param OrderedDict fitted: Results by fingerprint
+    :param str fingerprint:
+    :return: Result
+    :rtype: list/multiprocessing.pool.AsyncResult/None
+    """
+    result = fitted.pop(fingerprint, None)
+    if result is not None:
+        fitted[fingerprint] = result
+
+    return result
+
+
+def setFitted(fitted, fingerprint, result):
+    """
+    Store the result of an item, the least recently used results are
+    removed when more than DUPLICATE_SIZE results are stored.
+
+    :param OrderedDict fitted: Results by fingerprint
+    :param str fingerprint:
+    :param list/multiprocessing.pool.AsyncResult result:
+    """
+    fitted[fingerprint] = result
+    while len(fitted) > DUPLICATE_SIZE:
+        fitted.popitem(last=False)
+
+
+# ----------------------------------------------------------------------------
+
+
+def readStage(curves, settings):
+    """
+    Create a reduction object for each animation curve and read its existing
+    frames.
+
+    :param iterable curves:
+    :param dict settings:
+    :return: Items
+    :rtype: generator
+    """
+    for curve in curves:
+        reduction = KeyframeReduction(curve, settings["sampler"], settings["writer"])
+        frames = reduction.getFrames()
+
+        yield {
+            "path": curve,
+            "time": time.time(),
+            "reduction": reduction,
+            "frames": frames,
+        }
+
+
+def sampleStage(items, settings):
+    """
+    Sample the animation curve of each item between its first and last
+    frame. When the merge fitter is used or when the animation curve is
+    stepped a snapshot of the animation curve is stored instead, the
+    snapshot is merged rather than fitted.
+
+    :param iterable items:
+    :param dict settings:
+    :return: Items
+    :rtype: generator
+    """
+    for item in items:
+        frames = item["frames"]
+        item["start"] = int(math.floor(frames[0]))
+        item["end"] = int(math.ceil(frames[-1])) + 1
+
+        if settings["fitter"] == FITTER_MERGE or item["reduction"].isStepped():
+            item["animCurve"] = item["reduction"].getAnimCurve()
+            yield item
+            continue
+
+        item["points"], item["angles"] = item["reduction"].sample(
+            item["start"],
+            item["end"],
+            settings["step"],
+            getSampleTolerance(settings["error"], settings["adaptiveSampling"])
+        )
+
+        yield item
+
+
+def splitStage(items, settings):
+    """
+    Split the sampled points of each item into segments based on the tangent
+    split settings. The sampled points and angles are released once the
+    segments are created. Items that are merged are not split.
+
+    :param iterable items:
+    :param dict settings:
+    :return: Items
+    :rtype: generator
+    """
+    for item in items:
+        if "animCurve" in item:
+            yield item
+            continue
+
+        points = item.pop("points")
+        angles = item.pop("angles")
+
+        # get split indices
+        split = []
+
+        if settings["tangentSplitAuto"]:
+            split.extend(findTangentSplitAuto(angles))
+        if settings["tangentSplitExisting"]:
+            split.extend(
+                item["reduction"].getTangentSplitExisting(
+                    item["frames"],
+                    item["start"],
+                    item["end"],
+                    settings["step"],
+                    [point[0] for point in points] if settings["adaptiveSampling"] else None
+                )
+            )
+        if settings["tangentSplitAngleThreshold"]:
+            split.extend(findTangentSplitThreshold(angles, settings["tangentSplitAngleThresholdValue"]))
+
+        item["segments"] = splitPoints(points, split)
+        yield item
+
+
+def fitStage(items, settings):
+    """
+    Fit keyframes to the segments of each item in the current process. The
+    segments are released once the keyframes are fitted. Items with the
+    same fingerprint as one of the recent items are not fitted again and
+    are marked as duplicate. When a cache is provided in the settings only segments
+    that are not cached are fitted. Items with a snapshot of the animation
+    curve are merged instead.
+
+    :param iterable items:
+    :param dict settings:
+    :return: Items
+    :rtype: generator
+    """
+    # the cache only returns keyframes fitted from scratch, the same lookup
+    # is used by the parallel fit stage.
+    fit = settings["cache"].fitSegments if settings["cache"] is not None else fitSegments
+    fitted = OrderedDict()
+
+    for item in items:
+        if "animCurve" in item:
+            item["keyframes"] = mergeAnimCurve(item.pop("animCurve"), settings["error"], settings["weightedTangents"])
+            yield item
+            continue
+
+        arguments = getFitArguments(item.pop("segments"), settings)
+        fingerprint = getFingerprint(*arguments)
+
+        keyframes = getFitted(fitted, fingerprint)
+        item["duplicate"] = keyframes is not None
+        if not item["duplicate"]:
+            keyframes = fit(*arguments)
+            setFitted(fitted, fingerprint, keyframes)
+
+        item["keyframes"] = keyframes
+        yield item
+
+
+def writeStage(items, settings):
+    """
+    Apply the keyframes of each item to its animation curve and store the
+    reduction rate. The keyframes are released once they are applied.
+
+    :param iterable items:
+    :param dict settings:
+    :return: Items
+    :rtype: generator
+    """
+    for item in items:
+        keyframes = item.pop("keyframes")
+        item["rate"] = item["reduction"].apply(keyframes, settings["weightedTangents"])
+
+        print(
+            "< keyframeReduction.pipeline "
+            "| path: {0} "
+            "| process-time: {1:,.2f} seconds "
+            "| reduction-rate: {2:,.2f}% >".format(
+                item["path"],
+                time.time() - item["time"],
+                item["rate"]
+            )
+        )
+
+        yield item
+
+
+# ----------------------------------------------------------------------------
+
+
+class ParallelFitStage(object):
+    """
+    Fit stage that spreads the fitting over a process pool. The segments are
+    submitted from the main thread while the earlier stages keep reading
+    and sampling the next animation curves, at most window items are in
+    flight at the same time. The items are yielded in the order they were
+    received. Duplicate items share the result of the first item with the
+    same fingerprint and when a cache is provided in the settings only
+    segments that are not cached are submitted. Items with a snapshot of
+    the animation curve submit the snapshot to be merged instead.
+    ::
+        pipeline = Pipeline(fit=ParallelFitStage(workers=8))
+    """
+    def __init__(self, workers=None, window=64):
+        """
+        :param int/None workers: Number of processes, default is the cpu count
+        :param int window: Maximum number of items in flight
+        """
+        self._workers = workers
+        self._window = max(window, 1)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def workers(self):
+        """
+        :return: Number of processes
+        :rtype: int/None
+        """
+        return self._workers
+
+    @property
+    def window(self):
+        """
+        :return: Maximum number of items in flight
+        :rtype: int
+        """
+        return self._window
+
+    # ------------------------------------------------------------------------
+
+    def __call__(self, items, settings):
+        """
+        :param iterable items:
+        :param dict settings:
+        :return: Items
+        :rtype: generator
+        """
+        pool = parallel.getPool(self.workers)
+        pending = deque()
+        fitted = OrderedDict()
+
+        try:
+            for item in items:
+                # submit snapshot
+                if "animCurve" in item:
+                    arguments = (item.pop("animCurve"), getMergeSettings(settings))
+                    item["merge"] = pool.apply_async(parallel.fitSnapshotWorker, (arguments,))
+                    pending.append(item)
+
+                    if len(pending) >= self.window:
+                        yield self.getResult(pending.popleft(), settings)
+
+                    continue
+
+                # get fingerprint, items with the same fingerprint as a
+                # recent item share its result.
+                arguments = getFitArguments(item.pop("segments"), settings)
+                item["fingerprint"] = getFingerprint(*arguments)
+                item["result"] = getFitted(fitted, item["fingerprint"])
+                item["duplicate"] = item["result"] is not None
+
+                # submit segments, the results are retrieved in the main
+                # thread as the pool threads are not allowed to call maya.
+                if not item["duplicate"]:
+                    item["result"] = self.getCached(item["fingerprint"], settings)
+                    if item["result"] is None:
+                        item["result"] = pool.apply_async(parallel.fitSegmentsWorker, (arguments,))
+
+                    setFitted(fitted, item["fingerprint"], item["result"])
+
+                pending.append(item)
+
+                # yield the oldest item once the window is full
+                if len(pending) >= self.window:
+                    yield self.getResult(pending.popleft(), settings)
+
+            # yield remaining items
+            while pending:
+                yield self.getResult(pending.popleft(), settings)
+        finally:
+            pool.close()
+            pool.join()
+
+    # ------------------------------------------------------------------------
+
+    def getCached(self, fingerprint, settings):
+        """
+        :param str fingerprint:
+        :param dict settings:
+        :return: Cached keyframes
+        :rtype: list/None
+        """
+        if settings["cache"] is not None:
+            arrays = settings["cache"].get(fingerprint)
+            if arrays is not None:
+                return arraysToKeyframes(arrays)
+
+    def getResult(self, item, settings):
+        """
+        Wait for the fitted keyframes of the item, the keyframes are stored
+        in the cache when they are fitted. Merged keyframes are not cached.
+        Duplicate items share the result of the item they duplicate.
+
+        :param dict item:
+        :param dict settings:
+        :return: Item
+        :rtype: dict
+        """
+        if "merge" in item:
+            item["keyframes"] = item.pop("merge").get()
+            return item
+
+        fingerprint = item.pop("fingerprint")
+        result = item.pop("result")
+
+        # get fitted keyframes
+        if not isinstance(result, list):
+            result = result.get()
+            if settings["cache"] is not None and not item["duplicate"]:
+                settings["cache"].set(fingerprint, keyframesToArrays(result))
+
+        item["keyframes"] = result
+        return item
+
+
+# ----------------------------------------------------------------------------
+
+
+class Pipeline(object):
+    """
+    Reduction pipeline that chains the read, sample, split, fit and write
+    stages using generators. Each stage is a callable that takes an iterable
+    of items and the settings and yields the processed items, which means
+    only a handful of animation curves are held in memory at the same time.
+    Any of the stages can be replaced without changing the others.
+    ::
+        pipeline = Pipeline(fit=ParallelFitStage(workers=8))
+        for item in pipeline.run(animationCurves, settings):
+            print(item["path"], item["rate"])
+    """
+    def __init__(
+            self,
+            read=readStage,
+            sample=sampleStage,
+            split=splitStage,
+            fit=fitStage,
+            write=writeStage,
+    ):
+        """
+        :param callable read:
+        :param callable sample:
+        :param callable split:
+        :param callable fit:
+        :param callable write:
+        """
+        self._stages = [read, sample, split, fit, write]
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def stages(self):
+        """
+        :return: Read, sample, split, fit and write stages
+        :rtype: list
+        """
+        return self._stages
+
+    # ------------------------------------------------------------------------
+
+    def run(self, curves, settings, start=READ, end=WRITE):
+        """
+        Run the stages between the start and end stage, both inclusive.
+        When the pipeline doesn't start at the read stage the items have
+        to be provided rather than the animation curves.
+
+        :param iterable curves: Animation curves or items
+        :param dict settings:
+        :param int start:
+        :param int end:
+        :return: Items
+        :rtype: generator
+        """
+        items = curves
+        for stage in self.stages[start:end + 1]:
+            items = stage(items, settings)
+
+        return items
+
+
+# ----------------------------------------------------------------------------
+
+
+def reduceMany(curves, pipeline=None, **settings):
+    """
+    Reduce the number of keyframes on many animation curves by streaming
+    them through a pipeline, the settings match the arguments of the
+    KeyframeReduction class and its reduce method. All changes are wrapped
+    in a single undo chunk.
+
+    :param iterable curves:
+    :param Pipeline/None pipeline: Default pipeline is used when None
+    :return: Reduction rate for each animation curve
+    :rtype: list
+    """
+    # get settings
+    t = time.time()
+    pipeline = pipeline or Pipeline()
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    cache = settings["cache"]
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+    # run pipeline
+    rates, duplicates = [], 0
+    with utils.UndoChunkContext():
+        for item in pipeline.run(curves, settings):
+            rates.append(item["rate"])
+            duplicates += item.get("duplicate", False)
+
+    # get cache statistics
+    statistics = ""
+    if cache is not None:
+        statistics = "| cache-hits: {0} | cache-misses: {1} ".format(
+            cache.hits - hits,
+            cache.misses - misses
+        )
+
+    print(
+        "< keyframeReduction.pipeline.reduceMany() "
+        "| animation-curves: {0} "
+        "| process-time: {1:,.2f} seconds "
+        "| overall-reduction-rate: {2:,.2f}% "
+        "| duplicate-curves: {3} "
+        "{4}>".format(
+            len(rates),
+            time.time() - t,
+            sum(rates) / max(len(rates), 1),
+            duplicates,
+            statistics
+        )
+    )
+
+    return rates
+
+
+# ----------------------------------------------------------------------------
+
+
+def exportSamples(curves, path, pipeline=None, **settings):
+    """
+    Sample and split the animation curves and write the sampled points and
+    split indices to a single file, the settings are stored in the file.
+    The samples can be fitted without Maya using keyframeReduction.offline
+    after which the keyframes can be imported using importKeyframes.
+    Stepped animation curves and animation curves of the merge fitter are
+    not sampled, the keys of these animation curves are written instead
+    and are merged when fitted.
+
+    :param iterable curves:
+    :param str path:
+    :param Pipeline/None pipeline: Default pipeline is used when None
+    :return: Number of exported animation curves
+    :rtype: int
+    """
+    # get settings
+    pipeline = pipeline or Pipeline()
+    settings = dict(DEFAULT_SETTINGS, **settings)
+
+    # write samples, the cache is not stored as it can't be serialized
+    metadata = dict((key, value) for key, value in settings.items() if key != "cache")
+    with ExchangeWriter(path, metadata) as writer:
+        for item in pipeline.run(curves, settings, end=SPLIT):
+            if "animCurve" in item:
+                animCurve = item.pop("animCurve")
+                arrays, keys = animCurveToArrays(animCurve)
+                writer.add(
+                    item["path"],
+                    arrays,
+                    stepped=animCurve.isStepped(),
+                    start=item["start"],
+                    end=item["end"],
+                    **keys
+                )
+                continue
+
+            points, split = joinSegments(item.pop("segments"))
+            writer.add(
+                item["path"],
+                {"times": [p[0] for p in points], "values": [p[1] for p in points]},
+                split=split,
+                stepped=False,
+                start=item["start"],
+                end=item["end"],
+            )
+
+        return len(writer.records)
+
+
+def importKeyframes(path, pipeline=None, **settings):
+    """
+    Apply the keyframes fitted by keyframeReduction.offline to the animation
+    curves they were sampled from using the write stage of the pipeline.
+    The settings default to the settings stored in the file.
+
+    :param str path:
+    :param Pipeline/None pipeline: Default pipeline is used when None
+    :return: Reduction rate for each animation curve
+    :rtype: list
+    """
+    with ExchangeReader(path) as reader:
+        # get settings
+        pipeline = pipeline or Pipeline()
+        settings = dict(DEFAULT_SETTINGS, **dict(reader.metadata, **settings))
+
+        # get items
+        items = (
+            {
+                "path": record["name"],
+                "time": time.time(),
+                "reduction": KeyframeReduction(record["name"], settings["sampler"], settings["writer"]),
+                "keyframes": arraysToKeyframes(reader.getArrays(record)),
+            }
+            for record in reader
+        )
+
+        # run write stage
+        with utils.UndoChunkContext():
+            return [item["rate"] for item in pipeline.run(items, settings, start=WRITE)]
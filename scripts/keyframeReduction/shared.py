@@ -0,0 +1,171 @@
+import math
+import time
+
+from . import utils
+from .classes.split import findTangentSplitAuto, findTangentSplitThreshold, splitPoints
+from .classes.shared import fitSegmentsShared, getRangeIndices, trimKeyframes
+from .classes.keyframeReduction import KeyframeReduction, SAMPLER_API, WRITER_CMDS
+
+
+# ----------------------------------------------------------------------------
+
+
+GROUP_NODE = "node"
+GROUP_PLUG = "plug"
+GROUPS = [GROUP_NODE, GROUP_PLUG]
+
+DEFAULT_SETTINGS = {
+    "error": 1,
+    "step": 1,
+    "weightedTangents": True,
+    "tangentSplitAuto": False,
+    "tangentSplitExisting": False,
+    "tangentSplitAngleThreshold": False,
+    "tangentSplitAngleThresholdValue": 15.0,
+    "sampler": SAMPLER_API,
+    "writer": WRITER_CMDS,
+}
+
+
+# ----------------------------------------------------------------------------
+
+
+def getGroups(animationCurves, group=GROUP_NODE):
+    """
+    Group the animation curves by the node they are connected to or by the
+    attribute of the plug they are connected to. Animation curves that are
+    not connected are placed in a group of their own.
+
+    :param list animationCurves:
+    :param str group: "node" or "plug"
+    :return: Groups of animation curves
+    :rtype: list
+    :raise ValueError: When the group is not supported
+    """
+    if group == GROUP_NODE:
+        data = utils.filterAnimationCurvesByNode(animationCurves)
+    elif group == GROUP_PLUG:
+        data = utils.filterAnimationCurvesByPlug(animationCurves)
+    else:
+        raise ValueError("Group '{}' is not supported, options are {}.".format(group, GROUPS))
+
+    # get groups
+    groups = [data[key] for key in sorted(data)]
+    grouped = set(animationCurve for animationCurvesGroup in groups for animationCurve in animationCurvesGroup)
+    groups.extend([animationCurve] for animationCurve in animationCurves if animationCurve not in grouped)
+
+    return groups
+
+
+# ----------------------------------------------------------------------------
+
+
+def reduceGroup(animationCurves, settings):
+    """
+    Reduce the animation curves of a group using the same key times. The
+    animation curves are sampled between the first and last frame of the
+    group and split at the tangent splits of any of the animation curves
+    and at the first and last frame of every animation curve. The key
+    times that meet the error on every animation curve are applied to all
+    of them within the range of their own keyframes, which keeps the
+    infinity of the animation curves intact. Animation curves that have
+    keyframes outside of those key times get the shared key times even if
+    that doesn't reduce their amount of keyframes.
+
+    :param list animationCurves:
+    :param dict settings:
+    :return: Reduction rate for each animation curve
+    :rtype: list
+    """
+    # get frames of the group
+    reductions = [
+        KeyframeReduction(animationCurve, settings["sampler"], settings["writer"])
+        for animationCurve in animationCurves
+    ]
+    frames = [reduction.getFrames() for reduction in reductions]
+    start = int(math.floor(min(f[0] for f in frames)))
+    end = int(math.ceil(max(f[-1] for f in frames))) + 1
+
+    # sample animation curves and get split indices of all animation curves
+    samples = []
+    split = set()
+
+    for reduction, original in zip(reductions, frames):
+        points, angles = reduction.sample(start, end, settings["step"])
+        samples.append(points)
+
+        if settings["tangentSplitAuto"]:
+            split.update(findTangentSplitAuto(angles))
+        if settings["tangentSplitExisting"]:
+            split.update(reduction.getTangentSplitExisting(original, start, end, settings["step"]))
+        if settings["tangentSplitAngleThreshold"]:
+            split.update(findTangentSplitThreshold(angles, settings["tangentSplitAngleThresholdValue"]))
+
+    # split at the range of each animation curve
+    sampleFrames = [point[0] for point in samples[0]]
+    ranges = [getRangeIndices(sampleFrames, original) for original in frames]
+    split.update(i for indices in ranges for i in indices if 0 < i < len(sampleFrames) - 1)
+
+    # fit animation curves using shared key times
+    keyframes = fitSegmentsShared(
+        [splitPoints(points, sorted(split)) for points in samples],
+        settings["error"],
+        settings["weightedTangents"],
+        [reduction.isStepped() for reduction in reductions],
+    )
+    keyframes = [
+        trimKeyframes(channel, sampleFrames[first], sampleFrames[last])
+        for channel, (first, last) in zip(keyframes, ranges)
+    ]
+
+    # apply keyframes, keyframes that are not reduced are only forced if
+    # the animation curve has keyframes outside of the shared key times.
+    rates = []
+    for reduction, original, channel in zip(reductions, frames, keyframes):
+        times = set(keyframe.point[0] for keyframe in channel)
+        rates.append(reduction.apply(channel, settings["weightedTangents"], not times.issuperset(original)))
+
+    return rates
+
+
+def reduceAnimationCurves(animationCurves, group=GROUP_NODE, **settings):
+    """
+    Reduce the number of keyframes on multiple animation curves, the
+    animation curves are grouped by node or by plug and every group is
+    reduced using a single set of key times. Exporters that store whole
+    keyed frames can drop every frame that is not a shared key time. The
+    settings match the arguments of the KeyframeReduction class and its
+    reduce method, the fitter, split simplify and adaptive sampling
+    settings are not used. All changes are wrapped in a single undo chunk.
+
+    :param list animationCurves:
+    :param str group: "node" or "plug"
+    :return: Reduction rate for each animation curve
+    :rtype: list
+    """
+    # get settings
+    t = time.time()
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    groups = getGroups(animationCurves, group)
+
+    # reduce groups
+    rates = {}
+    with utils.UndoChunkContext():
+        for animationCurvesGroup in groups:
+            rates.update(zip(animationCurvesGroup, reduceGroup(animationCurvesGroup, settings)))
+
+    rates = [rates[animationCurve] for animationCurve in animationCurves]
+    print(
+        "< keyframeReduction.shared.reduceAnimationCurves() "
+        "| animation-curves: {0} "
+        "| groups: {1} "
+        "| process-time: {2:,.2f} seconds "
+        "| overall-reduction-rate: {3:,.2f}% >".format(
+            len(rates),
+            len(groups),
+            time.time() - t,
+            sum(rates) / max(len(rates), 1)
+        )
+    )
+
+    return rates
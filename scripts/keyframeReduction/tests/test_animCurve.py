@@ -0,0 +1,106 @@
+import math
+import unittest
+
+from keyframeReduction.classes.fit import FitBezier
+from keyframeReduction.classes.animCurve import (
+    AnimCurve,
+    STEP,
+    INFINITY_LINEAR,
+    INFINITY_CYCLE,
+    INFINITY_CYCLE_RELATIVE,
+    INFINITY_OSCILLATE,
+)
+
+
+# ----------------------------------------------------------------------------
+
+
+def getLinearAnimCurve(weightedTangents=False, **kwargs):
+    """
+    :param bool weightedTangents:
+    :return: Animation curve going from 0 to 10 in 10 frames
+    :rtype: AnimCurve
+    """
+    weight = math.sqrt(2) * 10 / 3.0
+    return AnimCurve(
+        [0, 10],
+        [0, 10],
+        [45, 45],
+        [45, 45],
+        [weight, weight],
+        [weight, weight],
+        weightedTangents=weightedTangents,
+        **kwargs
+    )
+
+
+# ----------------------------------------------------------------------------
+
+
+class AnimCurveTest(unittest.TestCase):
+    def testEvaluateKeys(self):
+        animCurve = AnimCurve([0, 5, 12], [1, -3, 4], [0, 30, -10], [0, 30, -10])
+        for time, value in zip(animCurve.times, animCurve.values):
+            self.assertAlmostEqual(animCurve.evaluate(time), value)
+
+    def testEvaluateLinear(self):
+        for weightedTangents in [False, True]:
+            animCurve = getLinearAnimCurve(weightedTangents)
+            for frame in [0.5, 2.25, 5, 7.75, 9.5]:
+                self.assertAlmostEqual(animCurve.evaluate(frame), frame)
+
+    def testEvaluateStepped(self):
+        animCurve = AnimCurve([0, 10], [2, 8], [0, 0], [0, 0], outTangentTypes=[STEP, STEP])
+        self.assertEqual(animCurve.evaluateFrames([0, 5, 9.9, 10]), [2, 2, 2, 8])
+
+    def testEvaluateEmpty(self):
+        self.assertEqual(AnimCurve([], [], [], []).evaluate(5), 0.0)
+
+    def testInfinity(self):
+        self.assertEqual(getLinearAnimCurve().evaluateFrames([-5, 15]), [0, 10])
+
+        animCurve = getLinearAnimCurve(preInfinity=INFINITY_LINEAR, postInfinity=INFINITY_LINEAR)
+        self.assertAlmostEqual(animCurve.evaluate(-5), -5)
+        self.assertAlmostEqual(animCurve.evaluate(15), 15)
+
+        animCurve = getLinearAnimCurve(postInfinity=INFINITY_CYCLE)
+        self.assertAlmostEqual(animCurve.evaluate(13), 3)
+
+        animCurve = getLinearAnimCurve(postInfinity=INFINITY_CYCLE_RELATIVE)
+        self.assertAlmostEqual(animCurve.evaluate(13), 13)
+
+        animCurve = getLinearAnimCurve(postInfinity=INFINITY_OSCILLATE)
+        self.assertAlmostEqual(animCurve.evaluate(13), 7)
+
+    def testFromKeyframes(self):
+        frames = [float(frame) for frame in range(100)]
+        values = [math.sin(frame * 0.1) * 10 for frame in frames]
+
+        for weightedTangents in [False, True]:
+            keyframes = FitBezier(list(zip(frames, values)), 0.1, weightedTangents).fit()
+            animCurve = AnimCurve.fromKeyframes(keyframes, weightedTangents)
+
+            self.assertEqual(animCurve.times, [keyframe.point[0] for keyframe in keyframes])
+            for value, expected in zip(animCurve.evaluateFrames(frames), values):
+                self.assertAlmostEqual(value, expected, delta=0.2)
+
+    def testEqual(self):
+        animCurve = getLinearAnimCurve()
+
+        self.assertEqual(animCurve, getLinearAnimCurve())
+        self.assertFalse(animCurve != getLinearAnimCurve())
+        self.assertNotEqual(animCurve, getLinearAnimCurve(weightedTangents=True))
+        self.assertNotEqual(animCurve, getLinearAnimCurve(postInfinity=INFINITY_CYCLE))
+        self.assertNotEqual(animCurve, getLinearAnimCurve(outTangentTypes=[STEP, STEP]))
+        self.assertNotEqual(animCurve, None)
+
+    def testGetSegments(self):
+        animCurve = getLinearAnimCurve()
+        segments = animCurve.getSegments()
+
+        self.assertEqual(len(segments), 1)
+        self.assertEqual([point[0] for point in segments[0]], [float(frame) for frame in range(11)])
+
+
+if __name__ == "__main__":
+    unittest.main()
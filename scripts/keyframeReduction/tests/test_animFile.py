@@ -0,0 +1,169 @@
+import os
+import math
+import shutil
+import tempfile
+import unittest
+
+from keyframeReduction import animFile
+from keyframeReduction.classes.animCurve import AnimCurve
+
+
+# ----------------------------------------------------------------------------
+
+
+HEADER = [
+    "animVersion 1.1;\n",
+    "mayaVersion 2018;\n",
+    "timeUnit film;\n",
+    "startTime 0;\n",
+    "endTime 199;\n",
+]
+
+
+# ----------------------------------------------------------------------------
+
+
+def getBlock(attribute, keyLines):
+    """
+    :param str attribute:
+    :param list keyLines:
+    :return: Lines of an anim block
+    :rtype: list
+    """
+    lines = [
+        "anim translate.{0} {0} pCube1 0 1 0;\n".format(attribute),
+        "animData {\n",
+        "  input time;\n",
+        "  output linear;\n",
+        "  weighted 0;\n",
+        "  preInfinity constant;\n",
+        "  postInfinity constant;\n",
+        "  keys {\n",
+    ]
+    lines.extend("    {}\n".format(line) for line in keyLines)
+    lines.extend(["  }\n", "}\n"])
+    return lines
+
+
+def getSineKeyLines(length=200):
+    """
+    :param int length:
+    :return: Key lines of a sine with linear tangents on every frame
+    :rtype: list
+    """
+    return [
+        "{0} {1:.10g} linear linear 1 1 0;".format(frame, math.sin(frame * 0.1) * 10)
+        for frame in range(length)
+    ]
+
+
+def getAnimCurve(lines):
+    """
+    :param list lines: Lines of an anim block
+    :return: Animation curve of the keys in the block
+    :rtype: AnimCurve
+    """
+    keys = [animFile.parseKey(line) for line in lines if line.strip()[:1].isdigit()]
+    animFile.resolveTangents(keys)
+
+    return AnimCurve(
+        [key["time"] for key in keys],
+        [key["value"] for key in keys],
+        [key["inAngle"] for key in keys],
+        [key["outAngle"] for key in keys],
+        [key["inWeight"] for key in keys],
+        [key["outWeight"] for key in keys],
+        weightedTangents=any(line.strip() == "weighted 1;" for line in lines),
+    )
+
+
+# ----------------------------------------------------------------------------
+
+
+class ParseKeyTest(unittest.TestCase):
+    def testParseFixed(self):
+        key = animFile.parseKey("5 2.5 fixed fixed 1 1 0 30 1.5 -10 2;")
+
+        self.assertEqual(key["time"], 5.0)
+        self.assertEqual(key["value"], 2.5)
+        self.assertEqual([key["inType"], key["outType"]], ["fixed", "fixed"])
+        self.assertEqual([key["inAngle"], key["inWeight"]], [30.0, 1.5])
+        self.assertEqual([key["outAngle"], key["outWeight"]], [-10.0, 2.0])
+        self.assertEqual(key["suffix"], ["1", "1", "0"])
+
+    def testParseLinear(self):
+        key = animFile.parseKey("5 2.5 linear step 1 1 0;")
+
+        self.assertEqual([key["inType"], key["outType"]], ["linear", "step"])
+        self.assertIsNone(key["inAngle"])
+        self.assertIsNone(key["outAngle"])
+
+    def testParseUnknownTangentTypes(self):
+        self.assertIsNone(animFile.parseKey("5 2.5 custom custom 1 1 0;"))
+        self.assertIsNone(animFile.parseKey("5 2.5 linear custom 1 1 0;"))
+        self.assertIsNone(animFile.parseKey("5 2.5 auto auto 1 1 0;"))
+        self.assertIsNone(animFile.parseKey("5 2.5 linear clamped 1 1 0;"))
+        self.assertIsNone(animFile.parseKey("5 2.5 linear;"))
+        self.assertIsNone(animFile.parseKey("5;"))
+
+
+class ReduceFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.directory, "input.anim")
+        self.outputPath = os.path.join(self.directory, "output.anim")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reduceFile(self, lines, **settings):
+        """
+        :param list lines:
+        :return: Counts and lines of the reduced file
+        :rtype: tuple
+        """
+        with open(self.inputPath, "w") as f:
+            f.writelines(lines)
+
+        counts = animFile.reduceFile(self.inputPath, self.outputPath, **settings)
+        with open(self.outputPath, "r") as f:
+            return counts, f.readlines()
+
+    def testReduceFile(self):
+        block = getBlock("translateX", getSineKeyLines())
+        (curves, keys, reducedKeys), lines = self.reduceFile(HEADER + block, error=0.1)
+
+        self.assertEqual((curves, keys), (1, 200))
+        self.assertLess(reducedKeys, keys)
+        self.assertEqual(lines[:len(HEADER) + 1], HEADER + block[:1])
+        self.assertIn("  weighted 1;\n", lines)
+
+        original = getAnimCurve(block)
+        reduced = getAnimCurve(lines)
+        self.assertEqual(len(reduced.times), reducedKeys)
+        for frame in range(200):
+            self.assertAlmostEqual(reduced.evaluate(frame), original.evaluate(frame), delta=0.2)
+
+    def testUnknownTangentTypes(self):
+        keyLines = getSineKeyLines()
+        keyLines[10] = keyLines[10].replace("linear linear", "linear custom")
+        lines = HEADER + getBlock("translateX", keyLines) + getBlock("translateY", getSineKeyLines())
+
+        (curves, keys, reducedKeys), reducedLines = self.reduceFile(lines, error=0.1)
+
+        self.assertEqual((curves, keys), (2, 400))
+        self.assertEqual(reducedLines[:len(HEADER) + len(keyLines) + 10], lines[:len(HEADER) + len(keyLines) + 10])
+
+    def testUnresolvedTangentTypes(self):
+        keyLines = [line.replace("linear linear", "clamped clamped") for line in getSineKeyLines()]
+        lines = HEADER + getBlock("translateX", keyLines)
+
+        self.assertEqual(self.reduceFile(lines, error=0.1), ((1, 200, 200), lines))
+
+    def testUnreducible(self):
+        lines = HEADER + getBlock("translateX", ["0 0 linear linear 1 1 0;", "10 5 linear linear 1 1 0;"])
+        self.assertEqual(self.reduceFile(lines), ((1, 2, 2), lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
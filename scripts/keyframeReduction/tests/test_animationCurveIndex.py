@@ -0,0 +1,105 @@
+import unittest
+
+try:
+    from maya import standalone
+    standalone.initialize()
+
+    from maya import cmds
+    from keyframeReduction import utils
+    from keyframeReduction.classes.animationCurveIndex import AnimationCurveIndex
+except ImportError:
+    # the index can only be used when maya is available
+    cmds = None
+
+
+# ----------------------------------------------------------------------------
+
+
+def createAnimatedNode(name, attributes):
+    """
+    :param str name:
+    :param list attributes:
+    :return: Full path of the node
+    :rtype: str
+    """
+    node = cmds.createNode("transform", name=name)
+    for attribute in attributes:
+        keyAttribute(node, attribute)
+
+    return cmds.ls(node, long=True)[0]
+
+
+def keyAttribute(node, attribute):
+    """
+    :param str node:
+    :param str attribute:
+    """
+    for frame in range(10):
+        cmds.setKeyframe(node, attribute=attribute, time=frame, value=frame * 0.5)
+
+
+# ----------------------------------------------------------------------------
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestAnimationCurveIndex(unittest.TestCase):
+    def setUp(self):
+        cmds.file(new=True, force=True)
+        self.node = createAnimatedNode("node", ["translateX", "translateY"])
+        self.index = AnimationCurveIndex()
+        self.index.registerCallbacks()
+
+    def tearDown(self):
+        self.index.removeCallbacks()
+
+    def getExpected(self, nodes):
+        """
+        :param list nodes:
+        :return: Animation curves grouped by plug queried without the index
+        :rtype: dict
+        """
+        return utils.filterAnimationCurvesByPlug(sorted(utils.getAnimationCurves(nodes)))
+
+    def assertIndexed(self, nodes):
+        """
+        :param list nodes:
+        """
+        data = self.index.getAnimationCurvesByPlug(nodes)
+        self.assertEqual(
+            dict((attribute, sorted(animationCurves)) for attribute, animationCurves in data.items()),
+            self.getExpected(nodes)
+        )
+
+    def testAnimationCurvesByPlug(self):
+        animationCurve = cmds.listConnections(self.node + ".translateX", source=True, destination=False)[0]
+
+        self.assertIndexed([self.node])
+        self.assertIndexed([self.node, animationCurve])
+        self.assertEqual(self.index.getAnimationCurveAttribute(animationCurve), "translateX")
+
+    def testConnectionChanged(self):
+        self.assertIndexed([self.node])
+
+        # keying a new attribute connects a new animation curve
+        keyAttribute(self.node, "translateZ")
+        self.assertIn("translateZ", self.index.getAnimationCurvesByPlug([self.node]))
+        self.assertIndexed([self.node])
+
+    def testNodeRemoved(self):
+        self.assertIndexed([self.node])
+
+        animationCurve = cmds.listConnections(self.node + ".translateX", source=True, destination=False)[0]
+        cmds.delete(animationCurve)
+        self.assertNotIn("translateX", self.index.getAnimationCurvesByPlug([self.node]))
+        self.assertIndexed([self.node])
+
+    def testSceneChanged(self):
+        self.assertIndexed([self.node])
+
+        cmds.file(new=True, force=True)
+        self.node = createAnimatedNode("node", ["rotateX"])
+        self.assertIndexed([self.node])
+
+
+if __name__ == "__main__":
+    unittest.main()
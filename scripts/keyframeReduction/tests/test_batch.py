@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from maya import standalone
+    standalone.initialize()
+
+    from maya import cmds
+    from keyframeReduction import batch
+except ImportError:
+    # the scene files can only be reduced when maya is available
+    cmds = None
+
+
+# ----------------------------------------------------------------------------
+
+
+def createScene(path):
+    """
+    :param str path:
+    :return: Number of keyframes of the baked animation curve
+    :rtype: int
+    """
+    cmds.file(new=True, force=True)
+    node = cmds.createNode("transform", name="node")
+    for frame in range(50):
+        cmds.setKeyframe(node, attribute="translateX", time=frame, value=frame * 0.5)
+
+    cmds.file(rename=path)
+    cmds.file(save=True, force=True, type="mayaAscii")
+    cmds.file(new=True, force=True)
+
+    return 50
+
+
+# ----------------------------------------------------------------------------
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testGetFiles(self):
+        paths = [os.path.join(self.directory, name) for name in ["a.ma", "b.ma", "c.mb"]]
+        for path in paths:
+            open(path, "w").close()
+
+        fileList = os.path.join(self.directory, "files.txt")
+        with open(fileList, "w") as f:
+            f.write("{}\n\n{}\n".format(paths[2], paths[0]))
+
+        # duplicate files are removed and the order is preserved
+        files = batch.getFiles([os.path.join(self.directory, "*.ma")], [fileList])
+        self.assertEqual(files, [os.path.abspath(path) for path in [paths[0], paths[1], paths[2]]])
+
+    def testGetOutputPath(self):
+        path = os.path.join(self.directory, "a.ma")
+        self.assertEqual(batch.getOutputPath(path), path)
+        self.assertEqual(
+            batch.getOutputPath(path, "reduced"),
+            os.path.join(os.path.abspath("reduced"), "a.ma")
+        )
+
+    def testReduceFile(self):
+        path = os.path.join(self.directory, "scene.ma")
+        count = createScene(path)
+        output = os.path.join(self.directory, "reduced")
+        os.makedirs(output)
+
+        arguments = (path, output, None, None, None, (None, 0), {"error": 0.1})
+        summary = batch.reduceFile(arguments)
+
+        self.assertNotIn("error", summary)
+        self.assertEqual(summary["output"], os.path.join(output, "scene.ma"))
+        self.assertEqual(len(summary["animation-curves"]), 1)
+        self.assertGreater(summary["reduction-rate"], 0)
+
+        # the reduced file is saved to the output directory
+        cmds.file(summary["output"], open=True, force=True)
+        animCurve = cmds.ls(type="animCurve")[0]
+        self.assertLess(cmds.keyframe(animCurve, query=True, keyframeCount=True), count)
+
+    def testReduceFileError(self):
+        # errors are stored in the summary rather than raised
+        path = os.path.join(self.directory, "missing.ma")
+        summary = batch.reduceFile((path, None, None, None, None, (None, 0), {"error": 0.1}))
+        self.assertIn("error", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import math
+import shutil
+import tempfile
+import unittest
+
+from keyframeReduction.classes.fit import fitSegments
+from keyframeReduction.classes.cache import FitCache, getFingerprint, CACHE_EXTENSION
+
+
+# ----------------------------------------------------------------------------
+
+
+def getSegments(length=200, offset=0.0):
+    """
+    :param int length:
+    :param float offset:
+    :return: Segments of a sine split in the middle
+    :rtype: list
+    """
+    points = [(float(frame), math.sin(frame * 0.1) * 10 + offset) for frame in range(length)]
+    return [points[:length // 2 + 1], points[length // 2:]]
+
+
+def getPoints(keyframes):
+    """
+    :param list keyframes:
+    :return: Point, in handle and out handle of each keyframe
+    :rtype: list
+    """
+    return [(keyframe.point, keyframe.inHandle, keyframe.outHandle) for keyframe in keyframes]
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testFingerprint(self):
+        segments = getSegments()
+
+        self.assertEqual(getFingerprint(segments, 0.1, True), getFingerprint(getSegments(), 0.1, True))
+        self.assertNotEqual(getFingerprint(segments, 0.1, True), getFingerprint(segments, 0.2, True))
+        self.assertNotEqual(getFingerprint(segments, 0.1, True), getFingerprint(segments, 0.1, False))
+        self.assertNotEqual(getFingerprint(segments, 0.1, True), getFingerprint(getSegments(offset=1), 0.1, True))
+
+    def testMemory(self):
+        cache = FitCache()
+        segments = getSegments()
+        expected = getPoints(fitSegments(segments, 0.1))
+
+        self.assertEqual(getPoints(cache.fitSegments(segments, 0.1)), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(getPoints(cache.fitSegments(getSegments(), 0.1)), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.fitSegments(segments, 0.2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def testMemorySize(self):
+        cache = FitCache(size=2)
+        for offset in range(3):
+            cache.fitSegments(getSegments(offset=offset), 0.1)
+
+        cache.fitSegments(getSegments(offset=0), 0.1)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+    def testDisk(self):
+        segments = getSegments()
+        expected = getPoints(FitCache(path=self.directory).fitSegments(segments, 0.1))
+
+        cache = FitCache(path=self.directory)
+        self.assertEqual(getPoints(cache.fitSegments(segments, 0.1)), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(len(cache.getFiles()), 1)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(cache.getFiles()[0])])
+
+    def testDiskRemoved(self):
+        cache = FitCache(path=self.directory)
+        cache.fitSegments(getSegments(), 0.1)
+        for f in cache.getFiles():
+            os.remove(f)
+
+        cache = FitCache(path=self.directory)
+        cache.fitSegments(getSegments(), 0.1)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def testDiskCorrupted(self):
+        segments = getSegments()
+        expected = getPoints(fitSegments(segments, 0.1))
+
+        # truncated files and files of uneven arrays are removed
+        for size in [-8, -1, 8]:
+            cache = FitCache(path=self.directory)
+            cache.fitSegments(segments, 0.1)
+            path = cache.getFiles()[0]
+            with open(path, "rb+") as f:
+                f.truncate(os.path.getsize(path) + size)
+
+            cache = FitCache(path=self.directory)
+            self.assertIsNone(cache.get(cache.getKey(segments, 0.1, True)))
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertFalse(cache.getFiles())
+
+            self.assertEqual(getPoints(cache.fitSegments(segments, 0.1)), expected)
+            self.assertEqual(len(cache.getFiles()), 1)
+
+    def testEviction(self):
+        cache = FitCache(size=1, path=self.directory, maxBytes=4096)
+        for offset in range(20):
+            cache.fitSegments(getSegments(offset=offset), 0.1)
+
+        sizes = [os.path.getsize(f) for f in cache.getFiles()]
+        self.assertTrue(sizes)
+        self.assertLessEqual(sum(sizes), 4096)
+        self.assertFalse([f for f in os.listdir(self.directory) if not f.endswith(CACHE_EXTENSION)])
+
+    def testClear(self):
+        cache = FitCache(path=self.directory)
+        cache.fitSegments(getSegments(), 0.1)
+        cache.clear()
+
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        self.assertFalse(os.listdir(self.directory))
+
+        cache.fitSegments(getSegments(), 0.1)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+
+class FitCacheRefitTest(unittest.TestCase):
+    def testRefit(self):
+        cache = FitCache(hierarchySize=4)
+        segments = getSegments()
+
+        cache.fitSegments(segments, 0.1, refit=True)
+        keyframes = cache.fitSegments(segments, 0.5, refit=True)
+        self.assertEqual(cache.refits, 1)
+        self.assertEqual(keyframes[0].point, segments[0][0])
+        self.assertEqual(keyframes[-1].point, segments[-1][-1])
+
+        # refitted keyframes are identical to keyframes fitted from scratch
+        # and are cached.
+        self.assertEqual(getPoints(keyframes), getPoints(fitSegments(segments, 0.5)))
+        self.assertEqual(getPoints(cache.fitSegments(segments, 0.5)), getPoints(keyframes))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def testRefitCached(self):
+        cache = FitCache(hierarchySize=4)
+        segments = getSegments()
+
+        cache.fitSegments(segments, 0.1, refit=True)
+        cache.fitSegments(segments, 0.1, refit=True)
+        self.assertEqual((cache.hits, cache.misses, cache.refits), (1, 1, 0))
+
+    def testRefitDisabled(self):
+        segments = getSegments()
+
+        for cache, refit in [(FitCache(hierarchySize=4), False), (FitCache(), True)]:
+            cache.fitSegments(segments, 0.1, refit=refit)
+            cache.fitSegments(segments, 0.5, refit=refit)
+            self.assertEqual(cache.refits, 0)
+
+    def testRefitSplitSimplify(self):
+        cache = FitCache(hierarchySize=4)
+        segments = getSegments()
+
+        cache.fitSegments(segments, 0.1, splitSimplify=True, refit=True)
+        keyframes = cache.fitSegments(segments, 0.5, splitSimplify=True, refit=True)
+
+        self.assertEqual(cache.refits, 0)
+        self.assertEqual(getPoints(keyframes), getPoints(fitSegments(segments, 0.5, splitSimplify=True)))
+
+
+if __name__ == "__main__":
+    unittest.main()
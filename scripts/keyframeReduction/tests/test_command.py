@@ -0,0 +1,80 @@
+import unittest
+
+try:
+    from maya import standalone
+    standalone.initialize()
+
+    from maya import cmds
+    from keyframeReduction import utils
+    from keyframeReduction.command import KeyframeReductionCommand
+    from keyframeReduction.classes.keyframeReduction import KeyframeReduction, WRITER_API
+except ImportError:
+    # the command can only be run when maya is available
+    cmds = None
+
+from keyframeReduction.classes.animCurve import AnimCurve
+
+
+# ----------------------------------------------------------------------------
+
+
+def createAnimatedNode(name, parent=None):
+    """
+    :param str name:
+    :param str/None parent:
+    :return: Node and its baked translate x animation curve
+    :rtype: tuple
+    """
+    node = cmds.createNode("transform", name=name, parent=parent)
+    for frame in range(25):
+        cmds.setKeyframe(node, attribute="translateX", time=frame, value=frame * 0.5)
+
+    animCurve = cmds.listConnections(node + ".translateX", source=True, destination=False)[0]
+    return cmds.ls(node, long=True)[0], animCurve
+
+
+# ----------------------------------------------------------------------------
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestKeyframeReductionCommand(unittest.TestCase):
+    def setUp(self):
+        cmds.file(new=True, force=True)
+        utils.loadPlugin()
+
+    def testUndoRedo(self):
+        node, animCurve = createAnimatedNode("node")
+        cmds.keyframeReduction(node, error=0.01)
+        self.assertEqual(cmds.keyframe(animCurve, query=True, keyframeCount=True), 2)
+
+        cmds.undo()
+        self.assertEqual(cmds.keyframe(animCurve, query=True, keyframeCount=True), 25)
+
+        cmds.redo()
+        self.assertEqual(cmds.keyframe(animCurve, query=True, keyframeCount=True), 2)
+
+    def testNonUniqueNames(self):
+        # both nodes are named "node", only the provided one is reduced
+        nodeA, animCurveA = createAnimatedNode("node", cmds.createNode("transform", name="a"))
+        nodeB, animCurveB = createAnimatedNode("node", cmds.createNode("transform", name="b"))
+        cmds.keyframeReduction(nodeA, error=0.01)
+
+        self.assertEqual(cmds.keyframe(animCurveA, query=True, keyframeCount=True), 2)
+        self.assertEqual(cmds.keyframe(animCurveB, query=True, keyframeCount=True), 25)
+
+    def testAtomic(self):
+        # the second animation curve doesn't exist, the changes made to the
+        # first animation curve are undone before the error is raised.
+        node, animCurve = createAnimatedNode("node")
+        reduced = AnimCurve([0.0, 24.0], [0.0, 12.0], [26.565, 26.565], [26.565, 26.565])
+
+        command = KeyframeReductionCommand()
+        command._reductions = [
+            (KeyframeReduction(animCurve, writer=WRITER_API), reduced),
+            (KeyframeReduction("missingAnimCurve", writer=WRITER_API), reduced),
+        ]
+
+        with self.assertRaises(RuntimeError):
+            command.redoIt()
+
+        self.assertEqual(cmds.keyframe(animCurve, query=True, keyframeCount=True), 25)
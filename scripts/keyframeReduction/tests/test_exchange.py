@@ -0,0 +1,121 @@
+import os
+import math
+import shutil
+import tempfile
+import unittest
+
+from keyframeReduction.classes import exchange
+from keyframeReduction.classes.fit import FitBezier
+from keyframeReduction.classes.animCurve import AnimCurve, STEP, STEP_NEXT
+from keyframeReduction.classes.exchange import (
+    ExchangeWriter,
+    ExchangeReader,
+    keyframesToArrays,
+    arraysToKeyframes,
+    animCurveToArrays,
+    arraysToAnimCurve,
+)
+
+
+# ----------------------------------------------------------------------------
+
+
+class ExchangeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "samples.kfr")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRoundTrip(self):
+        records = [
+            ("animCurve1", {"times": [0.0, 1.0, 2.0], "values": [0.5, -1.5, 2.25]}, [1]),
+            ("animCurve2", {"times": [], "values": []}, []),
+            ("animCurve3", {"times": [10.0], "values": [3.0]}, []),
+        ]
+
+        with ExchangeWriter(self.path, {"step": 1}) as writer:
+            for name, arrays, split in records:
+                writer.add(name, arrays, split=split)
+
+        with ExchangeReader(self.path) as reader:
+            self.assertEqual(reader.metadata, {"step": 1})
+            self.assertEqual(len(reader), len(records))
+
+            for record, (name, arrays, split) in zip(reader, records):
+                self.assertEqual(record["name"], name)
+                self.assertEqual(record["metadata"], {"split": split})
+                for key, values in arrays.items():
+                    self.assertEqual(list(reader.getArray(record, key)), values)
+
+    def testRoundTripWithoutNumpy(self):
+        numpy, exchange.numpy = exchange.numpy, None
+        try:
+            self.testRoundTrip()
+        finally:
+            exchange.numpy = numpy
+
+    def testInvalidFile(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 64)
+
+        self.assertRaises(ValueError, ExchangeReader, self.path)
+
+
+class KeyframeArraysTest(unittest.TestCase):
+    def testRoundTrip(self):
+        points = [(float(frame), math.sin(frame * 0.1) * 10) for frame in range(100)]
+        keyframes = FitBezier(points, 0.1).fit()
+        keyframes[1].outTangentType = STEP
+        keyframes[2].outTangentType = STEP_NEXT
+
+        converted = arraysToKeyframes(keyframesToArrays(keyframes))
+
+        self.assertEqual(len(converted), len(keyframes))
+        for keyframe, expected in zip(converted, keyframes):
+            self.assertEqual(keyframe.point, expected.point)
+            self.assertEqual(keyframe.inHandle, expected.inHandle)
+            self.assertEqual(keyframe.outHandle, expected.outHandle)
+            self.assertEqual(keyframe.outTangentType, expected.outTangentType)
+
+    def testWithoutStepped(self):
+        arrays = keyframesToArrays(FitBezier([(0.0, 0.0), (1.0, 1.0)], 0.1).fit())
+        del arrays["stepped"]
+
+        for keyframe in arraysToKeyframes(arrays):
+            self.assertEqual(keyframe.outTangentType, "fixed")
+
+
+class AnimCurveArraysTest(unittest.TestCase):
+    def testRoundTrip(self):
+        animCurve = AnimCurve(
+            [0.0, 10.0, 20.0],
+            [0.0, 5.0, 1.0],
+            [0.0, 20.0, -10.0],
+            [0.0, 20.0, -10.0],
+            [1.0, 2.0, 3.0],
+            [3.0, 2.0, 1.0],
+            ["fixed", "fixed", "step"],
+            ["step", "stepnext", "step"],
+            weightedTangents=True,
+        )
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "keys.kfr")
+
+        try:
+            with ExchangeWriter(path) as writer:
+                arrays, metadata = animCurveToArrays(animCurve)
+                writer.add("animCurve", arrays, **metadata)
+
+            with ExchangeReader(path) as reader:
+                record = reader.records[0]
+                converted = arraysToAnimCurve(reader.getArrays(record), record["metadata"])
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(converted, animCurve)
+
+
+if __name__ == "__main__":
+    unittest.main()
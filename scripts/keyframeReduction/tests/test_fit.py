@@ -0,0 +1,364 @@
+import os
+import sys
+import math
+import inspect
+import json
+import unittest
+
+from keyframeReduction.classes import fit
+from keyframeReduction.classes.fit import FitBezier, fitSegments, FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE
+from keyframeReduction.classes.animCurve import AnimCurve, STEP
+
+
+# ----------------------------------------------------------------------------
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "data", "fitBaseline.json")
+BASELINE_TOLERANCE = 1e-6
+BENCHMARK_PATH = os.path.join(os.path.dirname(__file__), "data", "layeredBenchmark.json")
+
+
+# ----------------------------------------------------------------------------
+
+
+def getSinePoints(length=200):
+    """
+    :param int length:
+    :return: Points of the sine the baseline is fitted to
+    :rtype: list
+    """
+    return [(float(frame), math.sin(frame * 0.1) * 10) for frame in range(length)]
+
+
+def getDetailPoints(length=200):
+    """
+    :param int length:
+    :return: Points of a sine with a detail sine on top
+    :rtype: list
+    """
+    return [(float(frame), math.sin(frame * 0.05) * 10 + math.sin(frame * 0.3)) for frame in range(length)]
+
+
+def getMaxDistance(animCurve, points, error, samples=200):
+    """
+    Get the max distance of the points to the animation curve, the distance
+    of each point is measured to the curve evaluated within the error of
+    the time of the point. This is the distance the fitter keeps below the
+    error.
+
+    :param AnimCurve animCurve:
+    :param list points:
+    :param float error:
+    :param int samples:
+    :return: Max distance
+    :rtype: float
+    """
+    maxDistance = 0
+    for frame, value in points:
+        offsets = [error * (2.0 * i / samples - 1) for i in range(samples + 1)]
+        distance = min(math.hypot(offset, animCurve.evaluate(frame + offset) - value) for offset in offsets)
+        maxDistance = max(maxDistance, distance)
+
+    return maxDistance
+
+
+def getKeyframeData(keyframes):
+    """
+    :param list keyframes:
+    :return: Point, in handle and out handle of each keyframe
+    :rtype: list
+    """
+    return [[keyframe.point, keyframe.inHandle, keyframe.outHandle] for keyframe in keyframes]
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitBezierBaselineTest(unittest.TestCase):
+    def setUp(self):
+        with open(BASELINE_PATH, "r") as f:
+            self.cases = json.load(f)["cases"]
+
+    def assertBaseline(self, keyframes, expected):
+        """
+        :param list keyframes:
+        :param list expected:
+        """
+        self.assertEqual(len(keyframes), len(expected))
+
+        for data, expectedData in zip(getKeyframeData(keyframes), expected):
+            for vector, expectedVector in zip(data, expectedData):
+                if expectedVector is None:
+                    self.assertIsNone(vector)
+                    continue
+
+                for value, expectedValue in zip(vector, expectedVector):
+                    self.assertAlmostEqual(value, expectedValue, delta=BASELINE_TOLERANCE)
+
+    def testBaseline(self):
+        for case in self.cases:
+            keyframes = FitBezier(getSinePoints(), case["error"], case["weightedTangents"]).fit()
+            self.assertBaseline(keyframes, case["keyframes"])
+
+    def testBaselineWithoutNumpy(self):
+        numpy, fit.numpy = fit.numpy, None
+        try:
+            self.testBaseline()
+        finally:
+            fit.numpy = numpy
+
+    def testFitArrays(self):
+        points = getSinePoints()
+        times, values, inHandles, outHandles = FitBezier.fromArrays(
+            [point[0] for point in points],
+            [point[1] for point in points],
+            0.1
+        ).fitArrays()
+        keyframes = FitBezier(points, 0.1).fit()
+
+        self.assertEqual(times, [keyframe.point[0] for keyframe in keyframes])
+        self.assertEqual(values, [keyframe.point[1] for keyframe in keyframes])
+        self.assertEqual(inHandles, [keyframe.inHandle for keyframe in keyframes])
+        self.assertEqual(outHandles, [keyframe.outHandle for keyframe in keyframes])
+        self.assertIsNone(inHandles[0])
+        self.assertIsNone(outHandles[-1])
+
+    def testEmpty(self):
+        self.assertFalse(FitBezier([], 0.1).fit())
+
+    def testSinglePoint(self):
+        keyframes = FitBezier([(0.0, 1.0)], 0.1).fit()
+        self.assertEqual(len(keyframes), 1)
+        self.assertEqual(keyframes[0].point, (0.0, 1.0))
+
+    def testWorkQueue(self):
+        # the max error of an exponential curve is always found near its
+        # end, which splits the curve more than 30 levels deep. The segments
+        # are fitted from a work queue so the depth of the split tree
+        # doesn't depend on the recursion limit.
+        points = [(float(frame), 1.05 ** frame) for frame in range(400)]
+        expected = getKeyframeData(FitBezier(points, 0.01).fit())
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack()) + 25)
+        try:
+            keyframes = FitBezier(points, 0.01).fit()
+        finally:
+            sys.setrecursionlimit(limit)
+
+        times = [keyframe.point[0] for keyframe in keyframes]
+        self.assertEqual(getKeyframeData(keyframes), expected)
+        self.assertEqual(times, sorted(set(times)))
+        self.assertEqual((times[0], times[-1]), (points[0][0], points[-1][0]))
+
+
+@unittest.skipIf(fit.numpy is None, "numpy is not available")
+class FitBezierNumpyTest(unittest.TestCase):
+    def setUp(self):
+        self.fitter = FitBezier(getDetailPoints(), 0.1)
+        self.first, self.last = 10, 90
+        self.u = self.fitter.chordLengthParameterize(self.first, self.last)
+        self.tan1 = fit.normal(1.0, 0.5)
+        self.tan2 = fit.normal(-1.0, 0.5)
+        self.curve = self.fitter.generateBezier(self.first, self.last, self.u, self.tan1, self.tan2)
+
+    def testLeastSquaresMatrices(self):
+        C, X = self.fitter.leastSquaresMatrices(self.first, self.last, self.u, self.tan1, self.tan2)
+        CNumpy, XNumpy = self.fitter.leastSquaresMatricesNumpy(self.first, self.last, self.u, self.tan1, self.tan2)
+
+        for value, valueNumpy in zip(C[0] + C[1] + X, CNumpy[0] + CNumpy[1] + XNumpy):
+            self.assertAlmostEqual(value, valueNumpy, places=9)
+
+    def testFindMaxError(self):
+        numpy, fit.numpy = fit.numpy, None
+        try:
+            maxError, maxIndex = self.fitter.findMaxError(self.first, self.last, self.curve, self.u)
+        finally:
+            fit.numpy = numpy
+
+        maxErrorNumpy, maxIndexNumpy = self.fitter.findMaxErrorNumpy(self.first, self.last, self.curve, self.u)
+        self.assertAlmostEqual(maxError, maxErrorNumpy, places=9)
+        self.assertEqual(maxIndex, maxIndexNumpy)
+
+    def testReparameterize(self):
+        u = list(self.u)
+        numpy, fit.numpy = fit.numpy, None
+        try:
+            self.fitter.reparameterize(self.first, self.last, u, self.curve)
+        finally:
+            fit.numpy = numpy
+
+        uNumpy = list(self.u)
+        self.fitter.reparameterizeNumpy(self.first, self.last, uNumpy, self.curve)
+        self.assertEqual(len(u), len(uNumpy))
+        for value, valueNumpy in zip(u, uNumpy):
+            self.assertAlmostEqual(value, valueNumpy, places=9)
+
+
+class FitBezierShapeTest(unittest.TestCase):
+    def testLinear(self):
+        for slope in [0.0, 0.5, -2.0]:
+            points = [(float(frame), frame * slope + 1) for frame in range(50)]
+            fitter = FitBezier(points, 0.1)
+            keyframes = fitter.fit()
+
+            self.assertTrue(fitter.isLinear())
+            self.assertEqual([keyframe.point for keyframe in keyframes], [points[0], points[-1]])
+
+    def testLinearDegenerate(self):
+        self.assertFalse(FitBezier([], 0.1).isLinear())
+        self.assertFalse(FitBezier([(0.0, 1.0)], 0.1).isLinear())
+        self.assertFalse(FitBezier([(1.0, 0.0), (1.0, 2.0)], 0.1).isLinear())
+
+    def testNotLinear(self):
+        fitter = FitBezier(getSinePoints(), 0.1)
+        self.assertFalse(fitter.isLinear())
+        self.assertFalse(fitter.getSteps())
+
+    def testStepped(self):
+        values = [0.0] * 10 + [5.0] * 10 + [-2.0] * 10
+        points = [(float(frame), value) for frame, value in enumerate(values)]
+
+        self.assertEqual(FitBezier(points, 0.1).getSteps(), [0, 10, 20])
+        self.assertFalse(FitBezier(points, 5.0).getSteps())
+
+    def testStaircase(self):
+        # plateaus of samples are not fitted as steps, a smooth curve needs
+        # a lot less keyframes.
+        for points, error in [
+            ([(float(frame), float(frame // 2)) for frame in range(200)], 0.5),
+            ([(float(frame), (frame // 3) * 0.01) for frame in range(600)], 0.1),
+        ]:
+            keyframes = FitBezier(points, error).fit()
+            self.assertLess(len(keyframes), 10)
+            self.assertFalse([keyframe for keyframe in keyframes if keyframe.outTangentType == STEP])
+
+            animCurve = AnimCurve.fromKeyframes(keyframes)
+            for frame, value in points:
+                self.assertAlmostEqual(animCurve.evaluate(frame), value, delta=error * 2)
+
+    def testHoldMoveHold(self):
+        points = [(float(frame), 0.0 if frame <= 10 else 5.0) for frame in range(21)]
+        animCurve = AnimCurve.fromKeyframes(FitBezier(points, 0.1).fit())
+
+        self.assertGreater(animCurve.evaluate(10.5), 0.1)
+        self.assertLess(animCurve.evaluate(10.5), 4.9)
+
+    def testNotStepped(self):
+        values = [0.0] * 10 + [5.0] + [-2.0] * 10
+        self.assertFalse(FitBezier([(float(frame), value) for frame, value in enumerate(values)], 0.1).getSteps())
+
+
+class FitBezierRefitTest(unittest.TestCase):
+    def testRefitSameError(self):
+        fitter = FitBezier(getSinePoints(), 0.1)
+        keyframes = getKeyframeData(fitter.fit())
+
+        self.assertEqual(getKeyframeData(fitter.refit(0.1)), keyframes)
+
+    def testRefit(self):
+        # refitted keyframes are identical to keyframes fitted from scratch
+        for points in [getSinePoints(), getDetailPoints()]:
+            for weightedTangents in [False, True]:
+                fitter = FitBezier(points, 0.01, weightedTangents)
+                fitter.fit()
+
+                for error in [1.0, 0.05, 0.5, 0.1, 0.01, 2.0]:
+                    keyframes = fitter.refit(error)
+                    expected = FitBezier(points, error, weightedTangents).fit()
+
+                    self.assertEqual(fitter.error, error)
+                    self.assertEqual(getKeyframeData(keyframes), getKeyframeData(expected))
+
+    def testRefitLimits(self):
+        for kwargs in [{"maxSegments": 6}, {"maxDepth": 2}, {"breakpoints": [40, 120]}]:
+            fitter = FitBezier(getDetailPoints(), 0.5, **kwargs)
+            fitter.fit()
+
+            for error in [0.05, 1.0]:
+                self.assertEqual(
+                    getKeyframeData(fitter.refit(error)),
+                    getKeyframeData(FitBezier(getDetailPoints(), error, **kwargs).fit())
+                )
+
+    def testRefitWithoutFit(self):
+        fitter = FitBezier(getSinePoints(), 1.0)
+        self.assertEqual(getKeyframeData(fitter.refit(0.1)), getKeyframeData(FitBezier(getSinePoints(), 0.1).fit()))
+
+
+class FitSegmentsTest(unittest.TestCase):
+    def assertFitted(self, keyframes, points, error, weightedTangents):
+        """
+        :param list keyframes:
+        :param list points:
+        :param float error:
+        :param bool weightedTangents:
+        """
+        animCurve = AnimCurve.fromKeyframes(keyframes, weightedTangents)
+        self.assertEqual(animCurve.times[0], points[0][0])
+        self.assertEqual(animCurve.times[-1], points[-1][0])
+
+        for frame, value in points:
+            self.assertAlmostEqual(animCurve.evaluate(frame), value, delta=error * 2)
+
+    def testSplitSimplify(self):
+        points = getDetailPoints()
+
+        for error in [0.05, 0.1, 0.5, 1.0]:
+            for weightedTangents in [False, True]:
+                keyframes = fitSegments([points], error, weightedTangents, splitSimplify=True)
+                self.assertFitted(keyframes, points, error, weightedTangents)
+
+    def testLayered(self):
+        points = getDetailPoints()
+
+        # the layered fitter matches the curves using the same error as the
+        # greedy fitter, the handles of curves without weighted tangents
+        # are scaled by Maya so only the weighted curves are within the error.
+        for error in [0.05, 0.1, 0.5, 1.0]:
+            for weightedTangents in [False, True]:
+                keyframes = fitSegments([points], error, weightedTangents, fitter=FITTER_LAYERED)
+                self.assertFitted(keyframes, points, error, weightedTangents)
+
+                if weightedTangents:
+                    animCurve = AnimCurve.fromKeyframes(keyframes, weightedTangents)
+                    self.assertLess(getMaxDistance(animCurve, points, error), error)
+
+    def testLayeredBenchmark(self):
+        with open(BENCHMARK_PATH, "r") as f:
+            cases = json.load(f)["cases"]
+
+        for case in cases:
+            points = [(float(frame), value) for frame, value in enumerate(case["values"])]
+            for result in case["results"]:
+                error, weightedTangents = result["error"], result["weightedTangents"]
+                keyframes = fitSegments([points], error, weightedTangents, fitter=FITTER_LAYERED)
+                greedy = fitSegments([points], error, weightedTangents, fitter=FITTER_GREEDY)
+
+                self.assertLessEqual(len(keyframes), result["layered"])
+                self.assertLessEqual(len(keyframes), len(greedy))
+
+    def testLayeredLimits(self):
+        points = getDetailPoints()
+
+        # the regions between the breakpoints are fitted separately
+        keyframes = fit.FitLayered(points, 0.5, breakpoints=[60, 120]).fit()
+        times = [keyframe.point[0] for keyframe in keyframes]
+        self.assertIn(60.0, times)
+        self.assertIn(120.0, times)
+
+        # the greedy fitter is used when the curves exceed the limits
+        for kwargs in [{"maxSegments": 4}, {"maxDepth": 2}]:
+            keyframes = fit.FitLayered(points, 0.1, **kwargs).fit()
+            self.assertEqual(
+                getKeyframeData(keyframes),
+                getKeyframeData(FitBezier(points, 0.1, **kwargs).fit())
+            )
+            self.assertLessEqual(len(keyframes) - 1, 4)
+
+    def testFitterNotSupported(self):
+        self.assertRaises(ValueError, fitSegments, [getDetailPoints()], 0.1, fitter=FITTER_MERGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
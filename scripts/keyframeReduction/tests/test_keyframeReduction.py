@@ -0,0 +1,121 @@
+import unittest
+
+try:
+    from maya import standalone
+    standalone.initialize()
+
+    from maya import cmds, OpenMayaAnim
+    from keyframeReduction.classes.keyframeReduction import KeyframeReduction
+except ImportError:
+    # the animation curves can only be written when maya is available
+    cmds = None
+
+from keyframeReduction.classes.animCurve import AnimCurve
+
+
+# ----------------------------------------------------------------------------
+
+
+ANIM_CURVE_TYPES = [
+    "animCurveTA",
+    "animCurveTL",
+    "animCurveTT",
+    "animCurveTU",
+    "animCurveUA",
+    "animCurveUL",
+    "animCurveUT",
+    "animCurveUU",
+]
+
+
+# ----------------------------------------------------------------------------
+
+
+def createAnimCurve(animCurveType, inputs, values):
+    """
+    :param str animCurveType:
+    :param list inputs:
+    :param list values:
+    :return: Animation curve
+    :rtype: str
+    """
+    node = cmds.createNode(animCurveType)
+    for input_, value in zip(inputs, values):
+        if animCurveType.startswith("animCurveU"):
+            cmds.setKeyframe(node, float=input_, value=value)
+        else:
+            cmds.setKeyframe(node, time=input_, value=value)
+
+    return node
+
+
+def getKeys(animCurve):
+    """
+    :param str animCurve:
+    :return: Inputs and values of the keys
+    :rtype: tuple
+    """
+    flag = "floatChange" if cmds.nodeType(animCurve).startswith("animCurveU") else "timeChange"
+    return (
+        cmds.keyframe(animCurve, query=True, **{flag: True}) or [],
+        cmds.keyframe(animCurve, query=True, valueChange=True) or [],
+    )
+
+
+# ----------------------------------------------------------------------------
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestSetAnimCurve(unittest.TestCase):
+    def setUp(self):
+        cmds.file(new=True, force=True)
+
+    def testAnimCurveTypes(self):
+        inputs = [0.0, 4.0, 8.0, 12.0]
+        values = [0.0, 3.0, 1.0, 5.0]
+        reduced = AnimCurve([0.0, 6.0, 12.0], [0.0, 2.0, 5.0], [0.0, 10.0, 0.0], [0.0, 10.0, 0.0])
+
+        for animCurveType in ANIM_CURVE_TYPES:
+            animCurve = createAnimCurve(animCurveType, inputs, values)
+            change = OpenMayaAnim.MAnimCurveChange()
+            KeyframeReduction(animCurve).setAnimCurve(reduced, change)
+
+            # the keys are written in ui units
+            writtenInputs, writtenValues = getKeys(animCurve)
+            for a, b in zip(writtenInputs + writtenValues, reduced.times + reduced.values):
+                self.assertAlmostEqual(a, b, places=6)
+            self.assertEqual(len(writtenInputs), len(reduced.times))
+            self.assertAlmostEqual(cmds.keyTangent(animCurve, query=True, outAngle=True)[1], 10.0, places=4)
+
+            # undoing the change restores the original keys
+            change.undoIt()
+            restoredInputs, restoredValues = getKeys(animCurve)
+            for a, b in zip(restoredInputs + restoredValues, inputs + values):
+                self.assertAlmostEqual(a, b, places=6)
+            self.assertEqual(len(restoredInputs), len(inputs))
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestGetValues(unittest.TestCase):
+    def setUp(self):
+        cmds.file(new=True, force=True)
+
+    def testSamplers(self):
+        inputs = [0.0, 4.0, 8.0, 12.0]
+        values = [0.0, 3.0, 1.0, 5.0]
+        frames = [frame * 0.5 for frame in range(30)]
+
+        # the api sampler evaluates all frames in a single call and matches
+        # the values of the keyframe command.
+        for animCurveType in ANIM_CURVE_TYPES:
+            animCurve = createAnimCurve(animCurveType, inputs, values)
+            obj = KeyframeReduction(animCurve)
+            apiValues = obj.getValuesApi(frames)
+
+            if animCurveType.startswith("animCurveU"):
+                self.assertIsNone(apiValues)
+                continue
+
+            self.assertEqual(len(apiValues), len(frames))
+            for a, b in zip(apiValues, obj.getValuesCmds(frames)):
+                self.assertAlmostEqual(a, b, places=6)
@@ -0,0 +1,109 @@
+import math
+import unittest
+
+from keyframeReduction.classes.fit import FitBezier
+from keyframeReduction.classes.merge import mergeAnimCurve
+from keyframeReduction.classes.animCurve import AnimCurve, STEP
+
+
+# ----------------------------------------------------------------------------
+
+
+FRAMES = [float(frame) for frame in range(200)]
+
+
+def getAnimCurve(weightedTangents=True):
+    """
+    :param bool weightedTangents:
+    :return: Animation curve with a lot of keyframes
+    :rtype: AnimCurve
+    """
+    points = [(frame, math.sin(frame * 0.05) * 10 + math.sin(frame * 0.3)) for frame in FRAMES]
+    return AnimCurve.fromKeyframes(FitBezier(points, 0.01, weightedTangents).fit(), weightedTangents)
+
+
+# ----------------------------------------------------------------------------
+
+
+class MergeAnimCurveTest(unittest.TestCase):
+    def testErrorBound(self):
+        for weightedTangents in [False, True]:
+            animCurve = getAnimCurve(weightedTangents)
+
+            for error in [0.1, 0.5, 1.0]:
+                keyframes = mergeAnimCurve(animCurve, error, weightedTangents)
+                merged = AnimCurve.fromKeyframes(keyframes, weightedTangents)
+
+                self.assertLess(len(merged.times), len(animCurve.times))
+                self.assertEqual(merged.times[0], animCurve.times[0])
+                self.assertEqual(merged.times[-1], animCurve.times[-1])
+                for frame in FRAMES:
+                    self.assertAlmostEqual(merged.evaluate(frame), animCurve.evaluate(frame), delta=error)
+
+    def testErrorBoundUnweighted(self):
+        # the segments of the weighted animation curve are replaced by
+        # segments of which the tangents are not weighted, segments that
+        # cannot be matched using a single curve are split.
+        animCurve = getAnimCurve(True)
+
+        for error in [0.01, 0.1, 0.5, 1.0]:
+            keyframes = mergeAnimCurve(animCurve, error, False)
+            merged = AnimCurve.fromKeyframes(keyframes, False)
+
+            self.assertFalse(merged.weightedTangents)
+            self.assertEqual(merged.times[0], animCurve.times[0])
+            self.assertEqual(merged.times[-1], animCurve.times[-1])
+            for frame in FRAMES:
+                self.assertAlmostEqual(merged.evaluate(frame), animCurve.evaluate(frame), delta=error)
+
+    def testSplitTangents(self):
+        animCurve = getAnimCurve()
+        outAngles = list(animCurve.outAngles)
+        outAngles[10] += 30
+
+        animCurve = AnimCurve(
+            animCurve.times,
+            animCurve.values,
+            animCurve.inAngles,
+            outAngles,
+            animCurve.inWeights,
+            animCurve.outWeights,
+            weightedTangents=True
+        )
+        merged = AnimCurve.fromKeyframes(mergeAnimCurve(animCurve, 1.0))
+
+        self.assertIn(animCurve.times[10], merged.times)
+
+    def testStepped(self):
+        animCurve = AnimCurve(
+            [0, 10, 20, 30],
+            [0, 5, 5, -2],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0],
+            outTangentTypes=[STEP, "fixed", STEP, "fixed"]
+        )
+        merged = AnimCurve.fromKeyframes(mergeAnimCurve(animCurve, 0.1), False)
+
+        self.assertEqual(merged.times, animCurve.times)
+        for frame in range(31):
+            self.assertAlmostEqual(merged.evaluate(frame), animCurve.evaluate(frame))
+
+    def testSteppedHolds(self):
+        values = [0.0, 0.0, 0.05, 5.0, 5.0, 5.0, -2.0, -2.0]
+        animCurve = AnimCurve(
+            [frame * 10 for frame in range(len(values))],
+            values,
+            [0] * len(values),
+            [0] * len(values),
+            outTangentTypes=[STEP] * len(values)
+        )
+        self.assertTrue(animCurve.isStepped())
+
+        merged = AnimCurve.fromKeyframes(mergeAnimCurve(animCurve, 0.1), False)
+        self.assertEqual(merged.times, [0.0, 30.0, 60.0, 70.0])
+        for frame in range(71):
+            self.assertAlmostEqual(merged.evaluate(frame), animCurve.evaluate(frame), delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
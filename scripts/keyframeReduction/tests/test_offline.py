@@ -0,0 +1,150 @@
+import os
+import math
+import shutil
+import tempfile
+import unittest
+
+from keyframeReduction import offline
+from keyframeReduction.classes.fit import fitSegments, FitBezier, FITTER_MERGE
+from keyframeReduction.classes.merge import mergeAnimCurve
+from keyframeReduction.classes.split import splitPoints
+from keyframeReduction.classes.animCurve import AnimCurve, STEP
+from keyframeReduction.classes.exchange import (
+    ExchangeWriter,
+    ExchangeReader,
+    arraysToKeyframes,
+    animCurveToArrays,
+)
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.directory, "samples.kfr")
+        self.outputPath = os.path.join(self.directory, "keyframes.kfr")
+
+        # write samples
+        frames = [float(frame) for frame in range(100)]
+        self.samples = [
+            ("sine", [math.sin(frame * 0.1) * 10 for frame in frames], []),
+            ("cosine", [math.cos(frame * 0.2) * 5 for frame in frames], [50]),
+            ("linear", [frame * 0.5 for frame in frames], []),
+        ]
+
+        with ExchangeWriter(self.inputPath, {"error": 0.1, "weightedTangents": True}) as writer:
+            for name, values, split in self.samples:
+                writer.add(name, {"times": frames, "values": values}, split=split)
+
+        self.frames = frames
+
+    def tearDown(self):
+        reader = offline.READERS.pop(self.inputPath, None)
+        if reader is not None:
+            reader.close()
+
+        shutil.rmtree(self.directory)
+
+    def assertFitted(self, error, weightedTangents):
+        """
+        :param float error:
+        :param bool weightedTangents:
+        """
+        with ExchangeReader(self.outputPath) as reader:
+            self.assertEqual(reader.metadata["error"], error)
+            self.assertEqual(reader.metadata["weightedTangents"], weightedTangents)
+            self.assertEqual(len(reader), len(self.samples))
+
+            for record, (name, values, split) in zip(reader, self.samples):
+                keyframes = arraysToKeyframes(reader.getArrays(record))
+                expected = fitSegments(
+                    splitPoints(list(zip(self.frames, values)), split),
+                    error,
+                    weightedTangents
+                )
+
+                self.assertEqual(record["name"], name)
+                self.assertEqual(
+                    [keyframe.point for keyframe in keyframes],
+                    [keyframe.point for keyframe in expected]
+                )
+
+    def testFitFile(self):
+        self.assertEqual(offline.fitFile(self.inputPath, self.outputPath, workers=1), len(self.samples))
+        self.assertFitted(0.1, True)
+
+    def testFitFileSettings(self):
+        offline.fitFile(self.inputPath, self.outputPath, error=1.0, weightedTangents=False, workers=1)
+        self.assertFitted(1.0, False)
+
+    def testFitFileProcesses(self):
+        offline.fitFile(self.inputPath, self.outputPath, workers=2)
+        self.assertFitted(0.1, True)
+
+
+class FitKeysTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.directory, "samples.kfr")
+        self.outputPath = os.path.join(self.directory, "keyframes.kfr")
+
+        # get a stepped and a smooth animation curve
+        values = [0.0, 0.0, 0.05, 5.0, 5.0, 5.02, -2.0]
+        count = len(values)
+        stepped = AnimCurve(
+            [float(frame * 4) for frame in range(count)],
+            values,
+            [0.0] * count,
+            [0.0] * count,
+            outTangentTypes=[STEP] * count,
+        )
+        points = [(float(frame), math.sin(frame * 0.05) * 10 + math.sin(frame * 0.3)) for frame in range(200)]
+        smooth = AnimCurve.fromKeyframes(FitBezier(points, 0.01).fit())
+        self.animCurves = [("stepped", stepped), ("smooth", smooth)]
+
+    def tearDown(self):
+        reader = offline.READERS.pop(self.inputPath, None)
+        if reader is not None:
+            reader.close()
+
+        shutil.rmtree(self.directory)
+
+    def writeKeys(self, fitter, stepped):
+        """
+        :param str fitter:
+        :param list stepped: Stepped state of each animation curve
+        """
+        with ExchangeWriter(self.inputPath, {"error": 0.1, "weightedTangents": True, "fitter": fitter}) as writer:
+            for (name, animCurve), isStepped in zip(self.animCurves, stepped):
+                arrays, metadata = animCurveToArrays(animCurve)
+                writer.add(name, arrays, stepped=isStepped, **metadata)
+
+    def assertMerged(self):
+        with ExchangeReader(self.outputPath) as reader:
+            for record, (name, animCurve) in zip(reader, self.animCurves):
+                keyframes = arraysToKeyframes(reader.getArrays(record))
+                expected = mergeAnimCurve(animCurve, 0.1, True)
+
+                self.assertEqual(record["name"], name)
+                self.assertEqual(
+                    [(keyframe.point, keyframe.outTangentType) for keyframe in keyframes],
+                    [(keyframe.point, keyframe.outTangentType) for keyframe in expected]
+                )
+
+    def testStepped(self):
+        # stepped records are merged regardless of the fitter
+        self.animCurves = self.animCurves[:1]
+        self.writeKeys("greedy", [True])
+        offline.fitFile(self.inputPath, self.outputPath, workers=1)
+        self.assertMerged()
+
+    def testMerge(self):
+        self.writeKeys(FITTER_MERGE, [True, False])
+        offline.fitFile(self.inputPath, self.outputPath, workers=1)
+        self.assertMerged()
+
+
+if __name__ == "__main__":
+    unittest.main()
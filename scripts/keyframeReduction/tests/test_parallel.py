@@ -0,0 +1,91 @@
+import math
+import unittest
+
+from keyframeReduction import parallel
+from keyframeReduction.classes.fit import fitSegments
+
+
+# ----------------------------------------------------------------------------
+
+
+def getSegments(offset):
+    """
+    :param float offset:
+    :return: Segments of a sine wave
+    :rtype: list
+    """
+    return [[(float(frame), math.sin(frame * 0.1 + offset) * 10) for frame in range(50)]]
+
+
+def getData(keyframes):
+    """
+    :param list keyframes: Keyframes of each animation curve
+    :return: Points and handles of the keyframes of each animation curve
+    :rtype: list
+    """
+    return [
+        [(keyframe.point, keyframe.inHandle, keyframe.outHandle) for keyframe in channel]
+        for channel in keyframes
+    ]
+
+
+def divide(value):
+    """
+    :param float value:
+    :return: Inverse of the value
+    :rtype: float
+    """
+    return 1.0 / value
+
+
+# ----------------------------------------------------------------------------
+
+
+class InProcessPoolTest(unittest.TestCase):
+    def testApplyAsync(self):
+        pool = parallel.InProcessPool()
+        result = pool.apply_async(divide, (4.0,))
+        self.assertTrue(result.ready())
+        self.assertEqual(result.get(), 0.25)
+
+    def testApplyAsyncError(self):
+        # errors are raised when the result is retrieved
+        pool = parallel.InProcessPool()
+        result = pool.apply_async(divide, (0.0,))
+        self.assertTrue(result.ready())
+        with self.assertRaises(ZeroDivisionError):
+            result.get()
+
+    def testInitializer(self):
+        called = []
+        parallel.InProcessPool(called.append, ("initialized",))
+        self.assertEqual(called, ["initialized"])
+
+    def testMap(self):
+        arguments = [(getSegments(offset), 0.1, True, False, "greedy") for offset in range(3)]
+        pool = parallel.InProcessPool()
+        expected = getData([fitSegments(*a) for a in arguments])
+        self.assertEqual(getData(pool.map(parallel.fitSegmentsWorker, arguments)), expected)
+        self.assertEqual(getData(pool.imap(parallel.fitSegmentsWorker, arguments)), expected)
+
+
+class FitSegmentsParallelTest(unittest.TestCase):
+    def testProcessPool(self):
+        # the fitted keyframes of the process pool match fitting in the
+        # current process.
+        segments = [getSegments(offset) for offset in range(4)]
+        self.assertEqual(
+            getData(parallel.fitSegmentsParallel(segments, 0.1, workers=2)),
+            getData(parallel.fitSegmentsParallel(segments, 0.1, workers=1)),
+        )
+
+    def testUnique(self):
+        # identical segments are only fitted once and share their keyframes
+        segments = [getSegments(0), getSegments(1), getSegments(0), getSegments(0)]
+        keyframes, duplicates = parallel.fitSegmentsUnique(segments, 0.1, workers=1)
+
+        self.assertEqual(duplicates, 2)
+        self.assertIs(keyframes[0], keyframes[2])
+        self.assertIs(keyframes[0], keyframes[3])
+        self.assertIsNot(keyframes[0], keyframes[1])
+        self.assertEqual(getData(keyframes), getData(parallel.fitSegmentsParallel(segments, 0.1, workers=1)))
@@ -0,0 +1,161 @@
+import math
+import unittest
+
+from keyframeReduction import pipeline
+from keyframeReduction.classes.fit import fitSegments
+from keyframeReduction.classes.merge import mergeAnimCurve
+from keyframeReduction.classes.split import getAngles, findTangentSplitAuto, splitPoints
+from keyframeReduction.classes.animCurve import AnimCurve, STEP
+
+
+# ----------------------------------------------------------------------------
+
+
+def getItem(name, offset=0.0, length=100):
+    """
+    :param str name:
+    :param float offset:
+    :param int length:
+    :return: Item with the sampled points and angles of a sine
+    :rtype: dict
+    """
+    points = [(float(frame), math.sin(frame * 0.1 + offset) * 10) for frame in range(length)]
+    angles = getAngles([point[0] for point in points], [point[1] for point in points])
+    return {"path": name, "points": points, "angles": angles}
+
+
+def getData(keyframes):
+    """
+    :param list keyframes:
+    :return: Point, in handle, out handle and out tangent type of each keyframe
+    :rtype: list
+    """
+    return [
+        (keyframe.point, keyframe.inHandle, keyframe.outHandle, keyframe.outTangentType)
+        for keyframe in keyframes
+    ]
+
+
+def getSettings(**settings):
+    """
+    :return: Default settings updated with the provided settings
+    :rtype: dict
+    """
+    return dict(pipeline.DEFAULT_SETTINGS, error=0.1, **settings)
+
+
+# ----------------------------------------------------------------------------
+
+
+class PipelineTest(unittest.TestCase):
+    def testSplitFit(self):
+        settings = getSettings(tangentSplitAuto=True)
+        item = getItem("sine")
+        segments = splitPoints(item["points"], findTangentSplitAuto(item["angles"]))
+
+        items = list(pipeline.Pipeline().run([item], settings, start=pipeline.SPLIT, end=pipeline.FIT))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["path"], "sine")
+        self.assertNotIn("points", items[0])
+        self.assertNotIn("segments", items[0])
+        self.assertEqual(getData(items[0]["keyframes"]), getData(fitSegments(segments, 0.1)))
+
+    def testMerge(self):
+        # items with a snapshot of the animation curve are merged
+        animCurve = AnimCurve(
+            [0.0, 4.0, 8.0, 12.0],
+            [0.0, 0.05, 5.0, 5.0],
+            [0.0] * 4,
+            [0.0] * 4,
+            outTangentTypes=[STEP] * 4,
+        )
+        items = [{"path": "stepped", "animCurve": animCurve}]
+        items = list(pipeline.Pipeline().run(items, getSettings(), start=pipeline.SPLIT, end=pipeline.FIT))
+
+        self.assertEqual(getData(items[0]["keyframes"]), getData(mergeAnimCurve(animCurve, 0.1, True)))
+
+    def testStream(self):
+        # the items are pulled through the stages one at a time
+        consumed = []
+
+        def getItems():
+            for i in range(3):
+                consumed.append(i)
+                yield getItem(str(i), offset=i)
+
+        items = pipeline.Pipeline().run(getItems(), getSettings(), start=pipeline.SPLIT, end=pipeline.FIT)
+        self.assertEqual(next(items)["path"], "0")
+        self.assertEqual(consumed, [0])
+        self.assertEqual([item["path"] for item in items], ["1", "2"])
+        self.assertEqual(consumed, [0, 1, 2])
+
+    def testReplaceStage(self):
+        def writeStage(items, settings):
+            for item in items:
+                item["rate"] = len(item.pop("keyframes"))
+                yield item
+
+        obj = pipeline.Pipeline(write=writeStage)
+        items = list(obj.run([getItem("sine")], getSettings(), start=pipeline.SPLIT))
+
+        self.assertIs(obj.stages[pipeline.WRITE], writeStage)
+        self.assertEqual(items[0]["rate"], len(fitSegments([getItem("sine")["points"]], 0.1)))
+
+    def testParallelFitStage(self):
+        # the items are yielded in order and match fitting in the current
+        # process.
+        settings = getSettings()
+        expected = [
+            getData(item["keyframes"])
+            for item in pipeline.fitStage(
+                pipeline.splitStage([getItem(str(i), offset=i) for i in range(5)], settings),
+                settings
+            )
+        ]
+
+        obj = pipeline.Pipeline(fit=pipeline.ParallelFitStage(workers=2, window=2))
+        items = list(obj.run([getItem(str(i), offset=i) for i in range(5)], settings, start=pipeline.SPLIT, end=pipeline.FIT))
+
+        self.assertEqual([item["path"] for item in items], ["0", "1", "2", "3", "4"])
+        self.assertEqual([getData(item["keyframes"]) for item in items], expected)
+
+
+class DuplicateTest(unittest.TestCase):
+    def setUp(self):
+        self.size = pipeline.DUPLICATE_SIZE
+
+    def tearDown(self):
+        pipeline.DUPLICATE_SIZE = self.size
+
+    def getItems(self, fit, offsets):
+        """
+        :param callable fit: Fit stage
+        :param list offsets: Offset of the sine of each item
+        :return: Items
+        :rtype: list
+        """
+        items = [getItem(str(i), offset=offset) for i, offset in enumerate(offsets)]
+        return list(pipeline.Pipeline(fit=fit).run(items, getSettings(), start=pipeline.SPLIT, end=pipeline.FIT))
+
+    def testDuplicate(self):
+        for fit in [pipeline.fitStage, pipeline.ParallelFitStage(workers=1)]:
+            items = self.getItems(fit, [0, 1, 0])
+
+            self.assertEqual([item["duplicate"] for item in items], [False, False, True])
+            self.assertIs(items[2]["keyframes"], items[0]["keyframes"])
+
+    def testDuplicateSize(self):
+        # only the most recently used fingerprints are remembered, the
+        # second item is forgotten once the third unique item is fitted.
+        pipeline.DUPLICATE_SIZE = 2
+
+        for fit in [pipeline.fitStage, pipeline.ParallelFitStage(workers=1)]:
+            items = self.getItems(fit, [0, 1, 0, 2, 0, 1])
+            self.assertEqual(
+                [item["duplicate"] for item in items],
+                [False, False, True, False, True, False]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import math
+import bisect
+import unittest
+
+from keyframeReduction.classes.fit import FitBezier
+from keyframeReduction.classes.animCurve import AnimCurve
+from keyframeReduction.classes.sample import (
+    sampleAdaptive,
+    getSampleTolerance,
+    ADAPTIVE_SAMPLING_SCALE,
+)
+
+
+# ----------------------------------------------------------------------------
+
+
+def getAnimCurve(length=200):
+    """
+    :param int length:
+    :return: Animation curve with keyframes far apart
+    :rtype: AnimCurve
+    """
+    points = [(float(frame), math.sin(frame * 0.05) * 10) for frame in range(length)]
+    return AnimCurve.fromKeyframes(FitBezier(points, 0.5).fit())
+
+
+def interpolate(frames, values, frame):
+    """
+    :param list frames:
+    :param list values:
+    :param float frame:
+    :return: Value of the line between the sampled frames around the frame
+    :rtype: float
+    """
+    i = min(bisect.bisect_right(frames, frame) - 1, len(frames) - 2)
+    slope = (values[i + 1] - values[i]) / (frames[i + 1] - frames[i])
+    return values[i] + (frame - frames[i]) * slope
+
+
+# ----------------------------------------------------------------------------
+
+
+class SampleAdaptiveTest(unittest.TestCase):
+    def testSampleTolerance(self):
+        self.assertIsNone(getSampleTolerance(0.1, False))
+        self.assertEqual(getSampleTolerance(0.1, True), 0.1 * ADAPTIVE_SAMPLING_SCALE)
+
+    def testSampleAdaptive(self):
+        animCurve = getAnimCurve()
+        frames = [float(frame) for frame in range(200)]
+
+        for tolerance in [0.1, 0.5]:
+            sampled, values = sampleAdaptive(
+                frames,
+                animCurve.times,
+                animCurve.values,
+                animCurve.evaluateFrames,
+                tolerance
+            )
+
+            self.assertLess(len(sampled), len(frames))
+            self.assertEqual(sampled, sorted(set(sampled)))
+            self.assertEqual(values, animCurve.evaluateFrames(sampled))
+            for time in animCurve.times:
+                self.assertIn(time, sampled)
+
+            for frame in frames:
+                self.assertAlmostEqual(interpolate(sampled, values, frame), animCurve.evaluate(frame), delta=tolerance)
+
+    def testSampleAdaptiveLinear(self):
+        angle = math.degrees(math.atan(0.5))
+        animCurve = AnimCurve([0, 100], [0, 50], [angle, angle], [angle, angle])
+        frames = [float(frame) for frame in range(101)]
+        sampled, values = sampleAdaptive(frames, animCurve.times, animCurve.values, animCurve.evaluateFrames, 0.01)
+
+        self.assertEqual(sampled, [0.0, 25.0, 50.0, 75.0, 100.0])
+
+    def testSampleAdaptiveBaked(self):
+        frames = [float(frame) for frame in range(100)]
+        values = [math.sin(frame * 0.3) * 10 for frame in frames]
+        animCurve = AnimCurve(frames, values, [0.0] * 100, [0.0] * 100)
+        sampled, _ = sampleAdaptive(frames, animCurve.times, animCurve.values, animCurve.evaluateFrames, 0.01)
+
+        self.assertEqual(sampled, frames)
+
+
+if __name__ == "__main__":
+    unittest.main()
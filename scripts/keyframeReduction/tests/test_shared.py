@@ -0,0 +1,104 @@
+import math
+import unittest
+
+from keyframeReduction.classes.keyframe import Keyframe
+from keyframeReduction.classes.animCurve import AnimCurve, STEP
+from keyframeReduction.classes.shared import FitShared, fitAnimCurvesShared
+
+
+# ----------------------------------------------------------------------------
+
+
+def getAnimCurve(start, end, phase):
+    """
+    :param int start:
+    :param int end:
+    :param float phase:
+    :return: Animation curve with a sine keyed on every frame
+    :rtype: AnimCurve
+    """
+    keyframes = [Keyframe((float(t), math.sin(t * 0.1 + phase) * 10)) for t in range(start, end)]
+    return AnimCurve.fromKeyframes(keyframes, True)
+
+
+# ----------------------------------------------------------------------------
+
+
+class FitSharedTest(unittest.TestCase):
+    def testSharedTimes(self):
+        channels = [
+            [(float(t), math.sin(t * 0.1) * 10) for t in range(100)],
+            [(float(t), t * 0.5) for t in range(100)],
+            [(float(t), math.cos(t * 0.05) * 5) for t in range(100)],
+        ]
+        keyframes = FitShared(channels, error=0.1).fit()
+
+        times = [[keyframe.point[0] for keyframe in channel] for channel in keyframes]
+        for channelTimes in times:
+            self.assertEqual(channelTimes, times[0])
+
+    def testStepped(self):
+        values = [0.0] * 10 + [5.0] * 10 + [-2.0] * 10
+        channels = [
+            [(float(t), value) for t, value in enumerate(values)],
+            [(float(t), t * 0.5) for t in range(30)],
+        ]
+        stepped, linear = FitShared(channels, 0.1, stepped=[True, False]).fit()
+
+        self.assertEqual([keyframe.point[0] for keyframe in stepped], [0.0, 10.0, 20.0, 29.0])
+        self.assertEqual([keyframe.outTangentType for keyframe in stepped[:-1]], [STEP] * 3)
+        self.assertEqual([keyframe.outTangentType for keyframe in linear[:-1]], ["fixed"] * 3)
+
+        # channels that are not marked as stepped are fitted as any other
+        stepped, _ = FitShared(channels, 0.1).fit()
+        self.assertNotIn(STEP, [keyframe.outTangentType for keyframe in stepped])
+
+    def testDifferentTimes(self):
+        channels = [
+            [(float(t), 0.0) for t in range(10)],
+            [(float(t), 0.0) for t in range(1, 11)],
+        ]
+        self.assertRaises(ValueError, FitShared, channels)
+
+
+class FitAnimCurvesSharedTest(unittest.TestCase):
+    def testDifferentStartFrames(self):
+        error = 0.1
+        animCurves = [getAnimCurve(0, 100, 0), getAnimCurve(10, 100, 1), getAnimCurve(25, 80, 2)]
+        keyframes = fitAnimCurvesShared(animCurves, error)
+
+        # every animation curve gets the key times of the group within the
+        # range of its own keyframes.
+        reduced = [AnimCurve.fromKeyframes(channel, True) for channel in keyframes]
+        for animCurve, reducedAnimCurve in zip(animCurves, reduced):
+            self.assertEqual(reducedAnimCurve.times[0], animCurve.times[0])
+            self.assertEqual(reducedAnimCurve.times[-1], animCurve.times[-1])
+            self.assertTrue(set(reducedAnimCurve.times).issubset(reduced[0].times))
+            self.assertEqual(len(reducedAnimCurve.times), len(set(reducedAnimCurve.times)))
+
+        self.assertEqual(reduced[0].times[0], 0.0)
+        self.assertEqual(reduced[0].times[-1], 99.0)
+        self.assertLess(len(reduced[0].times), len(animCurves[1].times))
+
+        # the reduced animation curves match the originals over the range
+        # of the group, the frames outside of their own range are evaluated
+        # using their infinity.
+        for animCurve, reducedAnimCurve in zip(animCurves, reduced):
+            for frame in range(100):
+                self.assertLess(abs(reducedAnimCurve.evaluate(frame) - animCurve.evaluate(frame)), error * 2)
+
+    def testInfinity(self):
+        animCurves = [getAnimCurve(0, 100, 0), getAnimCurve(20, 60, 1)]
+        animCurves[1] = AnimCurve(*animCurves[1].getData()[:-2], preInfinity="cycle", postInfinity="oscillate")
+        keyframes = fitAnimCurvesShared(animCurves, 0.1)
+
+        # the reduced keyframes replace the keyframes of the animation curve,
+        # its infinity is kept.
+        reduced = AnimCurve.fromKeyframes(keyframes[1], True)
+        reduced = AnimCurve(*reduced.getData()[:-2], preInfinity="cycle", postInfinity="oscillate")
+        for frame in range(100):
+            self.assertLess(abs(reduced.evaluate(frame) - animCurves[1].evaluate(frame)), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
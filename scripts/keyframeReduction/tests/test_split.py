@@ -0,0 +1,94 @@
+import math
+import unittest
+
+from keyframeReduction.classes.fit import FitBezier
+from keyframeReduction.classes.animCurve import AnimCurve
+from keyframeReduction.classes.sample import sampleAdaptive
+from keyframeReduction.classes.split import (
+    getAngles,
+    getStepAngles,
+    findTangentSplitExisting,
+    findSplitSimplify,
+    splitPoints,
+    joinSegments,
+)
+
+
+# ----------------------------------------------------------------------------
+
+
+class AnglesTest(unittest.TestCase):
+    def testStepAngles(self):
+        points = [(float(frame), math.sin(frame * 0.05) * 10) for frame in range(200)]
+        animCurve = AnimCurve.fromKeyframes(FitBezier(points, 0.5).fit())
+        frames = [float(frame) for frame in range(200)]
+        values = animCurve.evaluateFrames(frames)
+        sampled, sampledValues = sampleAdaptive(frames, animCurve.times, animCurve.values, animCurve.evaluateFrames, 0.5)
+
+        # the angles of every frame are offset by one as the first frame
+        # doesn't have an angle
+        angles = dict(zip(frames[1:], getAngles(frames, values)))
+        stepAngles = getStepAngles(sampled, sampledValues, animCurve.evaluateFrames, 1)
+
+        self.assertEqual(len(stepAngles), len(sampled) - 3)
+        for frame, angle in zip(sampled[1:], stepAngles):
+            self.assertAlmostEqual(angle, angles[frame])
+
+    def testStepAnglesUniform(self):
+        frames = [float(frame) for frame in range(0, 50, 2)]
+        values = [math.sin(frame * 0.2) for frame in frames]
+
+        def evaluate(f):
+            return [math.sin(frame * 0.2) for frame in f]
+
+        for angle, expected in zip(getStepAngles(frames, values, evaluate, 2), getAngles(frames, values)):
+            self.assertAlmostEqual(angle, expected)
+
+
+class SplitTest(unittest.TestCase):
+    def testSplitExistingSampleFrames(self):
+        split = findTangentSplitExisting(
+            [0.0, 10.0, 30.5],
+            [0.0, 10.0, 0.0],
+            [0.0, -10.0, 0.0],
+            ["fixed", "fixed", "step"],
+            ["fixed", "fixed", "fixed"],
+            0,
+            1,
+            [0.0, 4.0, 8.0, 12.0, 20.0, 30.0, 40.0]
+        )
+
+        self.assertEqual(split, [2, 5])
+
+    def testSplitSimplify(self):
+        points = [(float(frame), math.sin(frame * 0.05) * 10) for frame in range(200)]
+
+        for tolerance in [0.01, 0.1, 1.0]:
+            split = findSplitSimplify(points, tolerance)
+            self.assertEqual(split, sorted(set(split)))
+            self.assertTrue(all(0 < index < len(points) - 1 for index in split))
+
+            # all points are within the tolerance of the line between the
+            # kept points around them
+            for first, last in zip([0] + split, split + [len(points) - 1]):
+                (x1, y1), (x2, y2) = points[first], points[last]
+                length = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+                for x, y in points[first + 1:last]:
+                    self.assertLessEqual(abs((y2 - y1) * (x - x1) - (x2 - x1) * (y - y1)) / length, tolerance)
+
+    def testSplitSimplifyLine(self):
+        points = [(float(frame), frame * 0.5) for frame in range(20)]
+        self.assertEqual(findSplitSimplify(points, 0.01), [])
+
+    def testSplitJoin(self):
+        points = [(float(frame), float(frame * frame)) for frame in range(20)]
+        segments = splitPoints(points, [5, 12])
+
+        self.assertEqual([segment[0] for segment in segments[1:]], [points[5], points[12]])
+        self.assertEqual([segment[-1] for segment in segments[:-1]], [points[5], points[12]])
+        self.assertEqual(joinSegments(segments), (points, [5, 12]))
+
+
+if __name__ == "__main__":
+    unittest.main()
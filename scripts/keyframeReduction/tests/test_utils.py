@@ -0,0 +1,84 @@
+import unittest
+
+try:
+    from maya import standalone
+    standalone.initialize()
+
+    from maya import cmds
+    from keyframeReduction import utils
+except ImportError:
+    # the animation curves can only be queried when maya is available
+    cmds = None
+
+
+# ----------------------------------------------------------------------------
+
+
+def createScene():
+    """
+    Create a node with keyed translate attributes and a node of which the
+    rotate z attribute is driven by the translate x attribute of the first
+    node using a set driven keyframe.
+
+    :return: Driver and driven node
+    :rtype: tuple
+    """
+    driver = cmds.createNode("transform", name="driver")
+    for attribute in ["translateX", "translateY"]:
+        for frame in range(10):
+            cmds.setKeyframe(driver, attribute=attribute, time=frame, value=frame * 0.5)
+
+    driven = cmds.createNode("transform", name="driven")
+    for value in [0.0, 5.0]:
+        cmds.setDrivenKeyframe(driven + ".rotateZ", currentDriver=driver + ".translateX", driverValue=value, value=value * 10)
+
+    return driver, driven
+
+
+# ----------------------------------------------------------------------------
+
+
+@unittest.skipIf(cmds is None, "maya is not available")
+class TestFilterAnimationCurves(unittest.TestCase):
+    def setUp(self):
+        cmds.file(new=True, force=True)
+        self.driver, self.driven = createScene()
+        self.animationCurves = sorted(cmds.ls(type="animCurve"))
+
+    def testFilterAnimationCurves(self):
+        # the bulk queries match the validation of each animation curve
+        expected = [
+            animationCurve
+            for animationCurve in self.animationCurves
+            if utils.validateAnimationCurve(animationCurve)
+        ]
+
+        self.assertEqual(len(expected), 2)
+        self.assertEqual(utils.filterAnimationCurves(self.animationCurves), expected)
+        self.assertEqual(utils.filterAnimationCurves([]), [])
+
+    def testFilterAnimationCurvesByPlug(self):
+        data = utils.filterAnimationCurvesByPlug(utils.getAllAnimationCurves())
+
+        self.assertEqual(sorted(data.keys()), ["translateX", "translateY"])
+        for attribute, animationCurves in data.items():
+            self.assertEqual(len(animationCurves), 1)
+            self.assertEqual(utils.getAnimationCurveAttribute(animationCurves[0]), attribute)
+
+    def testFilterAnimationCurvesByNode(self):
+        data = utils.filterAnimationCurvesByNode(utils.getAllAnimationCurves())
+        self.assertEqual(list(data.keys()), [self.driver])
+        self.assertEqual(sorted(data[self.driver]), utils.filterAnimationCurves(self.animationCurves))
+
+    def testGetAnimationCurves(self):
+        animationCurves = utils.filterAnimationCurves(self.animationCurves)
+
+        self.assertEqual(sorted(utils.getAnimationCurves([self.driver])), animationCurves)
+        self.assertEqual(sorted(utils.getAnimationCurves([self.driver] + animationCurves)), animationCurves)
+        self.assertEqual(utils.getAnimationCurves([animationCurves[0]]), animationCurves[:1])
+        self.assertEqual(utils.getAnimationCurves([self.driven]), [])
+        self.assertEqual(utils.getAnimationCurves([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
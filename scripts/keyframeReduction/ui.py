@@ -3,7 +3,10 @@ from functools import partial
 from maya import cmds, OpenMaya, OpenMayaUI
 
 from . import utils
-from .classes.keyframeReduction import KeyframeReduction
+from . import shared
+from .parallel import ReductionJob
+from .classes.animationCurveIndex import AnimationCurveIndex
+from .classes.fit import FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE
 
 
 # ----------------------------------------------------------------------------
@@ -32,6 +35,20 @@ BOLT_FONT = QFont()
 BOLT_FONT.setFamily("Consolas")
 BOLT_FONT.setWeight(100)
 
+# interval in milliseconds between the reduction steps, every step applies
+# the keyframes of the finished animation curves after which control is
+# returned to the event loop.
+REDUCE_INTERVAL = 20
+
+# interval in milliseconds the filter waits after the last selection change
+# before it is updated, this prevents updating the filter for every change
+# when the selection is changed in quick succession.
+SELECTION_INTERVAL = 50
+
+# the animation curves are reduced on their own unless they are grouped, the
+# animation curves of a group are reduced using the same key times.
+SHARED_NONE = "none"
+
 
 # ----------------------------------------------------------------------------
 
@@ -123,6 +140,7 @@ class AnimationCurvesFilterWidget(QWidget):
 
         # variables
         self._id = None
+        self._index = AnimationCurveIndex()
         self._plugStates = {}
         self._plugDefaults = [
             "translateX", "translateY", "translateZ",
@@ -170,8 +188,14 @@ class AnimationCurvesFilterWidget(QWidget):
         button.released.connect(self.selectAllAnimationCurves)
         layout.addWidget(button)
 
+        # create timer
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SELECTION_INTERVAL)
+        self._timer.timeout.connect(self.updateAnimationCurves)
+
         # update
-        self.selectionChanged()
+        self.updateAnimationCurves()
 
     # ------------------------------------------------------------------------
 
@@ -279,19 +303,32 @@ class AnimationCurvesFilterWidget(QWidget):
 
     def selectionChanged(self, *args):
         """
-        This function gets called each time the selection is changed. It will
-        update the UI to reflect the selected animation curves.
+        This function gets called each time the selection is changed. The
+        update of the UI is delayed until the selection hasn't changed for
+        the selection interval.
         """
-        # clear widget
-        self.clear()
+        self._timer.start()
 
+    def updateAnimationCurves(self):
+        """
+        Update the UI to reflect the selected animation curves. The animation
+        curves are retrieved from the index and the UI is only rebuilt when
+        the filtered animation curves are changed.
+        """
         # get selected animation curves
-        selection = utils.getSelectionAnimationCurves()
-        filtered = utils.filterAnimationCurvesByPlug(selection)
+        selection = cmds.ls(sl=True, long=True) or []
+        filtered = self._index.getAnimationCurvesByPlug(selection)
+
+        # validate changes
+        if filtered == self.plugFilteredAnimationCurves:
+            return
+
+        # clear widget
+        self.clear()
         self.plugFilteredAnimationCurves = filtered
 
         # get plugs
-        plugs = self.plugFilteredAnimationCurves.keys()
+        plugs = list(self.plugFilteredAnimationCurves.keys())
 
         # add default plugs first.
         for plug in self.plugDefaults:
@@ -319,18 +356,24 @@ class AnimationCurvesFilterWidget(QWidget):
     def registerCallback(self):
         """
         Register callback that will update the ui everytime the selection has
-        changed.
+        changed and the callbacks that keep the animation curve index up to
+        date.
         """
+        self._index.registerCallbacks()
         self._id = OpenMaya.MModelMessage.addCallback(
             OpenMaya.MModelMessage.kActiveListModified,
             self.selectionChanged
         )
 
     def removeCallback(self):
+        self._timer.stop()
+        self._index.removeCallbacks()
+
         if not self._id:
             return
 
         OpenMaya.MMessage.removeCallback(self._id)
+        self._id = None
 
     # ------------------------------------------------------------------------
 
@@ -380,6 +423,26 @@ class ReductionSettingsWidget(QWidget):
         self.step.widget.setSingleStep(1)
         layout.addWidget(self.step)
 
+        # create adaptive sampling
+        self.adaptiveSampling = LabelWidget(self, "Adaptive:", QCheckBox)
+        self.adaptiveSampling.setToolTip("Only sample the frames where the curve is not linear, speeds up long smooth curves.")
+        layout.addWidget(self.adaptiveSampling)
+
+        # create fitter
+        self.fitter = LabelWidget(self, "Fitter:", QComboBox)
+        self.fitter.setToolTip(
+            "Greedy is fast, layered often uses less keyframes but is slower. Merge "
+            "merges the existing segments, which is fastest on sparse curves."
+        )
+        self.fitter.widget.addItems([FITTER_GREEDY, FITTER_LAYERED, FITTER_MERGE])
+        layout.addWidget(self.fitter)
+
+        # create shared key times
+        self.shared = LabelWidget(self, "Shared Keys:", QComboBox)
+        self.shared.setToolTip("Reduce the animation curves of each node or plug using the same key times.")
+        self.shared.widget.addItems([SHARED_NONE] + shared.GROUPS)
+        layout.addWidget(self.shared)
+
         # create divider
         divider = Divider(self)
         layout.addWidget(divider)
@@ -405,6 +468,10 @@ class ReductionSettingsWidget(QWidget):
         self.splitAuto.setToolTip("Split tangents automatically, works on estimation.")
         layout.addWidget(self.splitAuto)
 
+        self.splitSimplify = LabelWidget(self, "Simplify:", QCheckBox)
+        self.splitSimplify.setToolTip("Start fitting from the points of a simplified curve, speeds up long detailed curves.")
+        layout.addWidget(self.splitSimplify)
+
         self.splitExisting = LabelWidget(self, "Existing:", QCheckBox)
         self.splitExisting.setToolTip("Split tangents where the tangents of original keys are already split.")
         layout.addWidget(self.splitExisting)
@@ -450,8 +517,19 @@ class ReductionSettingsWidget(QWidget):
             "tangentSplitExisting": self.splitExisting.widget.isChecked(),
             "tangentSplitAngleThreshold": self.splitThreshold.widget.isChecked(),
             "tangentSplitAngleThresholdValue": self.splitThresholdValue.widget.value(),
+            "splitSimplify": self.splitSimplify.widget.isChecked(),
+            "fitter": self.fitter.widget.currentText(),
+            "adaptiveSampling": self.adaptiveSampling.widget.isChecked(),
         }
 
+    def getGroup(self):
+        """
+        :return: Group of the animation curves that share key times
+        :rtype: str/None
+        """
+        group = self.shared.widget.currentText()
+        return group if group != SHARED_NONE else None
+
 
 class KeyframeReductionWidget(QWidget):
     def __init__(self, parent):
@@ -489,44 +567,130 @@ class KeyframeReductionWidget(QWidget):
         hLayout.addWidget(self.settings)
 
         # add progress
+        progressLayout = QHBoxLayout()
+        progressLayout.setContentsMargins(0, 0, 0, 0)
+        progressLayout.setSpacing(5)
+        vLayout.addLayout(progressLayout)
+
         self.progress = QProgressBar(self)
         self.progress.setFont(FONT)
-        vLayout.addWidget(self.progress)
+        progressLayout.addWidget(self.progress)
+
+        # add cancel
+        self.cancel = QPushButton(self)
+        self.cancel.setText("Cancel")
+        self.cancel.setFont(FONT)
+        self.cancel.setEnabled(False)
+        self.cancel.released.connect(self.cancelReduce)
+        progressLayout.addWidget(self.cancel)
+
+        # add timer, the reduction is processed in steps so the ui remains
+        # responsive.
+        self.job = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(REDUCE_INTERVAL)
+        self.timer.timeout.connect(self.reduceStep)
 
     # ------------------------------------------------------------------------
 
     def reduce(self):
         """
-        Get the animation curves and settings from the ui and reduce the
-        keyframes on each of those animation curves using the provided
-        settings.
+        Get the animation curves and settings from the ui and start reducing
+        the keyframes on each of those animation curves using the provided
+        settings. The animation curves are sampled and fitted in a process
+        pool, the keyframes are applied in batches by the timer. When the
+        animation curves are grouped each group is fitted using shared key
+        times.
         """
+        # validate running job
+        if self.job is not None:
+            return
+
         # get animation curves and settings
         animationCurves = self.filter.getAnimationCurves()
         settings = self.settings.getSettings()
 
+        # validate animation curves
+        if not animationCurves:
+            return
+
         # setup progress
-        rate = 0
-        num = len(animationCurves)
-        self.progress.setRange(0, num)
+        self.progress.setRange(0, len(animationCurves))
+        self.progress.setValue(0)
+
+        # start job
+        self.job = ReductionJob(animationCurves, group=self.settings.getGroup(), **settings)
+        self.settings.setEnabled(False)
+        self.cancel.setEnabled(True)
+        self.timer.start()
+
+    def reduceStep(self):
+        """
+        Process a single step of the running job and update the progress.
+        The job is cancelled and the error is reported when an error
+        occurs.
+        """
+        if self.job is None:
+            return
 
-        # wrap reduction in undo chunk
-        with utils.UndoChunkContext():
-            # reduce keyframes
-            for i, animationCurve in enumerate(animationCurves):
-                r = KeyframeReduction(animationCurve)
-                rate += r.reduce(**settings)
+        try:
+            done = self.job.step()
+        except Exception as e:
+            OpenMaya.MGlobal.displayError("Keyframe reduction failed: {}".format(e))
+            self.cancelReduce()
+            return
+
+        # update progress
+        self.progress.setValue(len(self.job.rates))
+
+        if done:
+            self.reduceFinished()
 
-                # increment progress
-                self.progress.setFormat(animationCurve)
-                self.progress.setValue(i+1)
+    def cancelReduce(self):
+        """
+        Cancel the running job, the animation curves that are already
+        reduced remain reduced.
+        """
+        if self.job is None:
+            return
+
+        self.job.cancel()
+        self.reduceFinished()
+
+    def reduceFinished(self):
+        """
+        Stop the timer, print the overall reduction rate and reset the ui.
+        Animation curves that failed are reported.
+        """
+        self.timer.stop()
+
+        if self.job.failed:
+            OpenMaya.MGlobal.displayError(
+                "Keyframe reduction failed for {} animation curve(s): {}".format(
+                    len(self.job.failed),
+                    self.job.error
+                )
+            )
+
+        rates = self.job.rates
+        print(
+            "< KeyframeReductionWidget.reduce() "
+            "| animation-curves: {0}/{1} "
+            "| overall-reduction-rate: {2:,.2f}% >".format(
+                len(rates),
+                len(self.job.animationCurves),
+                sum(rates) / max(len(rates), 1)
+            )
+        )
 
-        print "< KeyframeReductionWidget.reduce() " \
-              "| overall-reduction-rate: {0:,.2f}% >".format(rate/num)
+        self.job = None
+        self.settings.setEnabled(True)
+        self.cancel.setEnabled(False)
 
     # ------------------------------------------------------------------------
 
     def closeEvent(self, event):
+        self.cancelReduce()
         self.filter.removeCallback()
         super(KeyframeReductionWidget, self).closeEvent(event)
 
@@ -1,5 +1,12 @@
+import os
 import decimal
-from maya import cmds
+
+try:
+    from maya import cmds
+except ImportError:
+    # maya is not available, only the maya independent utilities can be used
+    # this allows the fitting to be run using any python interpreter.
+    cmds = None
 
 
 # ----------------------------------------------------------------------------
@@ -8,6 +15,15 @@ from maya import cmds
 EPSILON = 12e-11
 THRESHOLD = 12e-5
 
+PLUGIN_NAME = "keyframeReductionCommand"
+PLUGIN_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "plug-ins", PLUGIN_NAME + ".py"
+))
+
+# animation curve changes that are applied outside of the keyframeReduction
+# command, the command takes them over so they end up in the undo queue.
+ANIM_CURVE_CHANGES = {}
+
 
 # ----------------------------------------------------------------------------
 
@@ -31,6 +47,37 @@ class UndoChunkContext(object):
 # ----------------------------------------------------------------------------
 
 
+def loadPlugin():
+    """
+    Load the plugin that registers the keyframeReduction command if it is
+    not loaded yet. The plugin is loaded from the module's plug-ins folder
+    as the plug-in path is not always updated after the module is installed.
+    """
+    if cmds.pluginInfo(PLUGIN_NAME, query=True, loaded=True):
+        return
+
+    path = PLUGIN_PATH if os.path.exists(PLUGIN_PATH) else PLUGIN_NAME
+    cmds.loadPlugin(path, quiet=True)
+
+
+def addAnimCurveChange(change):
+    """
+    Add an animation curve change that is already applied to the undo queue
+    as a single step. The keyframeReduction command takes over the change,
+    undoing the command undoes all of the changes recorded in it.
+
+    :param OpenMayaAnim.MAnimCurveChange change:
+    """
+    loadPlugin()
+
+    key = str(id(change))
+    ANIM_CURVE_CHANGES[key] = change
+    cmds.keyframeReduction(animCurveChange=key)
+
+
+# ----------------------------------------------------------------------------
+
+
 def floatRange(start, end, step):
     """
     :param int/float start:
@@ -76,17 +123,33 @@ def validateAnimationCurve(animationCurve):
 
 def filterAnimationCurves(animationCurves):
     """
-    Loop all the animation curves an run the validation function to make sure
-    the animation curves are suitable for reduction.
+    Filter the animation curves to make sure the animation curves are
+    suitable for reduction, the validation is the same as the
+    validateAnimationCurve function. The connections and reference state of
+    all animation curves are queried at once.
 
     :param list animationCurves:
     :return: Animation curves
     :rtype: list
     """
+    # validate animation curves, the commands use the selection when no
+    # nodes are provided.
+    if not animationCurves:
+        return []
+
+    # get driven and referenced animation curves
+    connections = cmds.listConnections(
+        ["{}.input".format(animationCurve) for animationCurve in animationCurves],
+        connections=True,
+    ) or []
+
+    invalid = set(plug.split(".", 1)[0] for plug in connections[::2])
+    invalid.update(cmds.ls(animationCurves, referencedNodes=True) or [])
+
     return [
         animationCurve
         for animationCurve in animationCurves
-        if validateAnimationCurve(animationCurve)
+        if animationCurve not in invalid
     ]
 
 
@@ -97,31 +160,98 @@ def filterAnimationCurvesByPlug(animationCurves):
     :rtype: dict
     """
     data = {}
+    attributes = getAnimationCurveAttributes(animationCurves)
 
     for animationCurve in animationCurves:
-        # get plug
-        plug = cmds.listConnections(
-            "{}.output".format(animationCurve),
-            plugs=True,
-            source=False,
-            destination=True,
-            skipConversionNodes=True,
-        )
+        # get attribute
+        attribute = attributes.get(animationCurve)
+        if not attribute:
+            continue
+
+        # append animation curve to attribute list
+        data.setdefault(attribute, []).append(animationCurve)
+
+    return data
 
+
+def filterAnimationCurvesByNode(animationCurves):
+    """
+    :param list animationCurves:
+    :return: Filtered animation curves grouped by the node they are connected to
+    :rtype: dict
+    """
+    data = {}
+    plugs = getAnimationCurvePlugs(animationCurves)
+
+    for animationCurve in animationCurves:
+        # get plug
+        plug = plugs.get(animationCurve)
         if not plug:
             continue
 
-        # get attribute
-        attribute = plug[0].split(".", 1)[-1]
+        # append animation curve to node list
+        data.setdefault(plug.split(".", 1)[0], []).append(animationCurve)
+
+    return data
 
-        # add attribute as a key
-        if attribute not in data.keys():
-            data[attribute] = []
 
-        # append animation curve to attribute list
-        data[attribute].append(animationCurve)
+def getAnimationCurveAttribute(animationCurve):
+    """
+    :param str animationCurve:
+    :return: Attribute the animation curve is connected to
+    :rtype: str/None
+    """
+    return getAnimationCurveAttributes([animationCurve]).get(animationCurve)
 
-    return data
+
+def getAnimationCurveAttributes(animationCurves):
+    """
+    Get the attribute each animation curve is connected to, the connections
+    of all animation curves are queried at once. When an animation curve is
+    connected to multiple attributes the first attribute is used.
+
+    :param list animationCurves:
+    :return: Attributes of the connected animation curves
+    :rtype: dict
+    """
+    return dict(
+        (animationCurve, plug.split(".", 1)[-1])
+        for animationCurve, plug in getAnimationCurvePlugs(animationCurves).items()
+    )
+
+
+def getAnimationCurvePlugs(animationCurves):
+    """
+    Get the plug each animation curve is connected to, the connections of
+    all animation curves are queried at once. When an animation curve is
+    connected to multiple plugs the first plug is used.
+
+    :param list animationCurves:
+    :return: Plugs of the connected animation curves
+    :rtype: dict
+    """
+    # validate animation curves
+    if not animationCurves:
+        return {}
+
+    # get plugs, the connections are returned as pairs of the animation
+    # curve plug and the connected plug.
+    connections = cmds.listConnections(
+        ["{}.output".format(animationCurve) for animationCurve in animationCurves],
+        plugs=True,
+        source=False,
+        destination=True,
+        skipConversionNodes=True,
+        connections=True,
+    ) or []
+
+    plugs = {}
+    for source, destination in zip(connections[::2], connections[1::2]):
+        animationCurve = source.split(".", 1)[0]
+        if animationCurve not in plugs:
+            plugs[animationCurve] = destination
+
+    return plugs
 
 
 # ----------------------------------------------------------------------------
@@ -135,32 +265,64 @@ def getAllAnimationCurves():
     return filterAnimationCurves(cmds.ls(type="animCurve") or [])
 
 
-def getSelectionAnimationCurves():
+def getAnimationCurves(nodes):
     """
-    :return: Selection animation curves
+    Get the animation curves of the provided nodes, nodes that are animation
+    curves are used directly, for other nodes the connected animation curves
+    are used. The nodes are queried at once.
+
+    :param list nodes:
+    :return: Suitable animation curves
     :rtype: list
     """
-    # get selection
-    animationCurves = set()
-    selection = cmds.ls(sl=True) or []
-
-    # loop selection
-    for sel in selection:
-        # add selection is an animation curve
-        if cmds.nodeType(sel).startswith("animCurve"):
-            animationCurves.add(sel)
-            continue
-
-        # check if any animation curves are connected to node
-        for animationCurve in cmds.listConnections(
-            sel,
-            type="animCurve",
-            source=True,
-            destination=False,
-            skipConversionNodes=True,
-        ) or []:
-            animationCurves.add(animationCurve)
+    # validate nodes
+    if not nodes:
+        return []
+
+    # get nodes that are animation curves
+    animationCurves = set(cmds.ls(nodes, type="animCurve") or [])
+    nodes = [node for node in nodes if node not in animationCurves]
+
+    # get animation curves connected to the other nodes
+    if nodes:
+        animationCurves.update(
+            cmds.listConnections(
+                nodes,
+                type="animCurve",
+                source=True,
+                destination=False,
+                skipConversionNodes=True,
+            ) or []
+        )
 
     # convert animation curves to list
     animationCurves = list(animationCurves)
     return filterAnimationCurves(animationCurves)
+
+
+def getNodeAnimationCurves(node):
+    """
+    :param str node:
+    :return: The node if it is an animation curve or the animation curves connected to the node
+    :rtype: list
+    """
+    # add node is an animation curve
+    if cmds.nodeType(node).startswith("animCurve"):
+        return [node]
+
+    # check if any animation curves are connected to node
+    return cmds.listConnections(
+        node,
+        type="animCurve",
+        source=True,
+        destination=False,
+        skipConversionNodes=True,
+    ) or []
+
+
+def getSelectionAnimationCurves():
+    """
+    :return: Selection animation curves
+    :rtype: list
+    """
+    return getAnimationCurves(cmds.ls(sl=True) or [])